@@ -1,9 +1,16 @@
 from typing import Any, Text, Dict, List
 from rasa_sdk import Action, Tracker
 from rasa_sdk.executor import CollectingDispatcher
-import datetime
-import json
 
+from actions.compaction import compacted
+from actions.entities import get_entities
+from actions.instrumentation import instrumented
+from actions.pricing_engine import get_pricing_engine, get_tenant_pricing_engine
+from actions.tenant_config import get_tenant_store, tenant_for_tracker
+from actions.time_snapshot import get_time_snapshot
+
+@instrumented
+@compacted
 class ActionAdjustPrice(Action):
     def name(self) -> Text:
         return "action_adjust_price"
@@ -12,40 +19,57 @@ class ActionAdjustPrice(Action):
             tracker: Tracker,
             domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
         
-        # Get current time and demand factors
-        now = datetime.datetime.now()
-        hour = now.hour
-        day = now.strftime('%A').lower()
+        # Get every requested item and quote them against the tenant's precompiled rules
+        entities = get_entities(tracker)
+        requested = entities.distinct("food_item")
+        config = get_tenant_store().get(tenant_for_tracker(tracker))
+        engine = get_tenant_pricing_engine(config.etag, config.settings.get("pricing"))
 
-        # Define peak hours and pricing factors
-        peak_hours = {
-            'lunch': (11, 14),
-            'dinner': (18, 21)
-        }
+        # The shared rules' factors for this hour are already in the time snapshot
+        snapshot = get_time_snapshot()
+        factors = (snapshot.day_factor, snapshot.peak_factor) if engine is get_pricing_engine() else None
 
-        day_factors = {
-            'monday': 0.9,
-            'friday': 1.2,
-            'saturday': 1.3,
-            'sunday': 1.1
-        }
+        if len(requested) > 1:
+            # One table read and one multiply for the whole list
+            batch = engine.quote_batch([entity.value for entity in requested], when=snapshot.start, factors=factors)
+            day_factor = batch.day_factor
+            peak_factor = batch.peak_factor
 
-        # Calculate current demand
-        is_peak = False
-        for period, (start, end) in peak_hours.items():
-            if start <= hour <= end:
-                is_peak = True
-                break
+            # Items without a base price of their own are flagged, not quoted at the default
+            priced = [entity.value in engine for entity in requested]
+            response = "Current pricing:\n\n"
+            for entity, adjusted, has_price in zip(requested, batch.adjusted.tolist(), priced):
+                response += f"• {entity.raw}: ${adjusted:.2f}\n" if has_price else f"• {entity.raw}: no set price\n"
+            if day_factor != 1.0:
+                response += f"\nDay adjustment: {(day_factor - 1) * 100:+.0f}%"
+            if peak_factor != 1.0:
+                response += f"\nPeak hour adjustment: {(peak_factor - 1) * 100:+.0f}%"
 
-        # Get base price from tracker
-        food_item = next(tracker.get_latest_entity_values("food_item"), None)
-        base_price = 20.0  # Mock base price
+            dispatcher.utter_message(
+                text=response,
+                custom={
+                    "price_data": {
+                        "items": [
+                            {"item": quote.item, "base": quote.base, "adjusted": quote.adjusted}
+                            for quote, has_price in zip(batch.quotes(), priced) if has_price
+                        ],
+                        "unpriced": [entity.raw for entity, has_price in zip(requested, priced) if not has_price],
+                        "factors": {
+                            "day": day_factor,
+                            "peak": peak_factor
+                        }
+                    }
+                }
+            )
+            return []
 
-        # Calculate adjusted price
-        day_factor = day_factors.get(day, 1.0)
-        peak_factor = 1.2 if is_peak else 1.0
-        
-        adjusted_price = base_price * day_factor * peak_factor
+        food_item = requested[0].raw if requested else None
+        quote = engine.quote(requested[0].value if requested else None, snapshot.start, factors)
+
+        base_price = quote.base
+        day_factor = quote.day_factor
+        peak_factor = quote.peak_factor
+        adjusted_price = quote.adjusted
 
         # Format response
         response = f"Current pricing for {food_item if food_item else 'menu items'}:\n\n"
@@ -4,8 +4,19 @@ from rasa_sdk.executor import CollectingDispatcher
 import logging
 import datetime
 
+from actions.compaction import compacted
+from actions.entities import get_entities
+from actions.event_sink import emit_event
+from actions.instrumentation import instrumented
+from actions.inventory_store import get_inventory_store
+from actions.pricing_engine import get_pricing_engine, get_tenant_pricing_engine
+from actions.tenant_config import get_tenant_store, tenant_for_tracker
+from actions.time_snapshot import get_time_snapshot
+
 logger = logging.getLogger(__name__)
 
+@instrumented
+@compacted
 class ActionCheckInventory(Action):
     def name(self) -> Text:
         return "action_check_inventory"
@@ -14,66 +25,92 @@ class ActionCheckInventory(Action):
             tracker: Tracker,
             domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
         
-        # Get requested item
-        item = next(tracker.get_latest_entity_values("food_item"), None)
+        # Get every requested item, as said and as its canonical menu id
+        entities = get_entities(tracker)
+        requested = entities.distinct("food_item")
+        category = entities.get("inventory_category")
+        items = [entity.raw for entity in requested]
+        item = items[0] if items else None
         
-        # Mock inventory data
-        inventory = {
-            "proteins": {
-                "ribeye": {"quantity": 45, "unit": "steaks", "threshold": 20},
-                "salmon": {"quantity": 38, "unit": "fillets", "threshold": 15},
-                "chicken": {"quantity": 85, "unit": "breasts", "threshold": 30}
-            },
-            "produce": {
-                "lettuce": {"quantity": 25, "unit": "heads", "threshold": 10},
-                "tomatoes": {"quantity": 50, "unit": "kg", "threshold": 20},
-                "onions": {"quantity": 75, "unit": "kg", "threshold": 25}
-            },
-            "dairy": {
-                "butter": {"quantity": 40, "unit": "kg", "threshold": 15},
-                "cream": {"quantity": 30, "unit": "L", "threshold": 10},
-                "cheese": {"quantity": 55, "unit": "kg", "threshold": 20}
-            }
-        }
+        # Shared, process-wide inventory store
+        inventory = get_inventory_store()
 
-        # Log inventory check
-        logger.info(f"Inventory check requested for: {item}")
+        logger.debug(f"Inventory check requested for: {items or category}")
         
         response = ""
         alerts = []
         
-        if item:
+        if len(requested) == 1:
             # Check specific item
-            for category, items in inventory.items():
-                if item.lower() in items:
-                    item_data = items[item.lower()]
-                    response = f"Current inventory for {item}:\n"
-                    response += f"• Quantity: {item_data['quantity']} {item_data['unit']}\n"
-                    
-                    if item_data['quantity'] < item_data['threshold']:
-                        alerts.append(f"⚠️ {item} is below reorder threshold!")
+            item_data = inventory.get(requested[0].value)
+            if item_data:
+                response = f"Current inventory for {item}:\n"
+                response += f"• Quantity: {item_data.quantity:g} {item_data.unit}\n"
+
+                if item_data.below_threshold:
+                    alerts.append(f"⚠️ {item} is below reorder threshold!")
+            else:
+                response = f"I couldn't find {item} in the inventory."
+        elif requested:
+            # Check every item in one read, e.g. "check salmon, ribeye and cream"
+            response = "Current inventory:\n"
+            for name, item_data in zip(items, inventory.lookup_many([entity.value for entity in requested])):
+                if item_data:
+                    response += f"• {name}: {item_data.quantity:g} {item_data.unit}\n"
+                    if item_data.below_threshold:
+                        alerts.append(f"⚠️ {name} is below reorder threshold!")
+                else:
+                    response += f"• {name}: not in the inventory\n"
+        elif entities.raw("inventory_category") and not category:
+            response = (f"I don't have an inventory category called {entities.raw('inventory_category')}. "
+                        f"I can check {', '.join(name.lower() for name in inventory.category_names())}.")
+        elif category:
+            # Stock and current price for a whole category: one column read, one batch quote
+            columns = inventory.category_columns(category)
+            config = get_tenant_store().get(tenant_for_tracker(tracker))
+            engine = get_tenant_pricing_engine(config.etag, config.settings.get("pricing"))
+            snapshot = get_time_snapshot()
+            factors = (snapshot.day_factor, snapshot.peak_factor) if engine is get_pricing_engine() else None
+            quote = engine.quote_batch(columns.names, when=snapshot.start, factors=factors)
+
+            response = f"Stock and current prices for {category}:\n"
+            for name, unit, quantity, below, price in zip(columns.names, columns.units, columns.quantities.tolist(),
+                                                          columns.below_threshold.tolist(), quote.adjusted.tolist()):
+                response += f"• {name.title()}: {quantity:g} {unit}"
+                response += f" · ${price:.2f}\n" if name in engine else " · no set price\n"
+                if below:
+                    alerts.append(f"⚠️ {name} is below reorder threshold!")
         else:
             # General inventory status
             response = "Current inventory status:\n\n"
-            for category, items in inventory.items():
-                response += f"{category.title()}:\n"
-                for item_name, item_data in items.items():
-                    response += f"• {item_name.title()}: {item_data['quantity']} {item_data['unit']}\n"
-                    
-                    if item_data['quantity'] < item_data['threshold']:
-                        alerts.append(f"⚠️ {item_name} is below reorder threshold!")
+            for category_name, category_items in inventory.categories().items():
+                response += f"{category_name.title()}:\n"
+                for item_data in category_items:
+                    response += f"• {item_data.name.title()}: {item_data.quantity:g} {item_data.unit}\n"
                 response += "\n"
 
+            alerts = [f"⚠️ {item_name} is below reorder threshold!" for item_name in inventory.below_threshold()]
+
         if alerts:
             response += "\nAlerts:\n" + "\n".join(alerts)
 
+        # Queue the check for analytics; written in batches off the response path
+        emit_event("inventory_check", {
+            "checked_item": item,
+            "checked_items": items,
+            "category": category,
+            "alerts": alerts
+        }, sender_id=tracker.sender_id)
+
         dispatcher.utter_message(
             text=response,
             custom={
                 "inventory_data": {
                     "timestamp": datetime.datetime.now().isoformat(),
                     "alerts": alerts,
-                    "checked_item": item
+                    "checked_item": item,
+                    "checked_items": items,
+                    "category": category
                 }
             }
         )
@@ -3,8 +3,15 @@ from rasa_sdk import Action, Tracker
 from rasa_sdk.executor import CollectingDispatcher
 import logging
 
+from actions.compaction import compacted
+from actions.event_sink import emit_event
+from actions.feedback_scorer import scorer
+from actions.instrumentation import instrumented
+
 logger = logging.getLogger(__name__)
 
+@instrumented
+@compacted
 class ActionHandleFeedback(Action):
     def name(self) -> Text:
         return "action_handle_feedback"
@@ -16,23 +23,28 @@ class ActionHandleFeedback(Action):
         # Extract sentiment from the message
         message = tracker.latest_message.get('text', '')
         
-        # Log feedback for analytics
-        logger.info(f"Feedback received: {message}")
-        
-        # Analyze feedback content
-        positive_keywords = ['great', 'excellent', 'amazing', 'good', 'love', 'perfect']
-        negative_keywords = ['bad', 'poor', 'terrible', 'slow', 'cold', 'wrong']
-        
-        is_positive = any(word in message.lower() for word in positive_keywords)
-        is_negative = any(word in message.lower() for word in negative_keywords)
+        # Analyze feedback content in a single pass
+        feedback = scorer.score(message)
+
+        # Queue feedback for analytics; written in batches off the response path
+        emit_event("feedback", {
+            "text": message,
+            "sentiment": feedback.sentiment,
+            "score": feedback.score,
+            "positive": feedback.positive,
+            "negative": feedback.negative,
+            "aspects": sorted(feedback.aspects),
+            "timestamp": tracker.get_slot("timestamp")
+        }, sender_id=tracker.sender_id)
+        logger.debug(f"Feedback received: {message}")
         
-        if is_positive:
+        if feedback.sentiment == "positive":
             response = "Thank you for your wonderful feedback! We're delighted to hear you enjoyed your experience."
-            if 'service' in message.lower():
+            if "service" in feedback.aspects:
                 response += " Our team takes great pride in providing exceptional service."
-            elif 'food' in message.lower():
+            elif "food" in feedback.aspects:
                 response += " Our chef will be thrilled to hear your appreciation."
-        elif is_negative:
+        elif feedback.sentiment in ("negative", "mixed"):
             response = "I sincerely apologize for any disappointment. Your feedback is invaluable to us."
             response += " Would you like to speak with a manager to address your concerns?"
         else:
@@ -42,7 +54,9 @@ class ActionHandleFeedback(Action):
             text=response,
             custom={
                 "feedback_data": {
-                    "sentiment": "positive" if is_positive else "negative" if is_negative else "neutral",
+                    "sentiment": feedback.sentiment,
+                    "score": feedback.score,
+                    "aspects": sorted(feedback.aspects),
                     "timestamp": tracker.get_slot("timestamp"),
                     "user_id": tracker.sender_id
                 }
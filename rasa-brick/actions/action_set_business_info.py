@@ -1,9 +1,16 @@
 from typing import Any, Text, Dict, List
+import os
 from rasa_sdk import Action, Tracker
 from rasa_sdk.executor import CollectingDispatcher
 from rasa_sdk.events import SlotSet
-import json
 
+from actions.compaction import compacted
+from actions.entities import get_entities
+from actions.instrumentation import instrumented
+from actions.tenant_config import DEFAULT_TENANT, TenantOwnershipError, get_tenant_store, owner_for_tracker, tenant_for_tracker, tenant_id_for
+
+@instrumented
+@compacted
 class ActionSetBusinessInfo(Action):
     def name(self) -> Text:
         return "action_set_business_info"
@@ -13,36 +20,35 @@ class ActionSetBusinessInfo(Action):
             domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
         
         # Extract business information from entities
-        business_name = next(tracker.get_latest_entity_values("business_name"), None)
-        cuisine_type = next(tracker.get_latest_entity_values("cuisine_type"), None)
+        entities = get_entities(tracker)
+        business_name = entities.raw("business_name")
+        cuisine_type = entities.raw("cuisine_type")
         
-        # Default operating hours
-        default_hours = {
-            "monday": {"open": "09:00", "close": "22:00"},
-            "tuesday": {"open": "09:00", "close": "22:00"},
-            "wednesday": {"open": "09:00", "close": "22:00"},
-            "thursday": {"open": "09:00", "close": "22:00"},
-            "friday": {"open": "09:00", "close": "23:00"},
-            "saturday": {"open": "10:00", "close": "23:00"},
-            "sunday": {"open": "10:00", "close": "22:00"}
-        }
-
-        # Default AI features
-        default_features = {
-            "autoUpsell": True,
-            "allergyWarnings": True,
-            "dietaryRecommendations": True,
-            "smartPairing": True
-        }
-
-        # Create business settings
-        business_info = {
-            "name": business_name or "New Restaurant",
-            "type": "restaurant",
-            "cuisine": cuisine_type or "contemporary",
-            "operating_hours": default_hours,
-            "ai_features": default_features
-        }
+        # Record the profile in the tenant store; hours and AI features start from the shared defaults
+        tenant_id = tenant_id_for(business_name) if business_name else tenant_for_tracker(tracker)
+        if tenant_id == DEFAULT_TENANT:
+            dispatcher.utter_message(text="I'd be happy to set up your restaurant profile. What's the name of your business?")
+            return []
+        # Ownership is enforced only when the channel identifies the user
+        owner = owner_for_tracker(tracker)
+        if owner is None and os.getenv("BRICK_TENANT_OWNER_METADATA"):
+            dispatcher.utter_message(text="Please sign in to set up your restaurant profile from chat, "
+                                          "or use the dashboard.")
+            return []
+        changes = {}
+        if business_name:
+            changes["name"] = business_name
+        if cuisine_type:
+            changes["cuisine"] = cuisine_type
+        try:
+            # Only the user who set the tenant up may change it from chat
+            config = get_tenant_store().update(tenant_id, changes, owner=owner)
+        except TenantOwnershipError:
+            name = business_name or tracker.get_slot("business_name") or "This restaurant"
+            dispatcher.utter_message(text=f"{name} already has a profile, and only its owner can change it. "
+                                          "Please update it from the dashboard.")
+            return []
+        business_info = config.settings
 
         response = f"I've set up your restaurant profile:\n\n"
         response += f"• Name: {business_info['name']}\n"
@@ -51,14 +57,21 @@ class ActionSetBusinessInfo(Action):
         response += "I've configured standard operating hours and enabled all AI features. "
         response += "You can customize these settings anytime through the dashboard."
 
+        # Clients that already hold this version only get the version and etag
+        payload = {"tenant": config.tenant_id, "version": config.version, "etag": config.etag}
+        if tracker.get_slot("business_info_etag") != config.etag:
+            payload["settings"] = config.settings_dict()
+
         dispatcher.utter_message(
             text=response,
             custom={
-                "business_info": business_info
+                "business_info": payload
             }
         )
 
         return [
             SlotSet("business_name", business_info["name"]),
-            SlotSet("cuisine_type", business_info["cuisine"])
+            SlotSet("cuisine_type", business_info["cuisine"]),
+            SlotSet("tenant_id", config.tenant_id),
+            SlotSet("business_info_etag", config.etag)
         ]
\ No newline at end of file
@@ -2,9 +2,21 @@ from typing import Any, Text, Dict, List
 from rasa_sdk import Action, Tracker
 from rasa_sdk.executor import CollectingDispatcher
 from rasa_sdk.events import SlotSet
-import json
-import random
+from datetime import datetime
 
+from actions.cart import Cart, CartFullError
+from actions.catalog import get_catalog, time_of_day
+from actions.compaction import compacted
+from actions.entities import get_entities
+from actions.instrumentation import instrumented
+from actions.inventory_store import get_inventory_store
+from actions.menu_index import DIETARY_BITS, get_menu_index, split_dietary
+from actions.reservations import DEFAULT_LOCATION, HoldExpiredError, SlotUnavailableError, get_reservation_engine
+from actions.tenant_config import get_tenant_store, tenant_for_tracker
+from actions.time_snapshot import get_time_scheduler
+
+@instrumented
+@compacted
 class ActionProcessOrder(Action):
     def name(self) -> Text:
         return "action_process_order"
@@ -13,63 +25,47 @@ class ActionProcessOrder(Action):
             tracker: Tracker,
             domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
         
-        food_item = next(tracker.get_latest_entity_values("food_item"), None)
-        quantity = next(tracker.get_latest_entity_values("quantity"), 1)
+        entities = get_entities(tracker)
+        food_item = entities.raw("food_item")
+        menu_item = entities.get("food_item")
+        quantity = entities.get("quantity", 1)
         
         if not food_item:
             dispatcher.utter_message(text="What would you like to order from our menu?")
             return []
 
-        # Get current ordered items
-        ordered_items = tracker.get_slot("ordered_items") or []
-        ordered_items.append({
-            "item": food_item,
-            "quantity": quantity
-        })
+        # Coalesce into the current cart
+        cart = Cart.decode(tracker.get_slot("ordered_items"))
+        try:
+            delta = cart.add(menu_item, quantity)
+        except CartFullError:
+            dispatcher.utter_message(text="Your selection is already quite extensive. Shall we finalize it before adding more?")
+            return []
 
         # Determine cuisine and suggest pairings
-        cuisine_mapping = {
-            "steak": "Contemporary",
-            "salmon": "Seafood",
-            "risotto": "Italian",
-            "sushi": "Japanese",
-            "dosa": "Indian",
-            "tacos": "Mexican"
-        }
-        
-        cuisine = cuisine_mapping.get(food_item.lower(), None)
+        catalog = get_catalog()
+        cuisine = catalog.cuisine_for(menu_item)
         
         # Craft a luxurious response
         response = f"Excellent choice! I've added {quantity}x {food_item} to your selection."
-        
-        if cuisine:
-            wine_suggestions = {
-                "Contemporary": ["Cabernet Sauvignon", "Malbec"],
-                "Seafood": ["Chardonnay", "Sauvignon Blanc"],
-                "Italian": ["Chianti", "Barolo"],
-                "Japanese": ["Junmai Daiginjo Sake", "Riesling"],
-                "Indian": ["Gewürztraminer", "Rosé"],
-                "Mexican": ["Tempranillo", "Albariño"]
-            }
-            
-            wines = wine_suggestions.get(cuisine, [])
-            if wines:
-                response += f"\n\nMay I suggest a pairing with our {' or '.join(wines)}?"
+        response += catalog.pairing_suggestion(cuisine)
 
         dispatcher.utter_message(
             text=response,
             custom={
-                "order_data": ordered_items,
+                "order_delta": delta.as_dict(),
                 "cuisine": cuisine,
                 "show_customization": True
             }
         )
         
         return [
-            SlotSet("ordered_items", ordered_items),
+            SlotSet("ordered_items", cart.encode()),
             SlotSet("current_cuisine", cuisine)
         ]
 
+@instrumented
+@compacted
 class ActionShowRecommendations(Action):
     def name(self) -> Text:
         return "action_show_recommendations"
@@ -78,46 +74,42 @@ class ActionShowRecommendations(Action):
             tracker: Tracker,
             domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
         
-        # Get time of day for contextual recommendations
-        from datetime import datetime
-        hour = datetime.now().hour
-        
-        recommendations = {
-            "morning": [
-                "Our signature Eggs Benedict with house-made hollandaise",
-                "Artisanal pastry selection from our in-house bakery",
-                "Organic steel-cut oatmeal with seasonal berries"
-            ],
-            "afternoon": [
-                "Chef's tasting menu with wine pairings",
-                "House-aged prime ribeye with truffle butter",
-                "Wild-caught salmon with citrus beurre blanc"
-            ],
-            "evening": [
-                "Seven-course degustation menu",
-                "Dry-aged Tomahawk steak for two",
-                "Fresh seafood tower with champagne"
-            ]
-        }
-        
-        if 6 <= hour < 11:
-            time_of_day = "morning"
-        elif 11 <= hour < 17:
-            time_of_day = "afternoon"
+        # Get time of day for contextual recommendations; when closed, plan for the next opening
+        scheduler = get_time_scheduler()
+        now = scheduler.clock()
+        snapshot = scheduler.current(now)
+        config = get_tenant_store().get(tenant_for_tracker(tracker))
+        opening = None if config.is_open(now) else config.next_opening(now)
+        period = snapshot.period if opening is None else time_of_day(opening.hour)
+        
+        # Rank dishes near the current order, skipping low stock and unmet dietary needs
+        dietary = list(tracker.get_slot("dietary_preferences") or [])
+        dietary += get_entities(tracker).all("dietary_restriction")
+        dietary, unsupported = split_dietary(dietary)
+        ordered = Cart.decode(tracker.get_slot("ordered_items")).lines
+        
+        if opening is None and not ordered and not dietary:
+            # Nothing personal to rank against: this hour's default set is precomputed
+            response = snapshot.recommendations_text
         else:
-            time_of_day = "evening"
-            
-        suggestions = recommendations[time_of_day]
-        
-        response = "Allow me to present our chef's recommendations:\n\n"
-        for suggestion in suggestions:
-            response += f"• {suggestion}\n"
-            
-        response += "\nEach dish is crafted with seasonal ingredients from our local artisanal partners."
+            picks = get_menu_index().recommend(period, ordered=ordered, dietary=dietary,
+                                               unavailable=get_inventory_store().below_threshold())
+            catalog = get_catalog()
+            if picks:
+                response = catalog.dishes_text(tuple(pick.text for pick in picks))
+            else:
+                response = catalog.recommendations_text(period)
+        if unsupported:
+            response = (f"I'm sorry, I can't filter the menu for {', '.join(unsupported)}, so please check these dishes with your server."
+                        f" I can filter for {', '.join(DIETARY_BITS)}.\n\n" + response)
+        if opening is not None:
+            response = f"We're closed right now; we open again {opening.strftime('%A at %H:%M')}. Here's what to look forward to:\n\n" + response
         
         dispatcher.utter_message(text=response)
         return []
 
+@instrumented
+@compacted
 class ActionSuggestWine(Action):
     def name(self) -> Text:
         return "action_suggest_wine"
@@ -128,35 +120,13 @@ class ActionSuggestWine(Action):
         
         current_cuisine = tracker.get_slot("current_cuisine")
         
-        wine_pairings = {
-            "Contemporary": {
-                "red": ["2018 Château Margaux", "2016 Opus One"],
-                "white": ["2019 Puligny-Montrachet"]
-            },
-            "Seafood": {
-                "white": ["2020 Chablis Grand Cru", "2019 Meursault"],
-                "sparkling": ["Krug Grande Cuvée"]
-            },
-            "Italian": {
-                "red": ["2015 Barolo Riserva", "2017 Brunello di Montalcino"],
-                "white": ["2020 Gavi di Gavi"]
-            }
-        }
-        
-        if current_cuisine in wine_pairings:
-            wines = wine_pairings[current_cuisine]
-            response = "Our sommelier recommends:\n\n"
-            
-            for wine_type, selections in wines.items():
-                response += f"{wine_type.title()} Wines:\n"
-                for wine in selections:
-                    response += f"• {wine}\n"
-        else:
-            response = "I'd be happy to have our sommelier suggest the perfect wine pairing for your selection."
+        response = get_catalog().wine_text(current_cuisine)
         
         dispatcher.utter_message(text=response)
         return []
 
+@instrumented
+@compacted
 class ActionHandleReservation(Action):
     def name(self) -> Text:
         return "action_handle_reservation"
@@ -165,34 +135,99 @@ class ActionHandleReservation(Action):
             tracker: Tracker,
             domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
         
-        party_size = next(tracker.get_latest_entity_values("party_size"), None)
-        date = next(tracker.get_latest_entity_values("date"), None)
-        occasion = next(tracker.get_latest_entity_values("occasion"), None)
+        entities = get_entities(tracker)
+        party_size = entities.raw("party_size")
+        date = entities.raw("date")
+        occasion = entities.raw("occasion")
+        guests = entities.get("party_size")
+        # The hold from an earlier turn stays until it is replaced or released
+        hold_id = tracker.get_slot("reservation_hold")
+        hold = None
         
         response = "I'd be delighted to assist with your reservation."
         
-        if occasion:
-            special_touches = {
-                "anniversary": "We'll ensure a romantic table setting with complimentary champagne.",
-                "birthday": "We'll arrange for a special dessert presentation.",
-                "business": "We'll reserve our private dining room for your comfort."
-            }
-            response += f"\n\n{special_touches.get(occasion, '')}"
-        
-        if party_size:
-            response += f"\n\nFor your party of {party_size}, I recommend:"
-            if int(party_size) <= 2:
-                response += "\n• Our intimate window tables overlooking the garden"
-            elif int(party_size) <= 6:
-                response += "\n• Our semi-private alcove seating"
+        response += get_catalog().special_touch(occasion)
+        
+        if guests:
+            # Hold the best-fitting table at the first free time from the usual seating
+            engine = get_reservation_engine()
+            now = datetime.now()
+            day = entities.get("date", now.date())
+            largest = engine.largest_party(DEFAULT_LOCATION)
+            if date and entities.get("date") is None:
+                # resolve_date leaves out days that have already passed and text it can't read
+                response += f"\n\nI couldn't find an upcoming day for \"{date}\". Which day would you like to join us?"
+            elif guests > largest:
+                response += (f"\n\nOur largest table seats {largest}, so a party of {guests} needs a group booking."
+                             " Please call us and we'll arrange it.")
             else:
-                response += "\n• Our elegant private dining room"
-        
-        response += "\n\nWould you like to proceed with the reservation?"
+                # Asking again for the same day and party keeps the table already held
+                hold = hold_id and engine.active_hold(hold_id, DEFAULT_LOCATION, day.isoformat())
+                if hold and hold.party_size != guests:
+                    hold = None
+                if not hold:
+                    if hold_id:
+                        engine.release(hold_id)
+                    earliest = engine.default_start
+                    if day == now.date():
+                        earliest = max(earliest, engine.slot_for(now.strftime("%H:%M")) + 1)
+                    offer = engine.find_slot(DEFAULT_LOCATION, day.isoformat(), guests, earliest)
+                    try:
+                        if offer:
+                            hold = engine.hold(DEFAULT_LOCATION, day.isoformat(), guests, offer.start_slot,
+                                               sender_id=tracker.sender_id)
+                    except SlotUnavailableError:
+                        hold = None
+                
+                hold_id = hold.booking_id if hold else None
+                if hold:
+                    area = engine.table(DEFAULT_LOCATION, hold.table_id).area
+                    response += f"\n\nFor your party of {guests}, I recommend:"
+                    response += f"\n• {engine.areas.get(area, area)}"
+                    response += f"\n\nI'm holding a table for you at {engine.time_for(hold.start_slot)} on {day:%A, %B} {day.day}."
+                else:
+                    response += f"\n\nI'm sorry, we're fully booked for a party of {guests} on {day:%A, %B} {day.day}."
+                if not date:
+                    response += "\n\nAs you didn't mention a day, I've looked at today. Just tell me if you'd prefer another day."
+
+        if hold or not guests:
+            response += "\n\nWould you like to proceed with the reservation?"
         
         dispatcher.utter_message(text=response)
         return [
             SlotSet("party_size", party_size),
             SlotSet("reservation_date", date),
-            SlotSet("occasion", occasion)
-        ]
\ No newline at end of file
+            SlotSet("occasion", occasion),
+            SlotSet("reservation_hold", hold_id)
+        ]
+
+@instrumented
+@compacted
+class ActionConfirmReservation(Action):
+    def name(self) -> Text:
+        return "action_confirm_reservation"
+
+    def run(self, dispatcher: CollectingDispatcher,
+            tracker: Tracker,
+            domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
+        
+        hold_id = tracker.get_slot("reservation_hold")
+        
+        if not hold_id:
+            dispatcher.utter_message(text="I don't have a table held for you yet. How many guests, and for which day?")
+            return []
+        
+        engine = get_reservation_engine()
+        try:
+            booking = engine.confirm(hold_id)
+        except HoldExpiredError:
+            dispatcher.utter_message(text="I'm sorry, the table I was holding has been released. Shall I look for another time?")
+            return [SlotSet("reservation_hold", None)]
+        
+        day = datetime.fromisoformat(booking.day)
+        response = f"Your table for {booking.party_size} is confirmed for {engine.time_for(booking.start_slot)} on {day:%A, %B} {day.day}."
+        response += " We look forward to welcoming you!"
+        
+        dispatcher.utter_message(text=response)
+        # A confirmed booking is no longer a hold a later request may release
+        return [SlotSet("reservation_hold", None)]
\ No newline at end of file
@@ -0,0 +1,64 @@
+from typing import Any, Dict, List, NamedTuple, Optional, Text
+from collections import OrderedDict
+
+from actions.entities import MAX_QUANTITY, parse_quantity
+
+# Upper bounds that keep the persisted slot a fixed maximum size
+MAX_CART_LINES = 50
+MAX_LINE_QUANTITY = MAX_QUANTITY
+
+
+class CartDelta(NamedTuple):
+    item: Text
+    added: int
+    quantity: int
+    lines: int
+    total_items: int
+
+    def as_dict(self) -> Dict[Text, Any]:
+        return self._asdict()
+
+
+class CartFullError(ValueError):
+    pass
+
+
+class Cart:
+    """Ordered items coalesced by name with integer quantities.
+
+    Persisted in the ``ordered_items`` slot as a list of ``"item:quantity"``
+    strings, one per distinct item, capped at ``MAX_CART_LINES`` lines.
+    """
+
+    def __init__(self, lines: Optional["OrderedDict[Text, int]"] = None) -> None:
+        self.lines: "OrderedDict[Text, int]" = lines or OrderedDict()
+
+    @classmethod
+    def decode(cls, slot_value: Optional[List[Any]]) -> "Cart":
+        """Read the slot, accepting both the encoded form and legacy item dicts."""
+        cart = cls()
+        for entry in slot_value or []:
+            if isinstance(entry, dict):
+                item, quantity = entry.get("item"), entry.get("quantity")
+            else:
+                item, _, quantity = str(entry).rpartition(":")
+            if item:
+                key = item.lower()
+                cart.lines[key] = min(cart.lines.get(key, 0) + parse_quantity(quantity), MAX_LINE_QUANTITY)
+        return cart
+
+    def encode(self) -> List[Text]:
+        return [f"{item}:{quantity}" for item, quantity in self.lines.items()]
+
+    @property
+    def total_items(self) -> int:
+        return sum(self.lines.values())
+
+    def add(self, item: Text, quantity: int = 1) -> CartDelta:
+        key = item.lower()
+        if key not in self.lines and len(self.lines) >= MAX_CART_LINES:
+            raise CartFullError(f"Cart already holds {MAX_CART_LINES} different items")
+        new_quantity = min(self.lines.get(key, 0) + quantity, MAX_LINE_QUANTITY)
+        added = new_quantity - self.lines.get(key, 0)
+        self.lines[key] = new_quantity
+        return CartDelta(key, added, new_quantity, len(self.lines), self.total_items)
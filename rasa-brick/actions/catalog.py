@@ -0,0 +1,135 @@
+from typing import Any, Callable, Collection, Dict, Mapping, Optional, Sequence, Text, Tuple
+from types import MappingProxyType
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CATALOG_PATH = os.path.join(os.path.dirname(__file__), "data", "catalog.json")
+
+
+def time_of_day(hour: int) -> Text:
+    if 6 <= hour < 11:
+        return "morning"
+    elif 11 <= hour < 17:
+        return "afternoon"
+    return "evening"
+
+
+def _freeze(value: Any) -> Any:
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+class Catalog:
+    """Menu, pairing and recommendation data shared by the dispatch actions.
+
+    The data is frozen at load time and rendered response fragments are
+    memoized on the instance, so repeated requests for the same cuisine,
+    occasion or time of day return the same string without rebuilding it.
+    Only keys the catalog knows are memoized; free text a guest typed is
+    rendered directly, so the memo stays bounded by the catalog's size.
+    A reload produces a new Catalog, which drops the memoized output with it.
+    """
+
+    def __init__(self, data: Mapping[Text, Any], version: float = 0.0) -> None:
+        self.version = version
+        self.cuisine_mapping = _freeze({item.lower(): cuisine for item, cuisine in data["cuisine_mapping"].items()})
+        self.wine_suggestions = _freeze(data["wine_suggestions"])
+        self.wine_pairings = _freeze(data["wine_pairings"])
+        self.recommendations = _freeze(data["recommendations"])
+        self.special_touches = _freeze(data["special_touches"])
+        self._wine_cuisines = frozenset(self.wine_pairings) | frozenset(self.wine_suggestions)
+        self._rendered: Dict[Tuple[Text, Optional[Text]], Text] = {}
+
+    @classmethod
+    def from_file(cls, path: Text) -> "Catalog":
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f), version=os.path.getmtime(path))
+
+    def cuisine_for(self, food_item: Optional[Text]) -> Optional[Text]:
+        return self.cuisine_mapping.get(food_item.lower()) if food_item else None
+
+    def _memo(self, template: Text, key: Optional[Text], known: Collection[Text],
+              render: Callable[[], Text]) -> Text:
+        if key is not None and key not in known:
+            return render()
+        cache_key = (template, key)
+        text = self._rendered.get(cache_key)
+        if text is None:
+            text = self._rendered[cache_key] = render()
+        return text
+
+    def pairing_suggestion(self, cuisine: Optional[Text]) -> Text:
+        def render() -> Text:
+            wines = self.wine_suggestions.get(cuisine, ())
+            return f"\n\nMay I suggest a pairing with our {' or '.join(wines)}?" if wines else ""
+        return self._memo("pairing_suggestion", cuisine, self.wine_suggestions, render)
+
+    def recommendations_text(self, period: Text) -> Text:
+        return self._memo("recommendations", period, self.recommendations, lambda: self.dishes_text(self.recommendations[period]))
+
+    def dishes_text(self, dishes: Sequence[Text]) -> Text:
+        # Not memoized: ranked picks vary per conversation
+        lines = "".join(f"• {dish}\n" for dish in dishes)
+        return (
+            "Allow me to present our chef's recommendations:\n\n"
+            f"{lines}"
+            "\nEach dish is crafted with seasonal ingredients from our local artisanal partners."
+        )
+
+    def wine_text(self, cuisine: Optional[Text]) -> Text:
+        def render() -> Text:
+            wines = self.wine_pairings.get(cuisine) if cuisine else None
+            if not wines and self.wine_suggestions.get(cuisine):
+                # Cuisines without a full pairing list still get their house suggestions
+                wines = {"suggested": self.wine_suggestions[cuisine]}
+            if not wines:
+                return "I'd be happy to have our sommelier suggest the perfect wine pairing for your selection."
+            sections = "".join(
+                f"{wine_type.title()} Wines:\n" + "".join(f"• {wine}\n" for wine in selections)
+                for wine_type, selections in wines.items()
+            )
+            return f"Our sommelier recommends:\n\n{sections}"
+        return self._memo("wine", cuisine, self._wine_cuisines, render)
+
+    def special_touch(self, occasion: Optional[Text]) -> Text:
+        return self._memo("special_touch", occasion, self.special_touches,
+                          lambda: f"\n\n{self.special_touches.get(occasion, '')}" if occasion else "")
+
+
+_catalog: Optional[Catalog] = None
+_catalog_lock = threading.Lock()
+_next_check = 0.0
+
+
+def get_catalog() -> Catalog:
+    """Process-wide catalog, reloaded when BRICK_CATALOG_PATH changes on disk.
+
+    The file's mtime is checked at most every BRICK_CATALOG_CHECK_INTERVAL
+    seconds, so the hot path is normally a clock read.
+    """
+    global _catalog, _next_check
+    now = time.monotonic()
+    if _catalog is not None and now < _next_check:
+        return _catalog
+    with _catalog_lock:
+        path = os.getenv("BRICK_CATALOG_PATH", DEFAULT_CATALOG_PATH)
+        _next_check = now + float(os.getenv("BRICK_CATALOG_CHECK_INTERVAL", "2"))
+        try:
+            mtime = os.path.getmtime(path)
+            if _catalog is None or mtime != _catalog.version:
+                _catalog = Catalog.from_file(path)
+                logger.info(f"Loaded catalog from {path}")
+        except (OSError, ValueError, KeyError) as e:
+            if _catalog is None:
+                raise
+            # Keep serving the last good catalog while the file is mid-edit
+            logger.error(f"Catalog reload failed, keeping previous version: {e}")
+    return _catalog
@@ -0,0 +1,116 @@
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Text, Tuple
+import functools
+import inspect
+import json
+import logging
+import os
+import threading
+
+from rasa_sdk import Tracker
+from rasa_sdk.executor import CollectingDispatcher
+
+from actions.instrumentation import PAYLOAD_BUCKETS, registry
+
+logger = logging.getLogger(__name__)
+
+# Events after which the slots the action saw may no longer hold
+SLOT_RESETS = ("restart", "reset_slots", "session_started", "rewind", "undo")
+
+
+def _dumps(value: Any) -> Text:
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), default=str)
+
+
+class ResponseCompactor:
+    """Shrinks the events an action's response adds to the tracker store and event broker.
+
+    ``SlotSet`` events that would leave a slot at the value the tracker
+    already has are dropped. Bot messages and their custom payloads are
+    left as they are, so clients receive exactly what the action sent.
+    Nothing is kept between calls, so any worker can compact any sender's
+    response.
+    """
+
+    def __init__(self, prune_slots: bool = True) -> None:
+        self.prune_slots = prune_slots
+        self._lock = threading.Lock()
+        self.stats = {"slot_events_dropped": 0, "bytes_saved": 0}
+
+    def prune_slot_events(self, slots: Mapping[Text, Any],
+                          events: Sequence[Dict[Text, Any]]) -> Tuple[List[Dict[Text, Any]], int]:
+        """Events without no-op ``SlotSet``s, and the bytes they would have taken."""
+        current = dict(slots)
+        kept: List[Dict[Text, Any]] = []
+        saved = 0
+        for position, event in enumerate(events):
+            kind = event.get("event")
+            if kind in SLOT_RESETS:
+                kept.extend(events[position:])
+                break
+            if kind == "slot":
+                name = event.get("name")
+                if name in current and current[name] == event.get("value"):
+                    saved += len(_dumps(event))
+                    continue
+                current[name] = event.get("value")
+            kept.append(event)
+        return kept, saved
+
+    def process(self, slots: Mapping[Text, Any],
+                events: Optional[List[Dict[Text, Any]]]) -> Tuple[Optional[List[Dict[Text, Any]]], int]:
+        """Compact one response's events; returns the events to send and the bytes saved."""
+        if not self.prune_slots or not events:
+            return events, 0
+        before = len(events)
+        events, saved = self.prune_slot_events(slots, events)
+        with self._lock:
+            self.stats["slot_events_dropped"] += before - len(events)
+            self.stats["bytes_saved"] += saved
+        return events, saved
+
+
+_compactor: Optional[ResponseCompactor] = None
+_compactor_lock = threading.Lock()
+
+
+def get_response_compactor() -> ResponseCompactor:
+    """Process-wide compactor; BRICK_COMPACT_SLOTS=0 keeps every SlotSet."""
+    global _compactor
+    if _compactor is None:
+        with _compactor_lock:
+            if _compactor is None:
+                _compactor = ResponseCompactor(prune_slots=os.getenv("BRICK_COMPACT_SLOTS", "1") != "0")
+    return _compactor
+
+
+def _compact(name: Text, tracker: Tracker, events: Any) -> Any:
+    try:
+        events, saved = get_response_compactor().process(tracker.slots, events)
+    except Exception as e:
+        logger.warning(f"Compacting the response of {name} failed: {e}")
+        return events
+    registry.observe_value(name, "saved_bytes", saved, PAYLOAD_BUCKETS)
+    return events
+
+
+def compacted(cls: type) -> type:
+    """Class decorator that passes the events returned by ``run`` through the compactor.
+
+    Apply it below ``@instrumented`` so the recorded payload size is the
+    compacted one.
+    """
+    run = cls.run
+
+    if inspect.iscoroutinefunction(run):
+        @functools.wraps(run)
+        async def wrapper(self, dispatcher: CollectingDispatcher, tracker: Tracker,
+                          domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
+            return _compact(self.name(), tracker, await run(self, dispatcher, tracker, domain))
+    else:
+        @functools.wraps(run)
+        def wrapper(self, dispatcher: CollectingDispatcher, tracker: Tracker,
+                    domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
+            return _compact(self.name(), tracker, run(self, dispatcher, tracker, domain))
+
+    cls.run = wrapper
+    return cls
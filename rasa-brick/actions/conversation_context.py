@@ -0,0 +1,141 @@
+from typing import Any, Deque, Dict, List, NamedTuple, Optional, Sequence, Text, Tuple
+from collections import OrderedDict, deque
+import os
+import threading
+
+# Rough OpenAI-style accounting: ~4 characters per token plus per-message framing
+CHARS_PER_TOKEN = 4
+MESSAGE_OVERHEAD_TOKENS = 4
+# Events that end the conversation history Rasa keeps for a sender
+HISTORY_RESETS = ("restart", "session_started")
+ROLES = {"user": "user", "bot": "assistant"}
+
+Event = Dict[Text, Any]
+
+
+def estimate_tokens(text: Text) -> int:
+    return -(-len(text) // CHARS_PER_TOKEN) + MESSAGE_OVERHEAD_TOKENS
+
+
+def _fingerprint(event: Event) -> Tuple[Any, ...]:
+    return event.get("event"), event.get("timestamp"), event.get("text")
+
+
+class Turn(NamedTuple):
+    role: Text
+    content: Text
+    tokens: int
+
+
+class Prompt(NamedTuple):
+    messages: List[Dict[Text, Text]]
+    tokens: int
+    history_turns: int
+
+
+class ConversationBuffer:
+    """Last ``max_turns`` user/bot turns of one sender, plus how far into the event list they go."""
+
+    def __init__(self, max_turns: int) -> None:
+        self.turns: Deque[Turn] = deque(maxlen=max_turns)
+        self.consumed = 0
+        self.last_event: Optional[Tuple[Any, ...]] = None
+
+    def add(self, event: Event) -> None:
+        kind = event.get("event")
+        if kind in HISTORY_RESETS:
+            self.turns.clear()
+        elif kind in ROLES and event.get("text"):
+            text = event["text"]
+            self.turns.append(Turn(ROLES[kind], text, estimate_tokens(text)))
+
+
+class ConversationContext:
+    """Per-sender ring buffers of recent turns, kept in step with the tracker.
+
+    Each call only reads the events added since the previous call for that
+    sender. When the buffer can't be trusted (new sender, another worker
+    served the last turns, or a large gap) it is rebuilt by walking the
+    event list backwards until it holds ``max_turns`` turns, so the cost is
+    bounded by the window rather than by the length of the conversation.
+    """
+
+    def __init__(self, max_turns: int = 10, max_senders: int = 10000) -> None:
+        self.max_turns = max_turns
+        self.max_senders = max_senders
+        self._lock = threading.Lock()
+        self._buffers: "OrderedDict[Text, ConversationBuffer]" = OrderedDict()
+        self.stats = {"incremental": 0, "rebuilt": 0}
+
+    def _rebuild(self, events: Sequence[Event]) -> ConversationBuffer:
+        buffer = ConversationBuffer(self.max_turns)
+        tail: List[Event] = []
+        for event in reversed(events):
+            kind = event.get("event")
+            if kind in HISTORY_RESETS:
+                break
+            if kind in ROLES and event.get("text"):
+                tail.append(event)
+                if len(tail) == self.max_turns:
+                    break
+        for event in reversed(tail):
+            buffer.add(event)
+        return buffer
+
+    def sync(self, sender_id: Text, events: Sequence[Event]) -> ConversationBuffer:
+        with self._lock:
+            buffer = self._buffers.get(sender_id)
+            fresh = len(events) - (buffer.consumed if buffer else 0)
+            if (buffer is not None and 0 <= fresh <= 2 * self.max_turns
+                    and (buffer.consumed == 0 or _fingerprint(events[buffer.consumed - 1]) == buffer.last_event)):
+                for event in events[buffer.consumed:]:
+                    buffer.add(event)
+                self.stats["incremental"] += 1
+            else:
+                buffer = self._rebuild(events)
+                self.stats["rebuilt"] += 1
+            buffer.consumed = len(events)
+            buffer.last_event = _fingerprint(events[-1]) if events else None
+            self._buffers[sender_id] = buffer
+            self._buffers.move_to_end(sender_id)
+            if len(self._buffers) > self.max_senders:
+                self._buffers.popitem(last=False)
+            return buffer
+
+    def build_prompt(self, sender_id: Text, events: Sequence[Event], system: Text,
+                     current: Text, budget: int) -> Prompt:
+        """System message, then as much recent history as fits ``budget``, then ``current``.
+
+        The current message is always included, even when it alone exceeds the budget.
+        """
+        turns = list(self.sync(sender_id, events).turns)
+        if turns and turns[-1].role == "user" and turns[-1].content == current:
+            turns.pop()
+        used = estimate_tokens(system) + estimate_tokens(current)
+        history: List[Turn] = []
+        for turn in reversed(turns):
+            if used + turn.tokens > budget:
+                break
+            history.append(turn)
+            used += turn.tokens
+        messages = [{"role": "system", "content": system}]
+        messages += [{"role": turn.role, "content": turn.content} for turn in reversed(history)]
+        messages.append({"role": "user", "content": current})
+        return Prompt(messages, used, len(history))
+
+
+_context: Optional[ConversationContext] = None
+_context_lock = threading.Lock()
+
+
+def get_conversation_context() -> ConversationContext:
+    """Process-wide context sized by BRICK_CONTEXT_TURNS and BRICK_CONTEXT_SENDERS."""
+    global _context
+    if _context is None:
+        with _context_lock:
+            if _context is None:
+                _context = ConversationContext(
+                    max_turns=int(os.getenv("BRICK_CONTEXT_TURNS", "10")),
+                    max_senders=int(os.getenv("BRICK_CONTEXT_SENDERS", "10000")),
+                )
+    return _context
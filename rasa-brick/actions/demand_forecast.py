@@ -0,0 +1,285 @@
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, NamedTuple, Optional, Text, Tuple
+import csv
+import datetime
+import json
+import logging
+import os
+import threading
+
+import numpy as np
+
+from actions.pricing_engine import WEEKDAYS
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+DEFAULT_RECIPES_PATH = os.path.join(DATA_DIR, "recipes.json")
+DEFAULT_BASELINE_PATH = os.path.join(DATA_DIR, "demand_baseline.json")
+
+SERVICES = ("lunch", "dinner")
+
+# Orders recorded by the Rasa SQL tracker store, oldest first
+TRACKER_STORE_QUERY = (
+    "SELECT timestamp, data FROM events "
+    "WHERE type_name = 'user' AND intent_name = 'order_food' "
+    "ORDER BY timestamp"
+)
+
+
+def service_for_hour(hour: int) -> Text:
+    return "lunch" if 6 <= hour < 16 else "dinner"
+
+
+class OrderRecord(NamedTuple):
+    timestamp: datetime.datetime
+    item: Text
+    quantity: float
+
+
+class DemandForecast(NamedTuple):
+    weekday: Text
+    service: Text
+    covers: float
+    items: Dict[Text, float]
+    prep: Dict[Text, Tuple[float, Text]]
+
+
+def _parse_timestamp(value: Any) -> datetime.datetime:
+    if isinstance(value, datetime.datetime):
+        return value
+    if isinstance(value, (int, float)):
+        return datetime.datetime.fromtimestamp(value)
+    return datetime.datetime.fromisoformat(str(value))
+
+
+def iter_csv_orders(path: Text) -> Iterator[OrderRecord]:
+    """Stream ``timestamp,item[,quantity]`` rows from a CSV file."""
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            yield OrderRecord(
+                _parse_timestamp(row["timestamp"]),
+                row["item"].lower(),
+                float(row.get("quantity") or 1),
+            )
+
+
+def iter_parquet_orders(path: Text, batch_size: int = 65536) -> Iterator[OrderRecord]:
+    """Stream a Parquet file one record batch at a time."""
+    import pyarrow.parquet as pq
+
+    parquet_file = pq.ParquetFile(path)
+    columns = [name for name in ("timestamp", "item", "quantity") if name in parquet_file.schema_arrow.names]
+    for batch in parquet_file.iter_batches(batch_size=batch_size, columns=columns):
+        data = batch.to_pydict()
+        quantities = data.get("quantity") or [1] * batch.num_rows
+        for timestamp, item, quantity in zip(data["timestamp"], data["item"], quantities):
+            yield OrderRecord(_parse_timestamp(timestamp), item.lower(), float(quantity or 1))
+
+
+def _entity_value(entities: List[Dict[Text, Any]], name: Text) -> Optional[Text]:
+    return next((entity.get("value") for entity in entities if entity.get("entity") == name), None)
+
+
+def iter_tracker_store_orders(db_url: Text, query: Text = TRACKER_STORE_QUERY,
+                              batch_size: int = 5000) -> Iterator[OrderRecord]:
+    """Stream ``order_food`` turns out of the Rasa Postgres tracker store.
+
+    Uses a server-side cursor so rows arrive ``batch_size`` at a time.
+    """
+    import psycopg2
+
+    connection = psycopg2.connect(db_url)
+    try:
+        with connection.cursor(name="brick_forecast_orders") as cursor:
+            cursor.itersize = batch_size
+            cursor.execute(query)
+            for timestamp, data in cursor:
+                entities = json.loads(data).get("parse_data", {}).get("entities", [])
+                item = _entity_value(entities, "food_item")
+                if not item:
+                    continue
+                try:
+                    quantity = float(_entity_value(entities, "quantity") or 1)
+                except ValueError:
+                    quantity = 1.0
+                yield OrderRecord(_parse_timestamp(timestamp), item.lower(), quantity)
+    finally:
+        connection.close()
+
+
+def iter_orders(source: Text) -> Iterator[OrderRecord]:
+    if source.startswith(("postgres://", "postgresql://")):
+        return iter_tracker_store_orders(source)
+    if source.endswith(".parquet"):
+        return iter_parquet_orders(source)
+    return iter_csv_orders(source)
+
+
+class DemandForecaster:
+    """Rolling demand aggregates per (weekday, service, item).
+
+    Orders are folded into a small buffer of open days; when a day closes its
+    per-item totals update an EWMA held in a ``(7, 2, n_items)`` array, and
+    the prep list for that cell is refreshed from the recipe yield matrix.
+    Days without any orders between two closed days close as zero, so a
+    quiet day pulls its weekday's forecast down instead of being skipped.
+    Forecasts are then array reads, independent of how much history has
+    been ingested.
+    """
+
+    def __init__(self, recipes: Mapping[Text, Any],
+                 baseline: Optional[Mapping[Text, Mapping[Text, float]]] = None,
+                 alpha: float = 0.3,
+                 max_open_days: int = 2) -> None:
+        self.alpha = alpha
+        self.max_open_days = max_open_days
+        self._lock = threading.RLock()
+
+        self.ingredients = list(recipes["ingredients"])
+        self.units = [recipes["ingredients"][name] for name in self.ingredients]
+        self.items: List[Text] = []
+        self._index: Dict[Text, int] = {}
+        self._open_days: Dict[datetime.date, np.ndarray] = {}
+        self._last_closed: Optional[datetime.date] = None
+        self.records_ingested = 0
+        self.late_records = 0
+
+        n_items = len(recipes["items"])
+        self._yields = np.zeros((n_items, len(self.ingredients)), dtype=np.float64)
+        self._ewma = np.zeros((7, len(SERVICES), n_items), dtype=np.float64)
+        self._days = np.zeros((7, len(SERVICES)), dtype=np.int64)
+        self._prep = np.zeros((7, len(SERVICES), len(self.ingredients)), dtype=np.float64)
+
+        mix = np.zeros(n_items, dtype=np.float64)
+        for name, recipe in recipes["items"].items():
+            row = self._add_item(name)
+            mix[row] = recipe.get("mix", 0.0)
+            for ingredient, amount in recipe.get("yields", {}).items():
+                self._yields[row, self.ingredients.index(ingredient)] = amount
+
+        # Seed every cell from the baseline covers split by menu mix, so the
+        # forecaster is usable before any history has been ingested
+        if baseline:
+            for day, services in baseline.items():
+                for service, covers in services.items():
+                    self._ewma[WEEKDAYS.index(day), SERVICES.index(service)] = covers * mix
+        self._prep = self._ewma @ self._yields
+
+    @classmethod
+    def from_files(cls, recipes_path: Text = DEFAULT_RECIPES_PATH,
+                   baseline_path: Optional[Text] = DEFAULT_BASELINE_PATH,
+                   **kwargs: Any) -> "DemandForecaster":
+        with open(recipes_path, encoding="utf-8") as f:
+            recipes = json.load(f)
+        baseline = None
+        if baseline_path:
+            with open(baseline_path, encoding="utf-8") as f:
+                baseline = json.load(f)
+        return cls(recipes, baseline, **kwargs)
+
+    def _add_item(self, name: Text) -> int:
+        row = len(self.items)
+        self._index[name] = row
+        self.items.append(name)
+        if row >= self._ewma.shape[2]:
+            # Items without a recipe still count towards covers
+            pad = max(row + 1 - self._ewma.shape[2], self._ewma.shape[2])
+            self._ewma = np.pad(self._ewma, ((0, 0), (0, 0), (0, pad)))
+            self._yields = np.pad(self._yields, ((0, pad), (0, 0)))
+            for buffer_date, buffer in self._open_days.items():
+                self._open_days[buffer_date] = np.pad(buffer, ((0, 0), (0, pad)))
+        return row
+
+    def ingest(self, records: Iterable[OrderRecord]) -> int:
+        """Fold a stream of orders into the aggregates; returns records consumed.
+
+        Records are expected roughly in time order. Days more than
+        ``max_open_days`` behind the newest record are closed as the stream
+        advances, so memory stays bounded by the open-day buffer.
+        """
+        count = 0
+        with self._lock:
+            for record in records:
+                day = record.timestamp.date()
+                if self._last_closed is not None and day <= self._last_closed:
+                    self.late_records += 1
+                    continue
+                row = self._index.get(record.item)
+                if row is None:
+                    row = self._add_item(record.item)
+                buffer = self._open_days.get(day)
+                if buffer is None:
+                    buffer = self._open_days[day] = np.zeros((len(SERVICES), self._ewma.shape[2]))
+                    self._close_days_before(day - datetime.timedelta(days=self.max_open_days))
+                buffer[SERVICES.index(service_for_hour(record.timestamp.hour)), row] += record.quantity
+                count += 1
+            self.records_ingested += count
+        return count
+
+    def flush(self) -> None:
+        """Close every open day, e.g. at the end of a backfill."""
+        with self._lock:
+            self._close_days_before(datetime.date.max)
+
+    def _close_days_before(self, cutoff: datetime.date) -> None:
+        for day in sorted(d for d in self._open_days if d < cutoff):
+            totals = self._open_days.pop(day)
+            if self._last_closed is not None:
+                # Days with no orders at all never opened a buffer
+                empty = self._last_closed + datetime.timedelta(days=1)
+                while empty < day:
+                    self._close_day(empty, np.zeros_like(totals))
+                    empty += datetime.timedelta(days=1)
+            self._close_day(day, totals)
+
+    def _close_day(self, day: datetime.date, totals: np.ndarray) -> None:
+        weekday = day.weekday()
+        for service in range(len(SERVICES)):
+            observed = totals[service, :self._ewma.shape[2]]
+            if self._days[weekday, service] == 0:
+                # First real observation replaces the baseline prior
+                self._ewma[weekday, service] = observed
+            else:
+                self._ewma[weekday, service] += self.alpha * (observed - self._ewma[weekday, service])
+            self._days[weekday, service] += 1
+            self._prep[weekday, service] = self._ewma[weekday, service] @ self._yields
+        self._last_closed = day
+
+    def forecast(self, weekday: int, service: Text) -> DemandForecast:
+        cell = (weekday, SERVICES.index(service))
+        expected = self._ewma[cell]
+        prep = self._prep[cell]
+        return DemandForecast(
+            weekday=WEEKDAYS[weekday],
+            service=service,
+            covers=float(expected.sum()),
+            items={name: float(expected[row]) for row, name in enumerate(self.items)},
+            prep={name: (float(prep[col]), self.units[col]) for col, name in enumerate(self.ingredients)},
+        )
+
+
+_forecaster: Optional[DemandForecaster] = None
+_forecaster_lock = threading.Lock()
+
+
+def get_demand_forecaster() -> DemandForecaster:
+    """Process-wide forecaster; ingests BRICK_ORDER_HISTORY once if it is set.
+
+    BRICK_ORDER_HISTORY may be a CSV or Parquet path or a Postgres tracker
+    store URL.
+    """
+    global _forecaster
+    if _forecaster is None:
+        with _forecaster_lock:
+            if _forecaster is None:
+                forecaster = DemandForecaster.from_files(
+                    os.getenv("BRICK_RECIPES_PATH", DEFAULT_RECIPES_PATH),
+                    os.getenv("BRICK_DEMAND_BASELINE_PATH", DEFAULT_BASELINE_PATH),
+                )
+                source = os.getenv("BRICK_ORDER_HISTORY")
+                if source:
+                    count = forecaster.ingest(iter_orders(source))
+                    forecaster.flush()
+                    logger.info(f"Ingested {count} historical orders into demand forecaster")
+                _forecaster = forecaster
+    return _forecaster
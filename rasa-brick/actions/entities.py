@@ -0,0 +1,343 @@
+from typing import Any, Callable, Dict, Iterable, List, Mapping, NamedTuple, Optional, Set, Text, Tuple
+from collections import OrderedDict
+from datetime import date, timedelta
+import json
+import logging
+import os
+import re
+import threading
+
+from actions.pricing_engine import WEEKDAYS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SYNONYMS_PATH = os.path.join(os.path.dirname(__file__), "data", "entity_synonyms.json")
+
+# Largest quantity a single order line may ask for
+MAX_QUANTITY = 99
+
+NUMBER_WORDS = {
+    "a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6,
+    "seven": 7, "eight": 8, "nine": 9, "ten": 10, "eleven": 11, "twelve": 12,
+    "couple": 2, "a couple": 2, "a couple of": 2, "pair": 2, "a pair of": 2,
+    "dozen": 12, "a dozen": 12, "half dozen": 6, "half a dozen": 6,
+}
+
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+
+def parse_number(value: Any) -> Optional[int]:
+    """Positive integer in a raw entity ("2", "two", 3.0), or None if it isn't one."""
+    if value is None:
+        return None
+    try:
+        if isinstance(value, (int, float)):
+            number = int(value)
+        else:
+            text = str(value).strip().lower()
+            try:
+                number = int(float(text))
+            except ValueError:
+                number = NUMBER_WORDS.get(text, 0)
+    except (ValueError, OverflowError):
+        # "nan" and "inf"
+        return None
+    return number if number > 0 else None
+
+
+def parse_quantity(value: Any, default: int = 1) -> int:
+    """Turn a raw quantity entity ("2", "two", 3.0) into a positive int."""
+    quantity = parse_number(value)
+    if quantity is None:
+        quantity = default
+    return max(1, min(quantity, MAX_QUANTITY))
+
+
+def parse_party_size(value: Any) -> Optional[int]:
+    """Party size from a raw entity ("4", "four", "a couple"), or None if it isn't one."""
+    return parse_number(value)
+
+
+def resolve_date(value: Optional[Text], today: date) -> Optional[date]:
+    """Day for a raw date entity ("tomorrow", "friday", "2024-06-01"), defaulting to today.
+
+    Returns None for text that isn't a day this understands and for a date
+    that has already passed.
+    """
+    text = (value or "").strip().lower()
+    if text in ("", "today", "tonight"):
+        return today
+    if text in ("tomorrow", "tomorrow night"):
+        return today + timedelta(days=1)
+    if text in ("weekend", "this weekend"):
+        return today + timedelta(days=(5 - today.weekday()) % 7)
+    for offset, name in enumerate(WEEKDAYS):
+        if text.endswith(name):
+            return today + timedelta(days=(offset - today.weekday()) % 7)
+    try:
+        day = date.fromisoformat(text)
+    except ValueError:
+        return None
+    return day if day >= today else None
+
+
+def _key(text: Text) -> Text:
+    return _NON_WORD.sub(" ", text.lower()).strip()
+
+
+def _trigrams(key: Text) -> Set[Text]:
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class MenuMatcher:
+    """Canonical menu ids for free-text food mentions.
+
+    Exact names, synonyms and naive singular/plural forms resolve through
+    one dict lookup. Anything else is scored by trigram overlap against
+    the names sharing at least one trigram, via an inverted index built
+    up front; results (including misses) are memoized per raw text.
+    Candidates much shorter or longer than the text are skipped, so typos
+    are corrected but "cheesecake" does not become "cheese".
+    """
+
+    def __init__(self, names: Iterable[Text], synonyms: Optional[Mapping[Text, Text]] = None,
+                 min_similarity: float = 0.4, min_length_ratio: float = 0.7, cache_size: int = 4096) -> None:
+        self.min_similarity = min_similarity
+        self.min_length_ratio = min_length_ratio
+        self.cache_size = cache_size
+        self.ids: List[Text] = sorted({name.lower() for name in names})
+        self._aliases: Dict[Text, Text] = {}
+        for canonical in self.ids:
+            key = _key(canonical)
+            for alias in (key, key + "s", key[:-1] if key.endswith("s") else key):
+                self._aliases.setdefault(alias, canonical)
+        for alias, canonical in (synonyms or {}).items():
+            self._aliases[_key(alias)] = canonical.lower()
+        self._grams = [_trigrams(_key(canonical)) for canonical in self.ids]
+        self._lengths = [len(_key(canonical)) for canonical in self.ids]
+        self._postings: Dict[Text, List[int]] = {}
+        for row, grams in enumerate(self._grams):
+            for gram in grams:
+                self._postings.setdefault(gram, []).append(row)
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[Text, Optional[Text]]" = OrderedDict()
+
+    def _fuzzy(self, key: Text) -> Optional[Text]:
+        grams = _trigrams(key)
+        shared: Dict[int, int] = {}
+        for gram in grams:
+            for row in self._postings.get(gram, ()):
+                shared[row] = shared.get(row, 0) + 1
+        best, best_score = None, self.min_similarity
+        for row, count in shared.items():
+            if min(len(key), self._lengths[row]) < self.min_length_ratio * max(len(key), self._lengths[row]):
+                continue
+            score = count / (len(grams) + len(self._grams[row]) - count)
+            if score > best_score or (score == best_score and best is None):
+                best, best_score = self.ids[row], score
+        return best
+
+    def match(self, text: Optional[Text]) -> Optional[Text]:
+        """Canonical id for ``text``, or None when nothing is close enough."""
+        if not text:
+            return None
+        key = _key(text)
+        canonical = self._aliases.get(key)
+        if canonical is not None:
+            return canonical
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+        canonical = self._fuzzy(key)
+        with self._lock:
+            self._cache[key] = canonical
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return canonical
+
+    def canonical(self, text: Optional[Text]) -> Optional[Text]:
+        """Like match, but falls back to the lower-cased text for unknown items."""
+        return self.match(text) or (text.strip().lower() if text else None)
+
+
+class Entity(NamedTuple):
+    raw: Any
+    value: Any
+
+
+class MessageEntities:
+    """Typed entities of one user message; lookups are plain dict reads."""
+
+    __slots__ = ("_entities",)
+
+    def __init__(self, entities: Dict[Text, List[Entity]]) -> None:
+        self._entities = entities
+
+    def get(self, name: Text, default: Any = None) -> Any:
+        """Normalized value of the first ``name`` entity."""
+        values = self._entities.get(name)
+        return values[0].value if values and values[0].value is not None else default
+
+    def raw(self, name: Text, default: Any = None) -> Any:
+        """Value of the first ``name`` entity exactly as the NLU pipeline extracted it."""
+        values = self._entities.get(name)
+        return values[0].raw if values else default
+
+    def all(self, name: Text) -> List[Any]:
+        return [entity.value for entity in self._entities.get(name, ()) if entity.value is not None]
+
+    def distinct(self, name: Text) -> List[Entity]:
+        """Every ``name`` entity with a normalized value, first mention of each value only."""
+        seen: Set[Any] = set()
+        entities = []
+        for entity in self._entities.get(name, ()):
+            if entity.value is not None and entity.value not in seen:
+                seen.add(entity.value)
+                entities.append(entity)
+        return entities
+
+    def __contains__(self, name: Text) -> bool:
+        return name in self._entities
+
+
+class EntityNormalizer:
+    """Normalizes the latest message's entities once per (sender, message id).
+
+    Every action handling the same turn gets the same ``MessageEntities``.
+    Entity types without a parser keep their raw value. As with
+    ``Tracker.get_latest_entity_values``, entities carrying a role or group
+    are left out.
+    """
+
+    def __init__(self, parsers: Mapping[Text, Callable[[Any], Any]], cache_size: int = 10000) -> None:
+        self.parsers = dict(parsers)
+        self.cache_size = cache_size
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[Tuple[Text, Text], MessageEntities]" = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0}
+
+    def normalize(self, raw_entities: Iterable[Mapping[Text, Any]]) -> MessageEntities:
+        entities: Dict[Text, List[Entity]] = {}
+        for entity in raw_entities:
+            if entity.get("role") is not None or entity.get("group") is not None:
+                continue
+            name, raw = entity.get("entity"), entity.get("value")
+            parser = self.parsers.get(name)
+            entities.setdefault(name, []).append(Entity(raw, parser(raw) if parser else raw))
+        return MessageEntities(entities)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+    def for_tracker(self, tracker: Any) -> MessageEntities:
+        latest = tracker.latest_message or {}
+        message_id = latest.get("message_id")
+        if message_id is None:
+            return self.normalize(latest.get("entities") or [])
+        key = (tracker.sender_id, message_id)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self.stats["hits"] += 1
+                return cached
+            self.stats["misses"] += 1
+        entities = self.normalize(latest.get("entities") or [])
+        with self._lock:
+            self._cache[key] = entities
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return entities
+
+
+def menu_vocabulary() -> List[Text]:
+    """Every item name the catalog, pricing rules, inventory and menu know about."""
+    from actions.catalog import get_catalog
+    from actions.inventory_store import get_inventory_store
+    from actions.menu_index import get_menu_index
+    from actions.pricing_engine import get_pricing_engine
+
+    names = list(get_catalog().cuisine_mapping)
+    names += get_pricing_engine().items
+    names += [item.name for items in get_inventory_store().categories().values() for item in items]
+    names += get_menu_index().names
+    return names
+
+
+def _parse_date(value: Any) -> Optional[date]:
+    # Parsed once per message, so every action in the turn agrees on "today"
+    return resolve_date(str(value), date.today()) if value else None
+
+
+def _parse_inventory_category(value: Any) -> Optional[Text]:
+    from actions.inventory_store import get_inventory_store
+
+    key = _key(str(value))
+    for category in get_inventory_store().category_names():
+        name = category.lower()
+        if key in (name, name.rstrip("s")):
+            return category
+    return None
+
+
+_matcher: Optional[MenuMatcher] = None
+_matcher_version: Optional[float] = None
+_matcher_lock = threading.Lock()
+_normalizer: Optional[EntityNormalizer] = None
+_normalizer_lock = threading.Lock()
+
+
+def get_menu_matcher() -> MenuMatcher:
+    """Process-wide matcher over the menu vocabulary and BRICK_ENTITY_SYNONYMS_PATH.
+
+    Rebuilt when the catalog is reloaded with a new version, so dishes added
+    to or renamed in the catalog resolve without restarting the server.
+    """
+    global _matcher, _matcher_version
+    from actions.catalog import get_catalog
+
+    version = get_catalog().version
+    if _matcher is None or _matcher_version != version:
+        # Load the other stores before taking this lock; their getters have locks of their own
+        names = menu_vocabulary()
+        with _matcher_lock:
+            if _matcher is None or _matcher_version != version:
+                with open(os.getenv("BRICK_ENTITY_SYNONYMS_PATH", DEFAULT_SYNONYMS_PATH), encoding="utf-8") as f:
+                    synonyms = json.load(f)
+                _matcher = MenuMatcher(names, synonyms.get("food_item"))
+                _matcher_version = version
+                logger.info(f"Indexed {len(_matcher.ids)} menu names for entity matching")
+                if _normalizer is not None:
+                    # Entities parsed against the previous menu
+                    _normalizer.clear()
+    return _matcher
+
+
+def get_entity_normalizer() -> EntityNormalizer:
+    """Process-wide normalizer, memoizing up to BRICK_ENTITY_CACHE_SIZE messages."""
+    global _normalizer
+    if _normalizer is None:
+        with _normalizer_lock:
+            if _normalizer is None:
+                from actions.menu_index import normalize_dietary
+
+                _normalizer = EntityNormalizer(
+                    {
+                        "food_item": lambda value: get_menu_matcher().canonical(value),
+                        "quantity": parse_quantity,
+                        "party_size": parse_party_size,
+                        "date": _parse_date,
+                        "dietary_restriction": lambda value: normalize_dietary(str(value)),
+                        "inventory_category": _parse_inventory_category,
+                    },
+                    cache_size=int(os.getenv("BRICK_ENTITY_CACHE_SIZE", "10000")),
+                )
+    return _normalizer
+
+
+def get_entities(tracker: Any) -> MessageEntities:
+    """Typed entities of the tracker's latest message, shared by every action in the turn."""
+    return get_entity_normalizer().for_tracker(tracker)
@@ -0,0 +1,308 @@
+from typing import Any, Callable, Dict, List, Optional, Text
+from abc import ABC, abstractmethod
+import atexit
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+Event = Dict[Text, Any]
+
+CREATE_TABLE = (
+    "CREATE TABLE IF NOT EXISTS brick_events ("
+    "id {id_type} PRIMARY KEY, "
+    "event_type TEXT NOT NULL, "
+    "sender_id TEXT, "
+    "timestamp DOUBLE PRECISION NOT NULL, "
+    "payload {payload_type} NOT NULL)"
+)
+
+
+class EventBackend(ABC):
+    """Destination for batches of analytics events."""
+
+    @abstractmethod
+    def write_batch(self, events: List[Event]) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class JsonlFileBackend(EventBackend):
+    """Append-only JSON Lines file."""
+
+    def __init__(self, path: Text) -> None:
+        self.path = path
+        self._file = open(path, "a", encoding="utf-8")
+
+    def write_batch(self, events: List[Event]) -> None:
+        self._file.write("".join(json.dumps(event, default=str) + "\n" for event in events))
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class SQLiteBackend(EventBackend):
+    def __init__(self, path: Text) -> None:
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute(CREATE_TABLE.format(id_type="INTEGER", payload_type="TEXT"))
+        self._connection.commit()
+
+    def write_batch(self, events: List[Event]) -> None:
+        with self._connection:
+            self._connection.executemany(
+                "INSERT INTO brick_events (event_type, sender_id, timestamp, payload) VALUES (?, ?, ?, ?)",
+                [(e["event_type"], e.get("sender_id"), e["timestamp"], json.dumps(e["payload"], default=str)) for e in events],
+            )
+
+    def close(self) -> None:
+        self._connection.close()
+
+
+class PostgresBackend(EventBackend):
+    """Batched inserts into the Postgres database behind RASA_DB_URL.
+
+    A dropped connection is discarded and re-opened on the next write.
+    """
+
+    def __init__(self, db_url: Text) -> None:
+        import psycopg2
+        from psycopg2.extras import execute_values
+
+        self._psycopg2 = psycopg2
+        self._execute_values = execute_values
+        self.db_url = db_url
+        self._connection: Any = None
+        self.reconnects = 0
+        self._connect()
+
+    def _connect(self) -> Any:
+        connection = self._psycopg2.connect(self.db_url)
+        with connection, connection.cursor() as cursor:
+            cursor.execute(CREATE_TABLE.format(id_type="BIGSERIAL", payload_type="JSONB"))
+        self._connection = connection
+        return connection
+
+    def _disconnect(self) -> None:
+        connection, self._connection = self._connection, None
+        if connection is not None:
+            try:
+                connection.close()
+            except Exception:
+                pass
+
+    def write_batch(self, events: List[Event]) -> None:
+        connection = self._connection
+        if connection is None or connection.closed:
+            self._disconnect()
+            connection = self._connect()
+            self.reconnects += 1
+        try:
+            with connection, connection.cursor() as cursor:
+                self._execute_values(
+                    cursor,
+                    "INSERT INTO brick_events (event_type, sender_id, timestamp, payload) VALUES %s",
+                    [(e["event_type"], e.get("sender_id"), e["timestamp"], json.dumps(e["payload"], default=str)) for e in events],
+                )
+        except (self._psycopg2.OperationalError, self._psycopg2.InterfaceError):
+            # Server restart or network blip: reconnect on the next attempt
+            self._disconnect()
+            raise
+
+    def close(self) -> None:
+        self._disconnect()
+
+
+class EventSink:
+    """Bounded in-process queue drained by a background writer thread.
+
+    ``emit`` never does I/O on the caller's path (except under the ``spill``
+    policy once the queue is full). Given a ``backend_factory`` instead of a
+    ``backend``, the writer thread builds the backend itself. A batch that
+    fails to write is retried with exponential backoff, up to
+    ``max_retries`` times, and then spilled; events keep queueing meanwhile.
+    When the queue is full the ``policy`` decides what happens:
+
+    - ``drop_newest``: discard the new event
+    - ``drop_oldest``: discard the oldest queued event to make room
+    - ``block``: wait up to ``block_timeout`` seconds, then discard
+    - ``spill``: append the event to ``spill_path`` instead
+    """
+
+    POLICIES = ("drop_newest", "drop_oldest", "block", "spill")
+
+    def __init__(self, backend: Optional[EventBackend] = None,
+                 max_queue: int = 10000,
+                 batch_size: int = 500,
+                 flush_interval: float = 1.0,
+                 policy: Text = "drop_newest",
+                 block_timeout: float = 0.05,
+                 spill_path: Optional[Text] = None,
+                 backend_factory: Optional[Callable[[], EventBackend]] = None,
+                 max_retries: int = 5,
+                 retry_delay: float = 0.5,
+                 max_retry_delay: float = 30.0) -> None:
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown event sink policy '{policy}', expected one of {self.POLICIES}")
+        if policy == "spill" and not spill_path:
+            raise ValueError("The spill policy needs a spill_path")
+        if backend is None and backend_factory is None:
+            raise ValueError("The event sink needs a backend or a backend_factory")
+        self.backend = backend
+        self.backend_factory = backend_factory
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self._queue: "queue.Queue[Event]" = queue.Queue(maxsize=max_queue)
+        self._spill = JsonlFileBackend(spill_path) if spill_path else None
+        self._spill_lock = threading.Lock()
+        self._stop = threading.Event()
+        self.stats = {"emitted": 0, "written": 0, "dropped": 0, "spilled": 0, "failed_batches": 0, "retries": 0}
+        self._thread = threading.Thread(target=self._drain, name="brick-event-sink", daemon=True)
+        self._thread.start()
+
+    def emit(self, event_type: Text, payload: Dict[Text, Any], sender_id: Optional[Text] = None) -> bool:
+        """Queue an event; returns False if it was dropped or spilled."""
+        event = {"event_type": event_type, "sender_id": sender_id, "timestamp": time.time(), "payload": payload}
+        self.stats["emitted"] += 1
+        try:
+            if self.policy == "block":
+                self._queue.put(event, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(event)
+            return True
+        except queue.Full:
+            pass
+
+        if self.policy == "drop_oldest":
+            try:
+                self._queue.get_nowait()
+                self._queue.put_nowait(event)
+                self.stats["dropped"] += 1
+                return True
+            except (queue.Empty, queue.Full):
+                pass
+        elif self.policy == "spill":
+            self._spill_batch([event])
+            return False
+
+        self.stats["dropped"] += 1
+        return False
+
+    def _spill_batch(self, events: List[Event]) -> None:
+        if self._spill is None:
+            self.stats["dropped"] += len(events)
+            return
+        with self._spill_lock:
+            self._spill.write_batch(events)
+        self.stats["spilled"] += len(events)
+
+    def _drain(self) -> None:
+        while not (self._stop.is_set() and self._queue.empty()):
+            batch: List[Event] = []
+            try:
+                batch.append(self._queue.get(timeout=self.flush_interval))
+                while len(batch) < self.batch_size:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                pass
+            if batch:
+                self._write(batch)
+
+    def _write(self, batch: List[Event]) -> None:
+        attempt = 0
+        while True:
+            try:
+                if self.backend is None:
+                    self.backend = self.backend_factory()
+                self.backend.write_batch(batch)
+                self.stats["written"] += len(batch)
+                return
+            except Exception as e:
+                attempt += 1
+                if attempt > self.max_retries:
+                    logger.error(f"Event sink failed to write {len(batch)} events after {attempt} attempts: {e}")
+                    self.stats["failed_batches"] += 1
+                    self._spill_batch(batch)
+                    return
+                delay = min(self.max_retry_delay, self.retry_delay * 2 ** (attempt - 1))
+                logger.warning(f"Event sink write failed ({e}), retrying in {delay:.1f}s")
+                self.stats["retries"] += 1
+                time.sleep(delay)
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def close(self, timeout: float = 10.0) -> None:
+        """Flush queued events and stop the writer thread."""
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            # Still retrying a batch; leave the backend to the daemon thread
+            logger.warning(f"Event sink did not flush within {timeout:.0f}s, {self.pending()} events pending")
+            return
+        if self.backend is not None:
+            self.backend.close()
+        if self._spill is not None:
+            self._spill.close()
+
+
+def backend_from_env() -> EventBackend:
+    """Pick a backend from BRICK_EVENT_SINK (postgres, sqlite or file)."""
+    kind = os.getenv("BRICK_EVENT_SINK") or ("postgres" if os.getenv("RASA_DB_URL") else "file")
+    if kind == "postgres":
+        return PostgresBackend(os.environ["RASA_DB_URL"])
+    if kind == "sqlite":
+        return SQLiteBackend(os.getenv("BRICK_EVENT_DB", "brick_events.db"))
+    if kind == "file":
+        return JsonlFileBackend(os.getenv("BRICK_EVENT_LOG", "brick_events.jsonl"))
+    raise ValueError(f"Unknown BRICK_EVENT_SINK '{kind}'")
+
+
+_sink: Optional[EventSink] = None
+_sink_lock = threading.Lock()
+
+
+def get_event_sink() -> EventSink:
+    """Process-wide event sink, flushed on interpreter shutdown.
+
+    The backend is built on the writer thread, so a slow or unreachable
+    database never holds up the action that emits the first event.
+    """
+    global _sink
+    if _sink is None:
+        with _sink_lock:
+            if _sink is None:
+                _sink = EventSink(
+                    backend_factory=backend_from_env,
+                    max_queue=int(os.getenv("BRICK_EVENT_QUEUE_SIZE", "10000")),
+                    batch_size=int(os.getenv("BRICK_EVENT_BATCH_SIZE", "500")),
+                    policy=os.getenv("BRICK_EVENT_POLICY", "drop_newest"),
+                    spill_path=os.getenv("BRICK_EVENT_SPILL_PATH"),
+                    max_retries=int(os.getenv("BRICK_EVENT_MAX_RETRIES", "5")),
+                    retry_delay=float(os.getenv("BRICK_EVENT_RETRY_DELAY", "0.5")),
+                )
+                atexit.register(_sink.close)
+    return _sink
+
+
+def emit_event(event_type: Text, payload: Dict[Text, Any], sender_id: Optional[Text] = None) -> bool:
+    try:
+        return get_event_sink().emit(event_type, payload, sender_id)
+    except Exception as e:
+        # Analytics must never break an action
+        logger.error(f"Event sink rejected {event_type} event: {e}")
+        return False
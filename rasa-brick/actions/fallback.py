@@ -1,12 +1,24 @@
 from typing import Any, Text, Dict, List
 from rasa_sdk import Action, Tracker
 from rasa_sdk.executor import CollectingDispatcher
-import openai
 import logging
+import os
 import time
 
+from actions.compaction import compacted
+from actions.conversation_context import get_conversation_context
+from actions.instrumentation import TOKEN_BUCKETS, instrumented, registry
+from actions.llm_client import get_llm_client
+from actions.semantic_cache import cacheable, get_semantic_cache
+from actions.tenant_config import tenant_for_tracker
+
 logger = logging.getLogger(__name__)
 
+SYSTEM_PROMPT = "You are BFF (Brick For Food), an AI assistant for a fine dining restaurant."
+PROMPT_TOKEN_BUDGET = int(os.getenv("BRICK_LLM_PROMPT_BUDGET", "1024"))
+
+@instrumented
+@compacted
 class ActionDefaultFallback(Action):
     def name(self) -> Text:
         return "action_default_fallback"
@@ -18,57 +30,85 @@ class ActionDefaultFallback(Action):
         start_time = time.time()
         
         try:
-            # Get conversation context
-            messages = [
-                {"role": "system", "content": "You are BFF (Brick For Food), an AI assistant for a fine dining restaurant."},
-                {"role": "user", "content": tracker.latest_message.get('text', '')}
-            ]
-            
-            # Add recent conversation history
-            for event in tracker.events[-5:]:
-                if event.get('event') == 'user':
-                    messages.append({
-                        "role": "user",
-                        "content": event.get('text', '')
-                    })
-                elif event.get('event') == 'bot':
-                    messages.append({
-                        "role": "assistant",
-                        "content": event.get('text', '')
-                    })
-
-            # Get OpenAI response
-            response = await openai.ChatCompletion.acreate(
-                model="gpt-3.5-turbo",
-                messages=messages,
-                temperature=0.7,
-                max_tokens=150
+            # Recent turns first, then the current message, trimmed to the prompt budget
+            query = tracker.latest_message.get('text', '')
+            prompt = get_conversation_context().build_prompt(
+                tracker.sender_id,
+                tracker.events,
+                system=SYSTEM_PROMPT,
+                current=query,
+                budget=PROMPT_TOKEN_BUDGET
             )
 
+            # Answer from a similar, already answered question when there is one. Only
+            # standalone questions are looked up and stored: earlier turns can change
+            # what a question means
+            tenant = tenant_for_tracker(tracker)
+            semantic_cache = get_semantic_cache()
+            standalone = cacheable(query) and not prompt.history_turns
+            if semantic_cache is not None and standalone:
+                hit = semantic_cache.lookup(query, tenant)
+                if hit is not None:
+                    response_time = time.time() - start_time
+                    logger.info(f"LLM fallback deflected by semantic cache (similarity {hit.similarity:.2f})")
+                    dispatcher.utter_message(
+                        text=hit.answer,
+                        custom={
+                            "fallback_data": {
+                                "source": "semantic_cache",
+                                "response_time": response_time,
+                                "confidence": True,
+                                "cache": "semantic",
+                                "similarity": round(hit.similarity, 3),
+                                "matched_query": hit.query
+                            }
+                        }
+                    )
+                    return []
+
+            registry.observe_value(self.name(), "prompt_tokens", prompt.tokens, TOKEN_BUCKETS)
+
+            # Get LLM response through the shared, cached client
+            llm_client = get_llm_client()
+            response, metrics = await llm_client.complete(prompt.messages)
+
             # Log response time
             response_time = time.time() - start_time
-            logger.info(f"OpenAI fallback response time: {response_time:.2f}s")
+            logger.info(f"LLM fallback response time: {response_time:.2f}s (cache {metrics['cache']})")
+
+            # Remember complete answers so paraphrases of this question skip the LLM
+            if semantic_cache is not None:
+                if metrics["cache"] == "miss":
+                    semantic_cache.record_upstream(metrics["latency_ms"])
+                if standalone and response.finish_reason == "stop":
+                    semantic_cache.add(query, response.text, tenant)
 
             # Send response
             dispatcher.utter_message(
-                text=response.choices[0].message.content,
+                text=response.text,
                 custom={
                     "fallback_data": {
-                        "source": "openai",
+                        "source": llm_client.backend.name,
                         "response_time": response_time,
-                        "confidence": response.choices[0].finish_reason == "stop"
+                        "confidence": response.finish_reason == "stop",
+                        "cache": metrics["cache"],
+                        "latency_ms": metrics["latency_ms"],
+                        "prompt_tokens": prompt.tokens,
+                        "history_turns": prompt.history_turns
                     }
                 }
             )
 
         except Exception as e:
-            logger.error(f"OpenAI fallback error: {e}")
+            logger.error(f"LLM fallback error: {e}")
             dispatcher.utter_message(
                 text="I apologize, but I'm having trouble understanding. Could you please rephrase your request?",
                 custom={
                     "fallback_data": {
                         "source": "default",
-                        "error": str(e)
+                        "error": str(e),
+                        "error_type": type(e).__name__,
+                        "response_time": time.time() - start_time
                     }
                 }
             )
@@ -0,0 +1,179 @@
+from typing import Dict, FrozenSet, Iterable, Iterator, List, NamedTuple, Optional, Text, Tuple
+import re
+
+POSITIVE_TERMS = (
+    "great", "excellent", "amazing", "good", "love", "loved", "perfect", "delicious",
+    "wonderful", "fantastic", "friendly", "fresh", "tasty", "outstanding", "lovely",
+)
+NEGATIVE_TERMS = (
+    "bad", "poor", "terrible", "slow", "cold", "wrong", "awful", "rude", "bland",
+    "overcooked", "undercooked", "dirty", "disappointing", "disappointed",
+    "took forever", "never again",
+)
+NEGATORS = (
+    "not", "never", "hardly", "isn't", "wasn't", "weren't", "don't", "didn't",
+    "doesn't", "aren't", "without",
+)
+# Determiners that only negate the next word, or the one after a linking verb
+# ("nothing was wrong"), so "no complaints, great food" and "nothing but
+# great" stay positive
+ADJACENT_NEGATORS = ("no", "nothing")
+LINKING_VERBS = frozenset(("is", "was", "are", "were"))
+ASPECTS = {
+    "service": ("service", "staff", "waiter", "waitress", "server", "host"),
+    "food": ("food", "dish", "dishes", "meal", "steak", "dessert", "flavor", "flavour"),
+    "ambience": ("ambience", "atmosphere", "music", "decor"),
+    "value": ("price", "prices", "value", "expensive"),
+}
+
+# Words that a negation reaches past before it lapses
+NEGATION_WINDOW = 3
+
+_CLAUSE_BREAKS = ".!?,;"
+
+POSITIVE, NEGATIVE, NEGATOR, ADJACENT_NEGATOR, ASPECT, BREAK = range(6)
+
+
+class FeedbackScore(NamedTuple):
+    sentiment: Text
+    score: int
+    positive: Tuple[Text, ...]
+    negative: Tuple[Text, ...]
+    aspects: FrozenSet[Text]
+
+
+def _trie_regex(node: Dict[Text, dict]) -> Text:
+    """Render a character trie as a regex that never backtracks across siblings."""
+    terminal = "" in node
+    branches = [re.escape(char) + _trie_regex(child) for char, child in sorted(node.items()) if char]
+    if not branches:
+        return ""
+    body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    if terminal:
+        return "(?:" + body + ")?"
+    return body
+
+
+class KeywordScorer:
+    """Single-pass keyword sentiment over a compiled multi-pattern matcher.
+
+    Sentiment terms, multi-word phrases, negators and aspect words are merged
+    into one character trie and compiled to a single regular expression, so a
+    message is lowercased once and scanned once by the regex engine; only the
+    handful of hits are looked at in Python. Matches are anchored on word
+    boundaries, which keeps "goodbye" from counting as "good", and a negator
+    flips the polarity of the next sentiment term within a few words
+    ("not bad"); "no" and "nothing" only flip the next word.
+    """
+
+    def __init__(self, positive: Iterable[Text] = POSITIVE_TERMS,
+                 negative: Iterable[Text] = NEGATIVE_TERMS,
+                 negators: Iterable[Text] = NEGATORS,
+                 adjacent_negators: Iterable[Text] = ADJACENT_NEGATORS,
+                 aspects: Optional[Dict[Text, Iterable[Text]]] = None) -> None:
+        self._terms: Dict[Text, Tuple[int, Text]] = {}
+        for term in negators:
+            self._terms[term] = (NEGATOR, term)
+        for term in adjacent_negators:
+            self._terms[term] = (ADJACENT_NEGATOR, term)
+        for aspect, words in (ASPECTS if aspects is None else aspects).items():
+            for word in words:
+                self._terms[word] = (ASPECT, aspect)
+        for term in positive:
+            self._terms[term] = (POSITIVE, term)
+        for term in negative:
+            self._terms[term] = (NEGATIVE, term)
+
+        root: Dict[Text, dict] = {}
+        for term in self._terms:
+            node = root
+            for char in term:
+                node = node.setdefault(char, {})
+            node[""] = {}
+        # Greedy quantifiers make the trie regex prefer the longest phrase
+        self._pattern = re.compile(r"\b" + _trie_regex(root) + r"\b|[" + re.escape(_CLAUSE_BREAKS) + "]")
+        for char in _CLAUSE_BREAKS:
+            self._terms[char] = (BREAK, char)
+
+    def score(self, text: Text) -> FeedbackScore:
+        text = text.lower()
+        positive: List[Text] = []
+        negative: List[Text] = []
+        aspects = set()
+        negation_end = -1
+        adjacent_only = False
+
+        for match in self._pattern.finditer(text):
+            kind, value = self._terms[match.group()]
+            if kind == BREAK:
+                negation_end = -1
+            elif kind in (NEGATOR, ADJACENT_NEGATOR):
+                negation_end = match.end()
+                adjacent_only = kind == ADJACENT_NEGATOR
+            elif kind == ASPECT:
+                aspects.add(value)
+            else:
+                if negation_end < 0:
+                    negated = False
+                elif adjacent_only:
+                    gap = text[negation_end:match.start()].split()
+                    negated = not gap or (len(gap) == 1 and gap[0] in LINKING_VERBS)
+                else:
+                    negated = text.count(" ", negation_end, match.start()) <= NEGATION_WINDOW + 1
+                if negated:
+                    value = f"not {value}"
+                    negation_end = -1
+                if (kind == POSITIVE) != negated:
+                    positive.append(value)
+                else:
+                    negative.append(value)
+
+        score = len(positive) - len(negative)
+        if score > 0:
+            sentiment = "positive"
+        elif score < 0:
+            sentiment = "negative"
+        elif positive:
+            sentiment = "mixed"
+        else:
+            sentiment = "neutral"
+        return FeedbackScore(sentiment, score, tuple(positive), tuple(negative), frozenset(aspects))
+
+    def score_batch(self, texts: Iterable[Text]) -> Iterator[FeedbackScore]:
+        for text in texts:
+            yield self.score(text)
+
+
+scorer = KeywordScorer()
+
+
+def _score_chunk(texts: List[Text]) -> List[FeedbackScore]:
+    return [scorer.score(text) for text in texts]
+
+
+def _chunks(texts: Iterable[Text], size: int) -> Iterator[List[Text]]:
+    chunk: List[Text] = []
+    for text in texts:
+        chunk.append(text)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def score_many(texts: Iterable[Text], processes: int = 1, chunk_size: int = 10000) -> Iterator[FeedbackScore]:
+    """Re-score a large feedback backlog, streaming results in input order.
+
+    With ``processes > 1`` chunks are fanned out to a worker pool; input is
+    consumed lazily so the backlog never has to fit in memory.
+    """
+    if processes <= 1:
+        yield from scorer.score_batch(texts)
+        return
+
+    import multiprocessing
+
+    with multiprocessing.Pool(processes) as pool:
+        for results in pool.imap(_score_chunk, _chunks(texts, chunk_size)):
+            yield from results
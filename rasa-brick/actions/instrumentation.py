@@ -0,0 +1,270 @@
+from typing import Any, Dict, List, Optional, Sequence, Text, Tuple
+from bisect import bisect_left
+from urllib.parse import parse_qs, urlparse
+import cProfile
+import functools
+import inspect
+import io
+import json
+import logging
+import os
+import pstats
+import random
+import threading
+import time
+import tracemalloc
+
+from rasa_sdk import Tracker
+from rasa_sdk.executor import CollectingDispatcher
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PAYLOAD_BUCKETS = (128, 256, 512, 1024, 2048, 4096, 8192, 16384, 65536)
+ALLOC_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+TOKEN_BUCKETS = (64, 128, 256, 512, 1024, 2048, 4096, 8192)
+
+
+class Histogram:
+    def __init__(self, bounds: Sequence[float]) -> None:
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, metric: Text, labels: Text) -> List[Text]:
+        lines, cumulative = [], 0
+        for bound, count in zip(self.bounds, self.counts):
+            cumulative += count
+            lines.append(f'{metric}_bucket{{{labels},le="{bound:g}"}} {cumulative}')
+        lines.append(f'{metric}_bucket{{{labels},le="+Inf"}} {self.count}')
+        lines.append(f"{metric}_sum{{{labels}}} {self.sum:g}")
+        lines.append(f"{metric}_count{{{labels}}} {self.count}")
+        return lines
+
+
+class ActionMetrics:
+    def __init__(self) -> None:
+        self.calls = 0
+        self.errors = 0
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.payload = Histogram(PAYLOAD_BUCKETS)
+        self.alloc = Histogram(ALLOC_BUCKETS)
+        # Action-specific histograms, e.g. prompt tokens for the LLM fallback
+        self.extra: Dict[Text, Histogram] = {}
+
+
+class MetricsRegistry:
+    """Per-action counters and histograms rendered in Prometheus text format."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.actions: Dict[Text, ActionMetrics] = {}
+
+    def observe(self, action: Text, seconds: float, payload_bytes: int, error: bool) -> None:
+        with self._lock:
+            metrics = self.actions.get(action)
+            if metrics is None:
+                metrics = self.actions[action] = ActionMetrics()
+            metrics.calls += 1
+            metrics.errors += error
+            metrics.latency.observe(seconds)
+            metrics.payload.observe(payload_bytes)
+
+    def observe_alloc(self, action: Text, peak_bytes: int) -> None:
+        with self._lock:
+            self.actions.setdefault(action, ActionMetrics()).alloc.observe(peak_bytes)
+
+    def observe_value(self, action: Text, metric: Text, value: float, bounds: Sequence[float]) -> None:
+        """Record ``value`` in the action's ``brick_action_<metric>`` histogram."""
+        with self._lock:
+            metrics = self.actions.setdefault(action, ActionMetrics())
+            histogram = metrics.extra.get(metric)
+            if histogram is None:
+                histogram = metrics.extra[metric] = Histogram(bounds)
+            histogram.observe(value)
+
+    def render(self) -> Text:
+        lines = [
+            "# HELP brick_action_calls_total Action invocations.",
+            "# TYPE brick_action_calls_total counter",
+        ]
+        with self._lock:
+            items = sorted(self.actions.items())
+            lines += [f'brick_action_calls_total{{action="{name}"}} {m.calls}' for name, m in items]
+            lines += ["# HELP brick_action_errors_total Action invocations that raised.",
+                      "# TYPE brick_action_errors_total counter"]
+            lines += [f'brick_action_errors_total{{action="{name}"}} {m.errors}' for name, m in items]
+            for metric, attribute, help_text in (
+                ("brick_action_latency_seconds", "latency", "Action run time."),
+                ("brick_action_payload_bytes", "payload", "Serialized size of messages and events returned."),
+                ("brick_action_alloc_peak_bytes", "alloc", "Peak traced allocation of sampled calls."),
+            ):
+                lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} histogram"]
+                for name, m in items:
+                    lines += getattr(m, attribute).render(metric, f'action="{name}"')
+            for extra in sorted({metric for _, m in items for metric in m.extra}):
+                lines += [f"# TYPE brick_action_{extra} histogram"]
+                for name, m in items:
+                    if extra in m.extra:
+                        lines += m.extra[extra].render(f"brick_action_{extra}", f'action="{name}"')
+        return "\n".join(lines) + "\n"
+
+
+class Profiler:
+    """Samples cProfile and tracemalloc for a fraction of action calls.
+
+    cProfile output is aggregated per action. Async actions are profiled
+    across their awaits, so other coroutines scheduled meanwhile show up too.
+    """
+
+    def __init__(self, sample_rate: float = 0.0) -> None:
+        self.sample_rate = sample_rate
+        self._lock = threading.Lock()
+        self.profiles: Dict[Text, pstats.Stats] = {}
+
+    def should_sample(self) -> bool:
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def start(self) -> Optional[Tuple[cProfile.Profile, bool]]:
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiler is already active (e.g. an overlapping async call)
+            return None
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        return profile, started_tracing
+
+    def stop(self, action: Text, sample: Optional[Tuple[cProfile.Profile, bool]]) -> None:
+        if sample is None:
+            return
+        profile, started_tracing = sample
+        profile.disable()
+        registry.observe_alloc(action, tracemalloc.get_traced_memory()[1])
+        if started_tracing:
+            tracemalloc.stop()
+        with self._lock:
+            if action in self.profiles:
+                self.profiles[action].add(profile)
+            else:
+                self.profiles[action] = pstats.Stats(profile)
+
+    def report(self, action: Text, limit: int = 30) -> Text:
+        with self._lock:
+            stats = self.profiles.get(action)
+            if stats is None:
+                return f"No profile samples for {action}\n"
+            out = io.StringIO()
+            stats.stream = out
+            stats.sort_stats("cumulative").print_stats(limit)
+        return out.getvalue()
+
+
+registry = MetricsRegistry()
+profiler = Profiler(float(os.getenv("BRICK_PROFILE_SAMPLE_RATE", "0")))
+
+
+def _payload_size(dispatcher: CollectingDispatcher, first_message: int, events: Any) -> int:
+    return len(json.dumps([dispatcher.messages[first_message:], events], default=str))
+
+
+def instrumented(cls: type) -> type:
+    """Class decorator that records latency, calls, errors and payload size of ``run``."""
+    run = cls.run
+
+    if inspect.iscoroutinefunction(run):
+        @functools.wraps(run)
+        async def wrapper(self, dispatcher: CollectingDispatcher, tracker: Tracker,
+                          domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
+            name = self.name()
+            sample = profiler.start() if profiler.should_sample() else None
+            first_message = len(dispatcher.messages)
+            start = time.perf_counter()
+            events, error = None, False
+            try:
+                events = await run(self, dispatcher, tracker, domain)
+                return events
+            except Exception:
+                error = True
+                raise
+            finally:
+                elapsed = time.perf_counter() - start
+                profiler.stop(name, sample)
+                registry.observe(name, elapsed, _payload_size(dispatcher, first_message, events), error)
+    else:
+        @functools.wraps(run)
+        def wrapper(self, dispatcher: CollectingDispatcher, tracker: Tracker,
+                    domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
+            name = self.name()
+            sample = profiler.start() if profiler.should_sample() else None
+            first_message = len(dispatcher.messages)
+            start = time.perf_counter()
+            events, error = None, False
+            try:
+                events = run(self, dispatcher, tracker, domain)
+                return events
+            except Exception:
+                error = True
+                raise
+            finally:
+                elapsed = time.perf_counter() - start
+                profiler.stop(name, sample)
+                registry.observe(name, elapsed, _payload_size(dispatcher, first_message, events), error)
+
+    cls.run = wrapper
+    return cls
+
+
+def _render(path: Text) -> Optional[Text]:
+    url = urlparse(path)
+    if url.path == "/metrics":
+        return registry.render()
+    if url.path == "/profile":
+        action = parse_qs(url.query).get("action", [""])[0]
+        return profiler.report(action) if action else "".join(f"{name}\n" for name in sorted(profiler.profiles))
+    return None
+
+
+_server: Optional[Any] = None
+
+
+def start_metrics_server(port: int, host: Text = "0.0.0.0") -> Any:
+    """Serve /metrics and /profile?action=<name> from a daemon thread."""
+    global _server
+    if _server is None:
+        # Imported here so replicas without a metrics port don't pay for http.server
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                body = _render(self.path)
+                if body is None:
+                    self.send_error(404)
+                    return
+                data = body.encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format: Text, *args: Any) -> None:
+                pass
+
+        _server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=_server.serve_forever, name="brick-metrics", daemon=True).start()
+        logger.info(f"Action metrics available on http://{host}:{port}/metrics")
+    return _server
+
+
+if os.getenv("BRICK_METRICS_PORT"):
+    start_metrics_server(int(os.environ["BRICK_METRICS_PORT"]))
@@ -0,0 +1,241 @@
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, NamedTuple, Optional, Sequence, Text, Tuple
+import json
+import logging
+import os
+import threading
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INVENTORY_PATH = os.path.join(os.path.dirname(__file__), "data", "inventory.json")
+
+
+class InventoryItem(NamedTuple):
+    name: Text
+    category: Text
+    quantity: float
+    unit: Text
+    threshold: float
+
+    @property
+    def below_threshold(self) -> bool:
+        return self.quantity < self.threshold
+
+
+class StockColumns(NamedTuple):
+    """Stock levels for several items, read in one pass; rows follow ``names``."""
+    names: List[Text]
+    units: List[Text]
+    quantities: np.ndarray
+    thresholds: np.ndarray
+
+    @property
+    def below_threshold(self) -> np.ndarray:
+        return self.quantities < self.thresholds
+
+
+class InventoryStore:
+    """Column-backed inventory with a name -> row index.
+
+    Quantities and reorder thresholds live in parallel NumPy arrays so that
+    single-item lookups are a dict hit plus two array reads, and reorder
+    alerts are one vectorized comparison over the whole catalog. ``version``
+    counts writes, so caches built from stock levels can tell when they
+    are stale.
+    """
+
+    def __init__(self, capacity: int = 64) -> None:
+        self._lock = threading.RLock()
+        self._index: Dict[Text, int] = {}
+        self._names: List[Text] = []
+        self._categories: List[Text] = []
+        self._units: List[Text] = []
+        self._quantity = np.zeros(max(capacity, 1), dtype=np.float64)
+        self._threshold = np.zeros(max(capacity, 1), dtype=np.float64)
+        # An array rather than an int so share_columns can share it with the columns
+        self._version = np.zeros(1, dtype=np.int64)
+
+    @classmethod
+    def from_dict(cls, inventory: Mapping[Text, Mapping[Text, Mapping[Text, Any]]]) -> "InventoryStore":
+        rows = [
+            (name, category, data["quantity"], data["unit"], data["threshold"])
+            for category, items in inventory.items()
+            for name, data in items.items()
+        ]
+        store = cls(capacity=len(rows))
+        store.bulk_load(rows)
+        return store
+
+    @classmethod
+    def from_file(cls, path: Text) -> "InventoryStore":
+        with open(path, encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+    @property
+    def version(self) -> int:
+        return int(self._version[0])
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __contains__(self, name: Text) -> bool:
+        return name.lower() in self._index
+
+    def _grow(self, needed: int) -> None:
+        capacity = len(self._quantity)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        self._quantity = np.resize(self._quantity, capacity)
+        self._threshold = np.resize(self._threshold, capacity)
+
+    def bulk_load(self, rows: Iterable[Tuple[Text, Text, float, Text, float]]) -> None:
+        with self._lock:
+            for name, category, quantity, unit, threshold in rows:
+                self._upsert(name, category, quantity, unit, threshold)
+            self._version[0] += 1
+
+    def upsert(self, name: Text, category: Text, quantity: float, unit: Text, threshold: float) -> None:
+        with self._lock:
+            self._upsert(name, category, quantity, unit, threshold)
+            self._version[0] += 1
+
+    def _upsert(self, name: Text, category: Text, quantity: float, unit: Text, threshold: float) -> None:
+        key = name.lower()
+        row = self._index.get(key)
+        if row is None:
+            row = len(self._names)
+            self._grow(row + 1)
+            self._index[key] = row
+            self._names.append(key)
+            self._categories.append(category)
+            self._units.append(unit)
+        else:
+            self._categories[row] = category
+            self._units[row] = unit
+        self._quantity[row] = quantity
+        self._threshold[row] = threshold
+
+    def _item(self, row: int) -> InventoryItem:
+        return InventoryItem(
+            name=self._names[row],
+            category=self._categories[row],
+            quantity=float(self._quantity[row]),
+            unit=self._units[row],
+            threshold=float(self._threshold[row]),
+        )
+
+    def get(self, name: Text) -> Optional[InventoryItem]:
+        row = self._index.get(name.lower())
+        if row is None:
+            return None
+        # Under the lock: after share_columns another worker may be writing the same row
+        with self._lock:
+            return self._item(row)
+
+    def lookup_many(self, names: Sequence[Text]) -> List[Optional[InventoryItem]]:
+        """Items for several names (None where not stocked) from one consistent read."""
+        with self._lock:
+            rows = [self._index.get(name.lower()) for name in names]
+            known = [row for row in rows if row is not None]
+            quantities = self._quantity[known].tolist()
+            thresholds = self._threshold[known].tolist()
+        values = iter(zip(quantities, thresholds))
+        items: List[Optional[InventoryItem]] = []
+        for row in rows:
+            if row is None:
+                items.append(None)
+            else:
+                quantity, threshold = next(values)
+                items.append(InventoryItem(self._names[row], self._categories[row], quantity,
+                                           self._units[row], threshold))
+        return items
+
+    def category_names(self) -> List[Text]:
+        return sorted(set(self._categories))
+
+    def category_columns(self, category: Text) -> StockColumns:
+        """Every item in ``category`` as columns, e.g. to price them all with one batch quote."""
+        category = category.lower()
+        with self._lock:
+            rows = [row for row, name in enumerate(self._categories) if name.lower() == category]
+            return StockColumns([self._names[row] for row in rows], [self._units[row] for row in rows],
+                                self._quantity[rows], self._threshold[rows])
+
+    def apply_deltas(self, deltas: Mapping[Text, float]) -> List[Text]:
+        """Add signed stock changes in place; returns names that are not stocked."""
+        rows, amounts, unknown = [], [], []
+        with self._lock:
+            for name, delta in deltas.items():
+                row = self._index.get(name.lower())
+                if row is None:
+                    unknown.append(name)
+                else:
+                    rows.append(row)
+                    amounts.append(delta)
+            if rows:
+                np.add.at(self._quantity, np.asarray(rows, dtype=np.intp), np.asarray(amounts, dtype=np.float64))
+                self._version[0] += 1
+        return unknown
+
+    def set_quantities(self, quantities: Mapping[Text, float]) -> List[Text]:
+        """Overwrite stock levels (e.g. after a stock count); returns unknown names."""
+        unknown = []
+        with self._lock:
+            for name, quantity in quantities.items():
+                row = self._index.get(name.lower())
+                if row is None:
+                    unknown.append(name)
+                else:
+                    self._quantity[row] = quantity
+            self._version[0] += 1
+        return unknown
+
+    def share_columns(self, allocate: Callable[[np.ndarray], np.ndarray], lock: Any) -> int:
+        """Move the numeric columns into memory from ``allocate`` and guard them with ``lock``.
+
+        Used before forking workers so every process updates the same stock
+        levels. Items added afterwards grow private copies in that process.
+        """
+        with self._lock:
+            self._quantity = allocate(self._quantity)
+            self._threshold = allocate(self._threshold)
+            self._version = allocate(self._version)
+            self._lock = lock
+        return self._quantity.nbytes + self._threshold.nbytes + self._version.nbytes
+
+    def below_threshold(self) -> List[Text]:
+        with self._lock:
+            size = len(self._names)
+            mask = self._quantity[:size] < self._threshold[:size]
+        return [self._names[row] for row in np.flatnonzero(mask)]
+
+    def categories(self) -> Dict[Text, List[InventoryItem]]:
+        grouped: Dict[Text, List[InventoryItem]] = {}
+        with self._lock:
+            for row in range(len(self._names)):
+                grouped.setdefault(self._categories[row], []).append(self._item(row))
+        return grouped
+
+    def __iter__(self) -> Iterator[InventoryItem]:
+        with self._lock:
+            items = [self._item(row) for row in range(len(self._names))]
+        return iter(items)
+
+
+_store: Optional[InventoryStore] = None
+_store_lock = threading.Lock()
+
+
+def get_inventory_store() -> InventoryStore:
+    """Process-wide inventory store, loaded once from BRICK_INVENTORY_PATH."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                path = os.getenv("BRICK_INVENTORY_PATH", DEFAULT_INVENTORY_PATH)
+                _store = InventoryStore.from_file(path)
+                logger.info(f"Loaded {len(_store)} inventory items from {path}")
+    return _store
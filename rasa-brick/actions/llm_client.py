@@ -0,0 +1,403 @@
+from typing import Any, Callable, Deque, Dict, List, NamedTuple, Optional, Text, Tuple
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import time
+
+logger = logging.getLogger(__name__)
+
+Messages = List[Dict[Text, Text]]
+
+
+class LLMResponse(NamedTuple):
+    text: Text
+    finish_reason: Optional[Text]
+
+
+class LLMBackend(ABC):
+    """Something that turns a chat message list into a completion."""
+
+    name = "backend"
+
+    @abstractmethod
+    async def complete(self, messages: Messages) -> LLMResponse:
+        raise NotImplementedError
+
+
+class OpenAIBackend(LLMBackend):
+    name = "openai"
+
+    def __init__(self, model: Text = "gpt-3.5-turbo",
+                 temperature: float = 0.7,
+                 max_tokens: int = 150,
+                 client: Optional[Any] = None) -> None:
+        self.model = model
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        if client is None:
+            # Deferred: the openai package takes longer to import than the rest of the action server
+            import openai
+
+            # One AsyncOpenAI client per process keeps its HTTP connection pool warm;
+            # retries are left to ResilientBackend so they count against the deadline
+            client = openai.AsyncOpenAI(max_retries=0)
+        self._client = client
+
+    async def complete(self, messages: Messages) -> LLMResponse:
+        response = await self._client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            temperature=self.temperature,
+            max_tokens=self.max_tokens
+        )
+        choice = response.choices[0]
+        return LLMResponse(choice.message.content, choice.finish_reason)
+
+
+class StubBackend(LLMBackend):
+    """Offline backend for tests and benchmarks; never touches the network."""
+
+    name = "stub"
+
+    def __init__(self, reply: Optional[Text] = None, delay: float = 0.0) -> None:
+        self.reply = reply
+        self.delay = delay
+        self.calls = 0
+
+    async def complete(self, messages: Messages) -> LLMResponse:
+        self.calls += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        text = self.reply or f"(stub) You said: {messages[-1]['content'] if messages else ''}"
+        return LLMResponse(text, "stop")
+
+
+class LLMTimeoutError(RuntimeError):
+    pass
+
+
+class CircuitOpenError(RuntimeError):
+    pass
+
+
+class LatencyTracker:
+    """Rolling window of recent upstream latencies (seconds)."""
+
+    def __init__(self, window: int = 200) -> None:
+        self._samples: Deque[float] = deque(maxlen=window)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def add(self, latency: float) -> None:
+        self._samples.append(latency)
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class BreakerToken(NamedTuple):
+    generation: int
+    trial: bool
+
+
+class CircuitBreaker:
+    """Opens when the recent error rate or p95 latency crosses a threshold.
+
+    While open every call is refused; after ``cooldown`` seconds a single
+    trial token is handed out and only its outcome closes or re-opens the
+    circuit. Every transition starts a new generation, so outcomes of calls
+    admitted before it (stragglers) are ignored.
+    """
+
+    def __init__(self, window: int = 50,
+                 min_calls: int = 10,
+                 error_rate: float = 0.5,
+                 latency_threshold: float = 5.0,
+                 cooldown: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.latency_threshold = latency_threshold
+        self.cooldown = cooldown
+        self.clock = clock
+        self._outcomes: Deque[Tuple[bool, float]] = deque(maxlen=window)
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self._generation = 0
+
+    @property
+    def state(self) -> Text:
+        if self._opened_at is None:
+            return "closed"
+        if self.clock() - self._opened_at >= self.cooldown:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> Optional[BreakerToken]:
+        """A token to pass to ``record``, or None when the call is refused."""
+        state = self.state
+        if state == "closed":
+            return BreakerToken(self._generation, False)
+        if state == "half_open" and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return BreakerToken(self._generation, True)
+        return None
+
+    def _open(self) -> None:
+        self._opened_at = self.clock()
+        self._generation += 1
+
+    def record(self, token: BreakerToken, ok: bool, latency: float) -> None:
+        if token.generation != self._generation:
+            # Admitted before the circuit last changed state
+            return
+        if token.trial:
+            self._trial_in_flight = False
+            if ok and latency < self.latency_threshold:
+                self._opened_at = None
+                self._outcomes.clear()
+                self._generation += 1
+            else:
+                self._open()
+            return
+
+        self._outcomes.append((ok, latency))
+        if len(self._outcomes) < self.min_calls:
+            return
+        errors = sum(1 for success, _ in self._outcomes if not success)
+        latencies = sorted(elapsed for _, elapsed in self._outcomes)
+        p95 = latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))]
+        if errors / len(self._outcomes) >= self.error_rate or p95 >= self.latency_threshold:
+            logger.warning(f"LLM circuit opened: {errors}/{len(self._outcomes)} errors, p95 {p95:.2f}s")
+            self._open()
+
+    def release(self, token: BreakerToken) -> None:
+        """Give back a trial token whose call ended without an outcome (e.g. cancelled)."""
+        if token.trial and token.generation == self._generation:
+            self._trial_in_flight = False
+
+
+class ResilientBackend(LLMBackend):
+    """Deadline, hedging and circuit breaking around another backend.
+
+    A second request is fired once the first has been outstanding for the
+    recent p95 latency (or fails early); whichever succeeds first wins and
+    the other is cancelled. The whole exchange is bounded by ``deadline``.
+    """
+
+    def __init__(self, inner: LLMBackend,
+                 deadline: float = 10.0,
+                 hedge: bool = True,
+                 hedge_delay: float = 2.0,
+                 breaker: Optional[CircuitBreaker] = None) -> None:
+        self.inner = inner
+        self.name = inner.name
+        self.deadline = deadline
+        self.hedge = hedge
+        self.default_hedge_delay = hedge_delay
+        self.breaker = breaker or CircuitBreaker()
+        self.latencies = LatencyTracker()
+        self.stats = {"hedged": 0, "timeouts": 0, "short_circuited": 0}
+
+    def hedge_delay(self) -> float:
+        p95 = self.latencies.percentile(0.95) if len(self.latencies) >= 20 else None
+        return max(0.05, p95 if p95 is not None else self.default_hedge_delay)
+
+    async def complete(self, messages: Messages) -> LLMResponse:
+        token = self.breaker.allow()
+        if token is None:
+            self.stats["short_circuited"] += 1
+            raise CircuitOpenError("LLM circuit open")
+
+        start = time.perf_counter()
+        try:
+            response = await asyncio.wait_for(self._hedged(messages), self.deadline)
+        except asyncio.TimeoutError:
+            self.stats["timeouts"] += 1
+            self.breaker.record(token, False, time.perf_counter() - start)
+            raise LLMTimeoutError(f"LLM deadline of {self.deadline:.1f}s exceeded")
+        except Exception:
+            self.breaker.record(token, False, time.perf_counter() - start)
+            raise
+        else:
+            latency = time.perf_counter() - start
+            self.latencies.add(latency)
+            self.breaker.record(token, True, latency)
+            return response
+        finally:
+            # No-op once recorded; frees the trial if the caller was cancelled
+            self.breaker.release(token)
+
+    async def _hedged(self, messages: Messages) -> LLMResponse:
+        tasks = [asyncio.ensure_future(self.inner.complete(messages))]
+        try:
+            if self.hedge:
+                done, _ = await asyncio.wait(tasks, timeout=self.hedge_delay())
+                if not done or tasks[0].exception() is not None:
+                    self.stats["hedged"] += 1
+                    tasks.append(asyncio.ensure_future(self.inner.complete(messages)))
+
+            error: Optional[BaseException] = None
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+
+class ResponseCache:
+    """LRU cache whose entries also expire ``ttl`` seconds after insertion."""
+
+    def __init__(self, max_size: int = 1024, ttl: float = 3600.0) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[Text, Tuple[float, LLMResponse]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Text) -> Optional[LLMResponse]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires, value = entry
+        if expires < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Text, value: LLMResponse) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+_NON_WORD = re.compile(r"[^\w\s]+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: Text) -> Text:
+    return _WHITESPACE.sub(" ", _NON_WORD.sub(" ", text.lower())).strip()
+
+
+def cache_key(messages: Messages) -> Text:
+    """Key on the normalized prompt plus its context window."""
+    digest = hashlib.sha1()
+    for message in messages:
+        digest.update(message["role"].encode())
+        digest.update(b"\x00")
+        digest.update(normalize_text(message.get("content") or "").encode())
+        digest.update(b"\x01")
+    return digest.hexdigest()
+
+
+class CachedLLMClient:
+    """Response cache and in-flight coalescing in front of an ``LLMBackend``.
+
+    Concurrent requests with the same key share a single upstream call; the
+    first caller to miss the cache starts it and everyone else awaits the
+    same task.
+    """
+
+    def __init__(self, backend: LLMBackend, cache: Optional[ResponseCache] = None) -> None:
+        self.backend = backend
+        self.cache = cache or ResponseCache()
+        self._inflight: Dict[Text, "asyncio.Task[LLMResponse]"] = {}
+        self.stats = {"hit": 0, "miss": 0, "coalesced": 0, "error": 0}
+
+    async def complete(self, messages: Messages) -> Tuple[LLMResponse, Dict[Text, Any]]:
+        start = time.perf_counter()
+        key = cache_key(messages)
+
+        response = self.cache.get(key)
+        if response is not None:
+            status = "hit"
+        else:
+            task = self._inflight.get(key)
+            if task is not None:
+                status = "coalesced"
+            else:
+                status = "miss"
+                task = asyncio.ensure_future(self.backend.complete(messages))
+                self._inflight[key] = task
+                task.add_done_callback(lambda done: self._settle(key, done))
+            try:
+                # Shield so one cancelled caller does not cancel the shared call
+                response = await asyncio.shield(task)
+            except Exception:
+                self.stats["error"] += 1
+                raise
+
+        self.stats[status] += 1
+        return response, {
+            "cache": status,
+            "latency_ms": (time.perf_counter() - start) * 1000.0,
+            "backend": self.backend.name,
+        }
+
+    def _settle(self, key: Text, task: "asyncio.Task[LLMResponse]") -> None:
+        self._inflight.pop(key, None)
+        if not task.cancelled() and task.exception() is None:
+            self.cache.set(key, task.result())
+
+
+_client: Optional[CachedLLMClient] = None
+
+
+def _default_backend() -> LLMBackend:
+    if os.getenv("BRICK_LLM_BACKEND", "openai") == "stub":
+        backend: LLMBackend = StubBackend()
+    else:
+        backend = OpenAIBackend(model=os.getenv("BRICK_LLM_MODEL", "gpt-3.5-turbo"))
+    return ResilientBackend(
+        backend,
+        deadline=float(os.getenv("BRICK_LLM_DEADLINE", "10")),
+        hedge=os.getenv("BRICK_LLM_HEDGE", "1") == "1",
+        hedge_delay=float(os.getenv("BRICK_LLM_HEDGE_DELAY", "2")),
+        breaker=CircuitBreaker(
+            error_rate=float(os.getenv("BRICK_LLM_BREAKER_ERROR_RATE", "0.5")),
+            latency_threshold=float(os.getenv("BRICK_LLM_BREAKER_LATENCY", "5")),
+            cooldown=float(os.getenv("BRICK_LLM_BREAKER_COOLDOWN", "30")),
+        ),
+    )
+
+
+def get_llm_client() -> CachedLLMClient:
+    """Process-wide LLM client; BRICK_LLM_BACKEND=stub runs fully offline."""
+    global _client
+    if _client is None:
+        _client = CachedLLMClient(
+            _default_backend(),
+            ResponseCache(
+                max_size=int(os.getenv("BRICK_LLM_CACHE_SIZE", "1024")),
+                ttl=float(os.getenv("BRICK_LLM_CACHE_TTL", "3600")),
+            ),
+        )
+    return _client
+
+
+def set_llm_backend(backend: LLMBackend) -> CachedLLMClient:
+    """Swap the process-wide backend (e.g. for a StubBackend in tests)."""
+    global _client
+    _client = CachedLLMClient(backend)
+    return _client
@@ -0,0 +1,220 @@
+from typing import Any, Dict, Iterable, List, Mapping, NamedTuple, Optional, Sequence, Text, Tuple
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+DEFAULT_MENU_PATH = os.path.join(DATA_DIR, "menu.json")
+DEFAULT_EMBEDDINGS_PATH = os.path.join(DATA_DIR, "menu_embeddings.npy")
+
+# gte-small, as used by the create-embeddings function, produces 384-dim unit vectors
+EMBEDDING_DIM = 384
+PERIOD_BITS = {"morning": 1, "afternoon": 2, "evening": 4}
+DIETARY_BITS = {"vegetarian": 1, "vegan": 2, "gluten-free": 4, "dairy-free": 8, "pescatarian": 16}
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def embed_text(text: Text, dim: int = EMBEDDING_DIM) -> np.ndarray:
+    """Offline signed feature-hashing embedding, L2-normalized.
+
+    Only used to build an embeddings file without network access; vectors
+    from create-embeddings can be dropped in instead (see ``main``).
+    """
+    vector = np.zeros(dim, dtype=np.float32)
+    for token in _TOKEN.findall(text.lower()):
+        digest = int.from_bytes(hashlib.blake2b(token.encode(), digest_size=8).digest(), "little")
+        vector[digest % dim] += 1.0 if digest >> 63 else -1.0
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def normalize_dietary(value: Text) -> Text:
+    return value.strip().lower().replace(" ", "-")
+
+
+def split_dietary(values: Iterable[Text]) -> Tuple[List[Text], List[Text]]:
+    """Restrictions the menu can filter by, and the ones it has no tag for."""
+    known: List[Text] = []
+    unknown: List[Text] = []
+    for value in values:
+        value = normalize_dietary(value)
+        target = known if value in DIETARY_BITS else unknown
+        if value not in target:
+            target.append(value)
+    return known, unknown
+
+
+def _bits(values: Iterable[Text], table: Mapping[Text, int]) -> int:
+    mask = 0
+    for value in values:
+        mask |= table.get(normalize_dietary(value), 0)
+    return mask
+
+
+class UnknownDietaryError(RuntimeError):
+    def __init__(self, restrictions: Sequence[Text]) -> None:
+        super().__init__(f"No menu tag for dietary restriction(s): {', '.join(restrictions)}")
+        self.restrictions = list(restrictions)
+
+
+class Recommendation(NamedTuple):
+    name: Text
+    text: Text
+    cuisine: Text
+    score: float
+
+
+class MenuIndex:
+    """Menu items with a row-aligned float32 embeddings matrix.
+
+    Ranking is one matrix-vector product over the (memory-mapped) matrix;
+    time of day and dietary filters are bitmask tests, stock is a lookup of
+    each item's stock ingredient, and the top k come from argpartition.
+    """
+
+    def __init__(self, items: Sequence[Mapping[Text, Any]], embeddings: np.ndarray) -> None:
+        if len(items) != len(embeddings):
+            raise ValueError(f"{len(items)} menu items but {len(embeddings)} embedding rows")
+        self.embeddings = embeddings
+        self.names = [item["name"] for item in items]
+        self.texts = [item.get("text", item["name"]) for item in items]
+        self.cuisines = [item.get("cuisine", "") for item in items]
+        self.periods = np.array([_bits(item.get("periods", PERIOD_BITS), PERIOD_BITS) for item in items], dtype=np.uint8)
+        self.dietary = np.array([_bits(item.get("dietary", ()), DIETARY_BITS) for item in items], dtype=np.uint8)
+
+        self.stock_items = sorted({item["stock_item"] for item in items if item.get("stock_item")})
+        codes = {name: code for code, name in enumerate(self.stock_items)}
+        # Items without a stock ingredient point at the extra, always-available slot
+        self.stock_codes = np.array([codes.get(item.get("stock_item"), len(codes)) for item in items], dtype=np.int32)
+
+        self.signature: Dict[Text, np.ndarray] = {
+            period: np.array([row for row, item in enumerate(items) if period in item.get("signature", ())], dtype=np.int64)
+            for period in PERIOD_BITS
+        }
+        self._search_text = [f" {name.lower()} {item.get('stock_item') or ''} " for name, item in zip(self.names, items)]
+
+    @classmethod
+    def from_files(cls, menu_path: Text, embeddings_path: Text) -> "MenuIndex":
+        with open(menu_path, encoding="utf-8") as f:
+            items = json.load(f)["items"]
+        return cls(items, np.load(embeddings_path, mmap_mode="r"))
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def rows_matching(self, terms: Iterable[Text]) -> List[int]:
+        """Rows whose name or stock ingredient contains one of the terms as a word."""
+        needles = [f" {term.lower()} " for term in terms if term]
+        if not needles:
+            return []
+        return [row for row, haystack in enumerate(self._search_text) if any(n in haystack for n in needles)]
+
+    def vector_for(self, rows: Sequence[int]) -> Optional[np.ndarray]:
+        if not len(rows):
+            return None
+        vector = np.asarray(self.embeddings[np.sort(rows)], dtype=np.float32).mean(axis=0)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+
+    def rank(self, query: np.ndarray, period: Optional[Text] = None, dietary: Iterable[Text] = (),
+             unavailable: Iterable[Text] = (), exclude: Sequence[int] = (), k: int = 3) -> List[Recommendation]:
+        scores = self.embeddings @ np.asarray(query, dtype=np.float32)
+
+        mask = np.ones(len(scores), dtype=bool)
+        if period in PERIOD_BITS:
+            mask &= (self.periods & PERIOD_BITS[period]) != 0
+        known, unknown = split_dietary(dietary)
+        if unknown:
+            # Ignoring the restriction would recommend dishes the guest cannot eat
+            raise UnknownDietaryError(unknown)
+        required = _bits(known, DIETARY_BITS)
+        if required:
+            mask &= (self.dietary & required) == required
+        blocked = np.append(np.isin(self.stock_items, list(unavailable)), False)
+        mask &= ~blocked[self.stock_codes]
+        if len(exclude):
+            mask[np.asarray(exclude)] = False
+
+        candidates = np.flatnonzero(mask)
+        if not len(candidates):
+            return []
+        candidate_scores = scores[candidates]
+        if len(candidates) > k:
+            top = np.argpartition(-candidate_scores, k - 1)[:k]
+        else:
+            top = np.arange(len(candidates))
+        top = top[np.argsort(-candidate_scores[top], kind="stable")]
+        return [
+            Recommendation(self.names[row], self.texts[row], self.cuisines[row], float(candidate_scores[i]))
+            for i, row in zip(top, candidates[top])
+        ]
+
+    def recommend(self, period: Text, ordered: Iterable[Text] = (), dietary: Iterable[Text] = (),
+                  unavailable: Iterable[Text] = (), k: int = 3) -> List[Recommendation]:
+        """Dishes close to what was ordered, or to the period's signature dishes if nothing was."""
+        ordered_rows = self.rows_matching(ordered)
+        query = self.vector_for(ordered_rows)
+        if query is None:
+            query = self.vector_for(self.signature.get(period, ()))
+        if query is None:
+            return []
+        return self.rank(query, period, dietary, unavailable, ordered_rows, k)
+
+
+def build_embeddings(items: Sequence[Mapping[Text, Any]], vectors: Optional[Mapping[Text, Sequence[float]]] = None,
+                     dim: int = EMBEDDING_DIM) -> np.ndarray:
+    """Row-aligned embeddings, taking precomputed vectors by item name where given."""
+    matrix = np.empty((len(items), dim), dtype=np.float32)
+    for row, item in enumerate(items):
+        if vectors and item["name"] in vectors:
+            matrix[row] = vectors[item["name"]]
+        else:
+            matrix[row] = embed_text(" ".join([item["name"], item.get("cuisine", ""), item.get("description", "")]), dim)
+    return matrix
+
+
+_index: Optional[MenuIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_menu_index() -> MenuIndex:
+    """Process-wide index over BRICK_MENU_PATH and BRICK_MENU_EMBEDDINGS_PATH."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                menu_path = os.getenv("BRICK_MENU_PATH", DEFAULT_MENU_PATH)
+                embeddings_path = os.getenv("BRICK_MENU_EMBEDDINGS_PATH", DEFAULT_EMBEDDINGS_PATH)
+                _index = MenuIndex.from_files(menu_path, embeddings_path)
+                logger.info(f"Loaded {len(_index)} menu embeddings from {embeddings_path}")
+    return _index
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Rebuild the menu embeddings file from menu.json.")
+    parser.add_argument("--menu", default=DEFAULT_MENU_PATH)
+    parser.add_argument("--output", default=DEFAULT_EMBEDDINGS_PATH)
+    parser.add_argument("--vectors", help="JSON object of item name -> embedding, e.g. from create-embeddings")
+    args = parser.parse_args()
+
+    with open(args.menu, encoding="utf-8") as f:
+        items = json.load(f)["items"]
+    vectors = None
+    if args.vectors:
+        with open(args.vectors, encoding="utf-8") as f:
+            vectors = json.load(f)
+    np.save(args.output, build_embeddings(items, vectors))
+    print(f"Wrote {len(items)} embeddings to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+from typing import Any, Dict, Iterable, Optional, Text
+import argparse
+import gc
+import inspect
+import logging
+import mmap
+import multiprocessing
+import os
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Steps whose state is safe to build before forking. The LLM client, the
+# reservation store and the tenant store hold connections, so each worker
+# opens its own.
+PREFORK_WARMUP_STEPS = ("catalog", "inventory", "pricing", "forecast", "menu", "entities", "time", "feedback",
+                        "semantic_cache")
+
+
+def shared_array(array: np.ndarray, writeable: bool = False) -> np.ndarray:
+    """Copy ``array`` into an anonymous shared mapping that forked children see in place."""
+    buffer = mmap.mmap(-1, max(array.nbytes, 1), flags=mmap.MAP_SHARED)
+    shared = np.frombuffer(buffer, dtype=array.dtype, count=array.size).reshape(array.shape)
+    shared[...] = array
+    shared.flags.writeable = writeable
+    return shared
+
+
+def _share_attributes(obj: Any, names: Iterable[Text]) -> int:
+    size = 0
+    for name in names:
+        array = shared_array(getattr(obj, name))
+        setattr(obj, name, array)
+        size += array.nbytes
+    return size
+
+
+def share_static_data() -> Dict[Text, int]:
+    """Move the loaded stores' arrays into shared memory; returns bytes per component.
+
+    Inventory columns stay writable behind a process-shared lock so stock
+    changes are seen by every worker. Pricing tables are shared read-only.
+    The menu embeddings are already a read-only file mapping, which the
+    page cache shares between processes.
+    """
+    from actions.inventory_store import get_inventory_store
+    from actions.menu_index import get_menu_index
+    from actions.pricing_engine import get_pricing_engine
+
+    shared = {
+        "inventory": get_inventory_store().share_columns(lambda a: shared_array(a, writeable=True),
+                                                         multiprocessing.get_context("fork").RLock()),
+        "pricing": _share_attributes(get_pricing_engine(), ("day_factors", "peak_factors", "multipliers", "_base")),
+    }
+    index = get_menu_index()
+    shared["menu"] = _share_attributes(index, ("periods", "dietary", "stock_codes")) + index.embeddings.nbytes
+    return shared
+
+
+def prepare_workers(steps: Optional[Iterable[Text]] = None) -> Dict[Text, int]:
+    """Warm up, share the static data and freeze the heap ahead of ``fork()``.
+
+    ``gc.freeze()`` moves everything allocated so far out of the collector's
+    reach, so collections in the workers don't write to (and un-share) the
+    pages holding the parent's objects.
+    """
+    from actions.warmup import warm_up
+
+    if not os.getenv("BRICK_RESERVATION_DB"):
+        logger.warning("BRICK_RESERVATION_DB is not set; each worker will keep its own reservations")
+    warm_up(steps or PREFORK_WARMUP_STEPS)
+    shared = share_static_data()
+    gc.collect()
+    gc.freeze()
+    logger.info("Shared with workers: " + ", ".join(f"{name} {size / 1024:.0f} KiB" for name, size in shared.items()))
+    return shared
+
+
+def main() -> None:
+    """Build the static data once, then let Sanic fork workers onto the same socket.
+
+        python -m actions.prefork --workers 4 --port 5055
+    """
+    parser = argparse.ArgumentParser(description="Run the action server with pre-forked workers.")
+    parser.add_argument("--actions", default="actions")
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--cors", nargs="*", default="*")
+    args = parser.parse_args()
+
+    from rasa_sdk import endpoint
+
+    logging.basicConfig(level=logging.INFO)
+    # rasa-sdk hands this to Sanic, which forks the workers after binding the port
+    os.environ["ACTION_SERVER_SANIC_WORKERS"] = str(args.workers)
+    # prepare_workers runs the fork-safe warm-up itself
+    os.environ.pop("BRICK_WARMUP", None)
+    prepare_workers()
+    if "action_package_name" in inspect.signature(endpoint.run).parameters:
+        # rasa-sdk 3.6 (pinned in Dockerfile.actions) registers the package itself, before forking
+        endpoint.run(args.actions, args.port, args.cors)
+    else:
+        from rasa_sdk.executor import ActionExecutor
+
+        executor = ActionExecutor()
+        executor.register_package(args.actions)
+        endpoint.run(executor, args.port, args.cors)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+from typing import Any, Dict, Iterable, List, Mapping, NamedTuple, Optional, Sequence, Text, Tuple
+from collections import OrderedDict
+import datetime
+import json
+import logging
+import os
+import threading
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PRICING_PATH = os.path.join(os.path.dirname(__file__), "data", "pricing.json")
+
+# Indexed like datetime.weekday()
+WEEKDAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+
+
+class PriceQuote(NamedTuple):
+    item: Optional[Text]
+    base: float
+    adjusted: float
+    day_factor: float
+    peak_factor: float
+
+
+class BatchQuote(NamedTuple):
+    items: List[Text]
+    quantities: np.ndarray
+    base: np.ndarray
+    adjusted: np.ndarray
+    day_factor: float
+    peak_factor: float
+
+    @property
+    def total(self) -> float:
+        return float(self.adjusted @ self.quantities)
+
+    def quotes(self) -> List[PriceQuote]:
+        return [
+            PriceQuote(item, float(base), float(adjusted), self.day_factor, self.peak_factor)
+            for item, base, adjusted in zip(self.items, self.base, self.adjusted)
+        ]
+
+
+class PricingEngine:
+    """Pricing rules compiled into a 7x24 (weekday x hour) multiplier table.
+
+    Day factors and peak windows are resolved once when the engine is built,
+    so quoting is a table read plus a vectorized multiply over base prices.
+    Peak windows are inclusive on both ends, e.g. ``[11, 14]`` covers
+    11:00-14:59.
+    """
+
+    def __init__(self, rules: Mapping[Text, Any]) -> None:
+        self.rules = rules
+        self.default_base_price = float(rules.get("default_base_price", 20.0))
+
+        day_factors = rules.get("day_factors", {})
+        self.day_factors = np.array([day_factors.get(day, 1.0) for day in WEEKDAYS], dtype=np.float64)
+
+        self.peak_factors = np.ones(24, dtype=np.float64)
+        for start, end in rules.get("peak_windows", {}).values():
+            self.peak_factors[start:end + 1] = rules.get("peak_factor", 1.2)
+
+        self.multipliers = np.outer(self.day_factors, self.peak_factors)
+
+        base_prices = rules.get("base_prices", {})
+        self.items = [name.lower() for name in base_prices]
+        self._index = {name: row for row, name in enumerate(self.items)}
+        self._base = np.array(list(base_prices.values()), dtype=np.float64)
+
+    @classmethod
+    def from_file(cls, path: Text) -> "PricingEngine":
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    @staticmethod
+    def _slot(when: Optional[datetime.datetime]) -> Tuple[int, int]:
+        when = when or datetime.datetime.now()
+        return when.weekday(), when.hour
+
+    def factors(self, when: Optional[datetime.datetime] = None) -> Tuple[float, float]:
+        day, hour = self._slot(when)
+        return float(self.day_factors[day]), float(self.peak_factors[hour])
+
+    def multiplier(self, when: Optional[datetime.datetime] = None) -> float:
+        day, hour = self._slot(when)
+        return float(self.multipliers[day, hour])
+
+    def base_price(self, item: Optional[Text]) -> float:
+        row = self._index.get(item.lower()) if item else None
+        return self.default_base_price if row is None else float(self._base[row])
+
+    def base_prices(self, items: Sequence[Text]) -> np.ndarray:
+        rows = np.fromiter((self._index.get(item.lower(), -1) for item in items), dtype=np.intp, count=len(items))
+        prices = self._base[rows] if len(self._base) else np.empty(len(rows))
+        prices[rows < 0] = self.default_base_price
+        return prices
+
+    def quote(self, item: Optional[Text], when: Optional[datetime.datetime] = None,
+              factors: Optional[Tuple[float, float]] = None) -> PriceQuote:
+        """Price ``item`` at ``when``, or with precomputed (day, peak) ``factors``."""
+        day_factor, peak_factor = factors or self.factors(when)
+        base = self.base_price(item)
+        return PriceQuote(item, base, base * day_factor * peak_factor, day_factor, peak_factor)
+
+    def __contains__(self, item: Text) -> bool:
+        """Whether ``item`` has its own base price rather than the default."""
+        return item.lower() in self._index
+
+    def quote_batch(self, items: Sequence[Text],
+                    quantities: Optional[Iterable[float]] = None,
+                    when: Optional[datetime.datetime] = None,
+                    factors: Optional[Tuple[float, float]] = None) -> BatchQuote:
+        """Price a whole cart or menu page with one table read and one multiply."""
+        items = list(items)
+        day_factor, peak_factor = factors or self.factors(when)
+        base = self.base_prices(items)
+        if quantities is None:
+            qty = np.ones(len(items), dtype=np.float64)
+        else:
+            qty = np.fromiter(quantities, dtype=np.float64, count=len(items))
+        return BatchQuote(items, qty, base, base * (day_factor * peak_factor), day_factor, peak_factor)
+
+    def price_menu(self, when: Optional[datetime.datetime] = None) -> Dict[Text, float]:
+        adjusted = self._base * self.multiplier(when)
+        return dict(zip(self.items, adjusted.tolist()))
+
+
+_engine: Optional[PricingEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_pricing_engine() -> PricingEngine:
+    """Process-wide pricing engine, compiled once from BRICK_PRICING_PATH."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                path = os.getenv("BRICK_PRICING_PATH", DEFAULT_PRICING_PATH)
+                _engine = PricingEngine.from_file(path)
+                logger.info(f"Compiled pricing rules for {len(_engine.items)} items from {path}")
+    return _engine
+
+
+
+_tenant_engines: "OrderedDict[Text, PricingEngine]" = OrderedDict()
+_tenant_engines_lock = threading.Lock()
+MAX_TENANT_ENGINES = 256
+
+
+def get_tenant_pricing_engine(etag: Text, overrides: Optional[Mapping[Text, Any]]) -> PricingEngine:
+    """Engine for one tenant: the shared rules with ``overrides`` merged in.
+
+    Dict-valued rules (day factors, base prices, peak windows) are merged key
+    by key. Compiled engines are cached by the tenant config's etag, so a
+    settings change compiles once and unchanged tenants never recompile.
+    """
+    base = get_pricing_engine()
+    if not overrides:
+        return base
+    with _tenant_engines_lock:
+        engine = _tenant_engines.get(etag)
+        if engine is not None:
+            _tenant_engines.move_to_end(etag)
+            return engine
+    rules = dict(base.rules)
+    for key, value in overrides.items():
+        if isinstance(value, Mapping) and isinstance(rules.get(key), Mapping):
+            rules[key] = {**rules[key], **value}
+        else:
+            rules[key] = value
+    engine = PricingEngine(rules)
+    with _tenant_engines_lock:
+        _tenant_engines[etag] = engine
+        if len(_tenant_engines) > MAX_TENANT_ENGINES:
+            _tenant_engines.popitem(last=False)
+    return engine
\ No newline at end of file
@@ -0,0 +1,405 @@
+from typing import Any, Callable, Dict, List, Mapping, NamedTuple, Optional, Text, Tuple
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FLOOR_PLAN_PATH = os.path.join(os.path.dirname(__file__), "data", "floor_plan.json")
+DEFAULT_LOCATION = os.getenv("BRICK_LOCATION", "main")
+
+
+def _minutes(clock_time: Text) -> int:
+    hours, minutes = clock_time.split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+class Table(NamedTuple):
+    table_id: Text
+    area: Text
+    seats: int
+
+
+class Booking(NamedTuple):
+    booking_id: Text
+    location: Text
+    day: Text
+    table_id: Text
+    start_slot: int
+    slots: int
+    party_size: int
+    status: Text
+    expires_at: Optional[float] = None
+    sender_id: Optional[Text] = None
+
+    def active(self, now: float) -> bool:
+        return self.status == "confirmed" or (self.status == "held" and (self.expires_at or 0) > now)
+
+    def overlaps(self, start_slot: int, slots: int) -> bool:
+        return self.start_slot < start_slot + slots and start_slot < self.start_slot + self.slots
+
+
+class SlotOffer(NamedTuple):
+    table: Table
+    start_slot: int
+    slots: int
+
+
+class ReservationError(RuntimeError):
+    pass
+
+
+class SlotUnavailableError(ReservationError):
+    pass
+
+
+class HoldExpiredError(ReservationError):
+    pass
+
+
+class ReservationStore(ABC):
+    """Durable bookings. ``insert_if_free`` must check and insert atomically."""
+
+    @abstractmethod
+    def bookings_for_day(self, location: Text, day: Text, now: float) -> List[Booking]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def insert_if_free(self, booking: Booking, now: float) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    def confirm(self, booking_id: Text, now: float) -> Optional[Booking]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def release(self, booking_id: Text) -> Optional[Booking]:
+        raise NotImplementedError
+
+    def changed(self) -> bool:
+        """True when another process wrote bookings since the last call."""
+        return False
+
+
+class MemoryReservationStore(ReservationStore):
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._bookings: Dict[Text, Booking] = {}
+        self._by_day: Dict[Tuple[Text, Text], List[Text]] = {}
+
+    def bookings_for_day(self, location: Text, day: Text, now: float) -> List[Booking]:
+        with self._lock:
+            bookings = (self._bookings[booking_id] for booking_id in self._by_day.get((location, day), ()))
+            return [booking for booking in bookings if booking.active(now)]
+
+    def insert_if_free(self, booking: Booking, now: float) -> bool:
+        with self._lock:
+            for booking_id in self._by_day.get((booking.location, booking.day), ()):
+                other = self._bookings[booking_id]
+                if (other.table_id == booking.table_id and other.active(now)
+                        and other.overlaps(booking.start_slot, booking.slots)):
+                    return False
+            self._bookings[booking.booking_id] = booking
+            self._by_day.setdefault((booking.location, booking.day), []).append(booking.booking_id)
+            return True
+
+    def confirm(self, booking_id: Text, now: float) -> Optional[Booking]:
+        with self._lock:
+            booking = self._bookings.get(booking_id)
+            if booking is None or not booking.active(now):
+                return None
+            booking = self._bookings[booking_id] = booking._replace(status="confirmed", expires_at=None)
+            return booking
+
+    def release(self, booking_id: Text) -> Optional[Booking]:
+        with self._lock:
+            booking = self._bookings.get(booking_id)
+            if booking is None or booking.status == "released":
+                return None
+            self._bookings[booking_id] = booking._replace(status="released")
+            return booking
+
+
+CREATE_RESERVATIONS = """
+CREATE TABLE IF NOT EXISTS brick_reservations (
+    booking_id TEXT PRIMARY KEY,
+    location TEXT NOT NULL,
+    day TEXT NOT NULL,
+    table_id TEXT NOT NULL,
+    start_slot INTEGER NOT NULL,
+    slots INTEGER NOT NULL,
+    party_size INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    expires_at REAL,
+    sender_id TEXT
+)
+"""
+ACTIVE = "(status = 'confirmed' OR (status = 'held' AND expires_at > ?))"
+
+
+class SQLiteReservationStore(ReservationStore):
+    """Bookings shared by every action-server worker on the host.
+
+    Holds are checked and inserted inside one ``BEGIN IMMEDIATE`` transaction,
+    so two workers racing for the same table and slot cannot both win.
+    """
+
+    def __init__(self, path: Text) -> None:
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=10.0)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(CREATE_RESERVATIONS)
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS brick_reservations_day ON brick_reservations (location, day, table_id)"
+        )
+        self._data_version = self._read_data_version()
+
+    def _read_data_version(self) -> int:
+        return self._connection.execute("PRAGMA data_version").fetchone()[0]
+
+    def bookings_for_day(self, location: Text, day: Text, now: float) -> List[Booking]:
+        with self._lock:
+            rows = self._connection.execute(
+                f"SELECT * FROM brick_reservations WHERE location = ? AND day = ? AND {ACTIVE}", (location, day, now)
+            ).fetchall()
+        return [Booking(*row) for row in rows]
+
+    def insert_if_free(self, booking: Booking, now: float) -> bool:
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                conflict = self._connection.execute(
+                    "SELECT 1 FROM brick_reservations WHERE location = ? AND day = ? AND table_id = ? "
+                    f"AND start_slot < ? AND start_slot + slots > ? AND {ACTIVE} LIMIT 1",
+                    (booking.location, booking.day, booking.table_id,
+                     booking.start_slot + booking.slots, booking.start_slot, now),
+                ).fetchone()
+                if conflict is None:
+                    self._connection.execute(
+                        "INSERT INTO brick_reservations VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", tuple(booking)
+                    )
+                self._connection.execute("COMMIT")
+            except Exception:
+                self._connection.execute("ROLLBACK")
+                raise
+        return conflict is None
+
+    def _update(self, sql: Text, params: Tuple[Any, ...], booking_id: Text) -> Optional[Booking]:
+        with self._lock:
+            if self._connection.execute(sql, params).rowcount != 1:
+                return None
+            row = self._connection.execute(
+                "SELECT * FROM brick_reservations WHERE booking_id = ?", (booking_id,)
+            ).fetchone()
+        return Booking(*row)
+
+    def confirm(self, booking_id: Text, now: float) -> Optional[Booking]:
+        return self._update(
+            f"UPDATE brick_reservations SET status = 'confirmed', expires_at = NULL WHERE booking_id = ? AND {ACTIVE}",
+            (booking_id, now), booking_id,
+        )
+
+    def release(self, booking_id: Text) -> Optional[Booking]:
+        return self._update(
+            "UPDATE brick_reservations SET status = 'released' WHERE booking_id = ? AND status != 'released'",
+            (booking_id,), booking_id,
+        )
+
+    def changed(self) -> bool:
+        with self._lock:
+            version = self._read_data_version()
+            changed, self._data_version = version != self._data_version, version
+        return changed
+
+
+class _DayGrid:
+    def __init__(self, occupied: np.ndarray, next_expiry: float) -> None:
+        self.occupied = occupied
+        self.next_expiry = next_expiry
+
+
+class ReservationEngine:
+    """Table availability per location and day on a slot-indexed occupancy grid.
+
+    Each cached day is a ``tables x slots`` boolean array (tables ordered by
+    seats, so the first free row is the best fit). A search for ``n`` slots
+    takes window sums over the row-wise cumulative occupancy, which answers
+    both "is this time free" and "next free time" in one vectorized pass.
+    The store stays the source of truth: grids are rebuilt from it when
+    another worker writes or when a hold in them expires.
+    """
+
+    def __init__(self, floor_plan: Mapping[Text, Any], store: Optional[ReservationStore] = None,
+                 clock: Callable[[], float] = time.time, max_cached_days: int = 1024) -> None:
+        self.store = store or MemoryReservationStore()
+        self.clock = clock
+        self.max_cached_days = max_cached_days
+        self.slot_minutes = floor_plan.get("slot_minutes", 15)
+        self.slots_per_day = 24 * 60 // self.slot_minutes
+        self.default_slots = -(-floor_plan.get("default_duration_minutes", 90) // self.slot_minutes)
+        self.default_start = self.slot_for(floor_plan.get("default_start", "19:00"))
+        self.hold_ttl = floor_plan.get("hold_ttl_seconds", 300)
+        self.areas: Dict[Text, Text] = dict(floor_plan.get("areas", {}))
+
+        self.tables: Dict[Text, List[Table]] = {}
+        self.seats: Dict[Text, np.ndarray] = {}
+        self.hours: Dict[Text, Tuple[int, int]] = {}
+        self._rows: Dict[Text, Dict[Text, int]] = {}
+        for location, spec in floor_plan["locations"].items():
+            tables = sorted(
+                (Table(f"{group['prefix']}{n}", group["area"], group["seats"])
+                 for group in spec["tables"] for n in range(1, group["count"] + 1)),
+                key=lambda table: (table.seats, table.table_id),
+            )
+            self.tables[location] = tables
+            self.seats[location] = np.array([table.seats for table in tables])
+            self.hours[location] = (self.slot_for(spec["open"]), self.slot_for(spec["close"]))
+            self._rows[location] = {table.table_id: row for row, table in enumerate(tables)}
+
+        self._lock = threading.RLock()
+        self._grids: "OrderedDict[Tuple[Text, Text], _DayGrid]" = OrderedDict()
+
+    @classmethod
+    def from_file(cls, path: Text, store: Optional[ReservationStore] = None) -> "ReservationEngine":
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f), store)
+
+    def slot_for(self, clock_time: Text) -> int:
+        return _minutes(clock_time) // self.slot_minutes
+
+    def time_for(self, slot: int) -> Text:
+        minutes = slot * self.slot_minutes
+        return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+    def _grid(self, location: Text, day: Text, now: float) -> _DayGrid:
+        if self.store.changed():
+            self._grids.clear()
+        key = (location, day)
+        grid = self._grids.get(key)
+        if grid is not None and now < grid.next_expiry:
+            self._grids.move_to_end(key)
+            return grid
+
+        rows = self._rows[location]
+        occupied = np.zeros((len(rows), self.slots_per_day), dtype=bool)
+        next_expiry = float("inf")
+        for booking in self.store.bookings_for_day(location, day, now):
+            occupied[rows[booking.table_id], booking.start_slot:booking.start_slot + booking.slots] = True
+            if booking.status == "held":
+                next_expiry = min(next_expiry, booking.expires_at)
+        grid = self._grids[key] = _DayGrid(occupied, next_expiry)
+        if len(self._grids) > self.max_cached_days:
+            self._grids.popitem(last=False)
+        return grid
+
+    def _search(self, location: Text, occupied: np.ndarray, party_size: int, earliest: int,
+                slots: int, latest: Optional[int] = None) -> Optional[SlotOffer]:
+        opens, closes = self.hours[location]
+        first_row = int(np.searchsorted(self.seats[location], party_size))
+        first_start = max(earliest, opens)
+        last_start = min(closes - slots, self.slots_per_day - slots if latest is None else latest)
+        if first_row >= len(occupied) or first_start > last_start:
+            return None
+        candidates = occupied[first_row:]
+        cumulative = np.zeros((len(candidates), self.slots_per_day + 1), dtype=np.int32)
+        np.cumsum(candidates, axis=1, out=cumulative[:, 1:])
+        starts = np.arange(first_start, last_start + 1)
+        free = (cumulative[:, starts + slots] - cumulative[:, starts]) == 0
+        open_starts = free.any(axis=0)
+        if not open_starts.any():
+            return None
+        column = int(np.argmax(open_starts))
+        row = first_row + int(np.argmax(free[:, column]))
+        return SlotOffer(self.tables[location][row], int(starts[column]), slots)
+
+    def largest_party(self, location: Text) -> int:
+        return int(self.seats[location][-1])
+
+    def table(self, location: Text, table_id: Text) -> Table:
+        return self.tables[location][self._rows[location][table_id]]
+
+    def active_hold(self, booking_id: Text, location: Text, day: Text) -> Optional[Booking]:
+        """The booking if it is still an unexpired hold on that day."""
+        for booking in self.store.bookings_for_day(location, day, self.clock()):
+            if booking.booking_id == booking_id and booking.status == "held":
+                return booking
+        return None
+
+    def find_slot(self, location: Text, day: Text, party_size: int, earliest: int,
+                  slots: Optional[int] = None, latest: Optional[int] = None) -> Optional[SlotOffer]:
+        """Best-fitting table at the first start slot between ``earliest`` and ``latest``."""
+        slots = slots or self.default_slots
+        with self._lock:
+            grid = self._grid(location, day, self.clock())
+            return self._search(location, grid.occupied, party_size, earliest, slots, latest)
+
+    def is_available(self, location: Text, day: Text, party_size: int, start_slot: int,
+                     slots: Optional[int] = None) -> bool:
+        return self.find_slot(location, day, party_size, start_slot, slots, latest=start_slot) is not None
+
+    def hold(self, location: Text, day: Text, party_size: int, start_slot: int,
+             slots: Optional[int] = None, sender_id: Optional[Text] = None, attempts: int = 3) -> Booking:
+        """Reserve a table at exactly ``start_slot`` for ``hold_ttl`` seconds."""
+        slots = slots or self.default_slots
+        with self._lock:
+            for _ in range(attempts):
+                now = self.clock()
+                grid = self._grid(location, day, now)
+                offer = self._search(location, grid.occupied, party_size, start_slot, slots, latest=start_slot)
+                if offer is None:
+                    break
+                booking = Booking(uuid.uuid4().hex, location, day, offer.table.table_id, start_slot, slots,
+                                  party_size, "held", now + self.hold_ttl, sender_id)
+                if self.store.insert_if_free(booking, now):
+                    grid.occupied[self._rows[location][booking.table_id], start_slot:start_slot + slots] = True
+                    grid.next_expiry = min(grid.next_expiry, booking.expires_at)
+                    return booking
+                # Another worker took the table first; reload the day and try the next one
+                self._grids.pop((location, day), None)
+        raise SlotUnavailableError(f"No table for {party_size} at {self.time_for(start_slot)} on {day}")
+
+    def confirm(self, booking_id: Text) -> Booking:
+        booking = self.store.confirm(booking_id, self.clock())
+        if booking is None:
+            raise HoldExpiredError(f"Hold {booking_id} has expired or does not exist")
+        return booking
+
+    def release(self, booking_id: Text) -> Optional[Booking]:
+        booking = self.store.release(booking_id)
+        if booking is not None:
+            with self._lock:
+                grid = self._grids.get((booking.location, booking.day))
+                if grid is not None:
+                    row = self._rows[booking.location][booking.table_id]
+                    grid.occupied[row, booking.start_slot:booking.start_slot + booking.slots] = False
+        return booking
+
+
+_engine: Optional[ReservationEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_reservation_engine() -> ReservationEngine:
+    """Process-wide engine over BRICK_FLOOR_PLAN_PATH.
+
+    Bookings go to the SQLite file in BRICK_RESERVATION_DB when it is set, so
+    every worker on the host shares them; otherwise they are kept in memory.
+    """
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                path = os.getenv("BRICK_FLOOR_PLAN_PATH", DEFAULT_FLOOR_PLAN_PATH)
+                db_path = os.getenv("BRICK_RESERVATION_DB")
+                store = SQLiteReservationStore(db_path) if db_path else MemoryReservationStore()
+                _engine = ReservationEngine.from_file(path, store)
+                logger.info(f"Loaded floor plan for {len(_engine.tables)} locations from {path}")
+    return _engine
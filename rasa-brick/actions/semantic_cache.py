@@ -0,0 +1,222 @@
+from typing import Dict, List, NamedTuple, Optional, Text
+import functools
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+
+@functools.lru_cache(maxsize=65536)
+def _bucket(gram: Text, n_features: int) -> int:
+    digest = hashlib.blake2b(gram.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little") % n_features
+
+
+class CharNgramVectorizer:
+    """Hashed character n-grams (within word boundaries), L2-normalized.
+
+    Uses scikit-learn's HashingVectorizer when it is installed and an
+    equivalent NumPy implementation otherwise; vectors from the two are not
+    interchangeable, so one process sticks to whichever it started with.
+    """
+
+    def __init__(self, n_features: int = 1024, ngram_range: tuple = (3, 5)) -> None:
+        self.n_features = n_features
+        self.ngram_range = ngram_range
+        try:
+            from sklearn.feature_extraction.text import HashingVectorizer
+        except ImportError:
+            self._sklearn = None
+        else:
+            self._sklearn = HashingVectorizer(analyzer="char_wb", ngram_range=ngram_range, n_features=n_features,
+                                              alternate_sign=False, norm="l2", dtype=np.float32)
+
+    @property
+    def backend(self) -> Text:
+        return "sklearn" if self._sklearn is not None else "numpy"
+
+    def transform(self, text: Text) -> np.ndarray:
+        text = _NON_WORD.sub(" ", text.lower()).strip()
+        if self._sklearn is not None:
+            return self._sklearn.transform([text]).toarray()[0]
+        low, high = self.ngram_range
+        buckets = []
+        for word in text.split():
+            padded = f" {word} "
+            for n in range(low, high + 1):
+                buckets += [_bucket(padded[i:i + n], self.n_features) for i in range(max(len(padded) - n + 1, 1))]
+        vector = np.bincount(buckets, minlength=self.n_features).astype(np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+
+class SemanticHit(NamedTuple):
+    query: Text
+    answer: Text
+    similarity: float
+
+
+class SemanticCache:
+    """Past fallback answers, looked up by the similarity of the new query.
+
+    Queries are indexed with random-hyperplane LSH: each of ``n_tables``
+    tables buckets a vector by the signs of its projections on ``n_bits``
+    hyperplanes, so paraphrases tend to share a bucket in at least one
+    table. Candidates from the query's buckets (and the buckets one bit
+    away) are scored by exact cosine similarity. Entries are added one at a
+    time as answers arrive; once ``capacity`` is reached the oldest entry's
+    row is reused. Every entry belongs to a tenant and is only returned to
+    lookups for that tenant; expired entries are skipped before ranking.
+    """
+
+    def __init__(self, vectorizer: Optional[CharNgramVectorizer] = None, capacity: int = 5000,
+                 threshold: float = 0.85, ttl: float = 86400.0, n_tables: int = 8, n_bits: int = 12,
+                 seed: int = 0) -> None:
+        self.vectorizer = vectorizer or CharNgramVectorizer()
+        self.capacity = capacity
+        self.threshold = threshold
+        self.ttl = ttl
+        rng = np.random.default_rng(seed)
+        self._planes = rng.standard_normal((n_tables, n_bits, self.vectorizer.n_features)).astype(np.float32)
+        self._powers = 1 << np.arange(n_bits, dtype=np.int64)
+        self._flips = np.concatenate([[0], self._powers])
+        self._lock = threading.Lock()
+        self._vectors = np.zeros((min(capacity, 64), self.vectorizer.n_features), dtype=np.float32)
+        self._keys = np.zeros((min(capacity, 64), n_tables), dtype=np.int64)
+        self._queries: List[Text] = []
+        self._answers: List[Text] = []
+        self._tenants: List[Text] = []
+        self._added: List[float] = []
+        self._tables: List[Dict[int, List[int]]] = [{} for _ in range(n_tables)]
+        self._next_row = 0
+        self.stats = {"lookups": 0, "hits": 0, "inserts": 0, "llm_ms": 0.0, "llm_calls": 0, "saved_ms": 0.0}
+
+    def __len__(self) -> int:
+        return len(self._queries)
+
+    def _signatures(self, vector: np.ndarray) -> np.ndarray:
+        return ((self._planes @ vector) > 0).astype(np.int64) @ self._powers
+
+    def lookup(self, query: Text, tenant: Text = "") -> Optional[SemanticHit]:
+        """Closest unexpired answer for ``tenant`` at or above the similarity threshold."""
+        start = time.perf_counter()
+        vector = self.vectorizer.transform(query)
+        keys = self._signatures(vector)
+        now = time.time()
+        with self._lock:
+            self.stats["lookups"] += 1
+            candidates = set()
+            for table, key in zip(self._tables, keys):
+                for flip in self._flips:
+                    candidates.update(table.get(int(key ^ flip), ()))
+            # Only this tenant's live entries compete, so an expired best match cannot hide a valid one
+            live = [row for row in candidates if self._tenants[row] == tenant and now - self._added[row] <= self.ttl]
+            if not live:
+                return None
+            rows = np.array(live, dtype=np.intp)
+            scores = self._vectors[rows] @ vector
+            best = int(np.argmax(scores))
+            row, similarity = int(rows[best]), float(scores[best])
+            if similarity < self.threshold:
+                return None
+            self.stats["hits"] += 1
+            if self.stats["llm_calls"]:
+                average_llm_ms = self.stats["llm_ms"] / self.stats["llm_calls"]
+                self.stats["saved_ms"] += average_llm_ms - (time.perf_counter() - start) * 1000.0
+            return SemanticHit(self._queries[row], self._answers[row], similarity)
+
+    def add(self, query: Text, answer: Text, tenant: Text = "") -> None:
+        vector = self.vectorizer.transform(query)
+        if not vector.any():
+            return
+        keys = self._signatures(vector)
+        with self._lock:
+            row = self._next_row
+            if row < len(self._queries):
+                # Reusing the oldest row: unlink it from its buckets first
+                for table, key in zip(self._tables, self._keys[row]):
+                    bucket = table.get(int(key))
+                    if bucket is not None:
+                        bucket.remove(row)
+                        if not bucket:
+                            del table[int(key)]
+                self._queries[row], self._answers[row], self._added[row] = query, answer, time.time()
+                self._tenants[row] = tenant
+            else:
+                if row >= len(self._vectors):
+                    size = min(len(self._vectors) * 2, self.capacity)
+                    self._vectors = np.resize(self._vectors, (size, self._vectors.shape[1]))
+                    self._keys = np.resize(self._keys, (size, self._keys.shape[1]))
+                self._queries.append(query)
+                self._answers.append(answer)
+                self._tenants.append(tenant)
+                self._added.append(time.time())
+            self._vectors[row] = vector
+            self._keys[row] = keys
+            for table, key in zip(self._tables, keys):
+                table.setdefault(int(key), []).append(row)
+            self._next_row = (row + 1) % self.capacity
+            self.stats["inserts"] += 1
+
+    def record_upstream(self, llm_ms: float) -> None:
+        """Account an LLM call the cache could not answer; hits are credited with the running average."""
+        with self._lock:
+            self.stats["llm_ms"] += llm_ms
+            self.stats["llm_calls"] += 1
+
+    @property
+    def deflection_rate(self) -> float:
+        return self.stats["hits"] / self.stats["lookups"] if self.stats["lookups"] else 0.0
+
+    def load(self, path: Text) -> int:
+        """Index ``{"query", "answer"}`` lines (with an optional ``"tenant"``), e.g. a log of answered fallbacks."""
+        count = 0
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self.add(entry["query"], entry["answer"], entry.get("tenant", ""))
+                    count += 1
+        return count
+
+
+def cacheable(query: Text, min_words: int = 3) -> bool:
+    """Short follow-ups ("and that one?") depend on the conversation, so they always go upstream."""
+    return len(query.split()) >= min_words
+
+
+_cache: Optional[SemanticCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_semantic_cache() -> Optional[SemanticCache]:
+    """Process-wide semantic cache, or None when BRICK_SEMANTIC_CACHE=0.
+
+    BRICK_SEMANTIC_CACHE_PATH optionally seeds it with previously answered queries.
+    """
+    global _cache
+    if os.getenv("BRICK_SEMANTIC_CACHE", "1") == "0":
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                cache = SemanticCache(
+                    capacity=int(os.getenv("BRICK_SEMANTIC_CACHE_SIZE", "5000")),
+                    threshold=float(os.getenv("BRICK_SEMANTIC_CACHE_THRESHOLD", "0.85")),
+                    ttl=float(os.getenv("BRICK_SEMANTIC_CACHE_TTL", "86400")),
+                )
+                path = os.getenv("BRICK_SEMANTIC_CACHE_PATH")
+                if path and os.path.exists(path):
+                    logger.info(f"Seeded semantic cache with {cache.load(path)} answers from {path}")
+                logger.info(f"Semantic cache using {cache.vectorizer.backend} vectorizer")
+                _cache = cache
+    return _cache
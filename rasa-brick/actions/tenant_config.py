@@ -0,0 +1,343 @@
+from typing import Any, Callable, Dict, Mapping, NamedTuple, Optional, Text, Tuple
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+import datetime
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from actions.catalog import _freeze
+from actions.pricing_engine import WEEKDAYS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TENANT_DEFAULTS_PATH = os.path.join(os.path.dirname(__file__), "data", "tenant_defaults.json")
+DEFAULT_TENANT_DB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "brick_tenants.db")
+DEFAULT_TENANT = os.getenv("BRICK_DEFAULT_TENANT", "default")
+# Settings key holding the user that set the tenant up; never sent to clients
+OWNER_KEY = "setup_owner"
+
+_NON_SLUG = re.compile(r"[^a-z0-9]+")
+
+
+def tenant_id_for(business_name: Text) -> Text:
+    return _NON_SLUG.sub("-", business_name.lower()).strip("-") or DEFAULT_TENANT
+
+
+def _thaw(value: Any) -> Any:
+    if isinstance(value, Mapping):
+        return {key: _thaw(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [_thaw(item) for item in value]
+    return value
+
+
+def merge_settings(base: Mapping[Text, Any], changes: Mapping[Text, Any]) -> Dict[Text, Any]:
+    """Deep-merge ``changes`` over ``base``; nested mappings are merged, anything else replaced."""
+    merged = _thaw(base)
+    for key, value in changes.items():
+        if isinstance(value, Mapping) and isinstance(merged.get(key), dict):
+            merged[key] = merge_settings(merged[key], value)
+        else:
+            merged[key] = _thaw(value)
+    return merged
+
+
+def _minutes(clock_time: Text) -> int:
+    hours, minutes = clock_time.split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+class TenantConfig(NamedTuple):
+    tenant_id: Text
+    version: int
+    etag: Text
+    settings: Mapping[Text, Any]
+
+    def settings_dict(self) -> Dict[Text, Any]:
+        settings = _thaw(self.settings)
+        settings.pop(OWNER_KEY, None)
+        return settings
+
+    def owned_by(self, owner: Text) -> bool:
+        return self.settings.get(OWNER_KEY) == owner
+
+    def hours(self, weekday: int) -> Optional[Tuple[int, int]]:
+        day = self.settings.get("operating_hours", {}).get(WEEKDAYS[weekday])
+        if not day or day.get("closed"):
+            return None
+        return _minutes(day["open"]), _minutes(day["close"])
+
+    def is_open(self, when: datetime.datetime) -> bool:
+        hours = self.hours(when.weekday())
+        if hours is None:
+            return False
+        opens, closes = hours
+        minute = when.hour * 60 + when.minute
+        # A close at or before the open time runs past midnight
+        return opens <= minute < closes if opens < closes else minute >= opens or minute < closes
+
+    def next_opening(self, when: datetime.datetime) -> Optional[datetime.datetime]:
+        midnight = when.replace(hour=0, minute=0, second=0, microsecond=0)
+        for offset in range(8):
+            day = midnight + datetime.timedelta(days=offset)
+            hours = self.hours(day.weekday())
+            if hours is not None:
+                opening = day + datetime.timedelta(minutes=hours[0])
+                if opening > when:
+                    return opening
+        return None
+
+
+def _etag(settings_json: Text) -> Text:
+    return hashlib.sha1(settings_json.encode()).hexdigest()[:16]
+
+
+def _encode(settings: Mapping[Text, Any]) -> Text:
+    return json.dumps(_thaw(settings), sort_keys=True, separators=(",", ":"))
+
+
+class VersionConflictError(RuntimeError):
+    pass
+
+
+class TenantOwnershipError(RuntimeError):
+    pass
+
+
+class TenantBackend(ABC):
+    """Durable tenant settings with compare-and-set writes on a version counter."""
+
+    @abstractmethod
+    def load(self, tenant_id: Text) -> Optional[Tuple[int, Text]]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def store(self, tenant_id: Text, settings_json: Text, expected_version: int) -> bool:
+        """Write version ``expected_version + 1`` if the stored version is still ``expected_version`` (0 = absent)."""
+        raise NotImplementedError
+
+
+class MemoryTenantBackend(TenantBackend):
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._rows: Dict[Text, Tuple[int, Text]] = {}
+
+    def load(self, tenant_id: Text) -> Optional[Tuple[int, Text]]:
+        return self._rows.get(tenant_id)
+
+    def store(self, tenant_id: Text, settings_json: Text, expected_version: int) -> bool:
+        with self._lock:
+            current = self._rows.get(tenant_id, (0, ""))[0]
+            if current != expected_version:
+                return False
+            self._rows[tenant_id] = (current + 1, settings_json)
+            return True
+
+
+class SQLiteTenantBackend(TenantBackend):
+    def __init__(self, path: Text) -> None:
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=10.0)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS brick_tenants ("
+            "tenant_id TEXT PRIMARY KEY, version INTEGER NOT NULL, settings TEXT NOT NULL, updated_at REAL)"
+        )
+
+    def load(self, tenant_id: Text) -> Optional[Tuple[int, Text]]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT version, settings FROM brick_tenants WHERE tenant_id = ?", (tenant_id,)
+            ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def store(self, tenant_id: Text, settings_json: Text, expected_version: int) -> bool:
+        with self._lock:
+            if expected_version == 0:
+                cursor = self._connection.execute(
+                    "INSERT OR IGNORE INTO brick_tenants VALUES (?, 1, ?, ?)", (tenant_id, settings_json, time.time())
+                )
+            else:
+                cursor = self._connection.execute(
+                    "UPDATE brick_tenants SET version = version + 1, settings = ?, updated_at = ? "
+                    "WHERE tenant_id = ? AND version = ?",
+                    (settings_json, time.time(), tenant_id, expected_version),
+                )
+        return cursor.rowcount == 1
+
+
+REDIS_COMPARE_AND_SET = """
+local version = tonumber(redis.call('HGET', KEYS[1], 'version') or '0')
+if version ~= tonumber(ARGV[1]) then return 0 end
+redis.call('HSET', KEYS[1], 'version', version + 1, 'settings', ARGV[2])
+return 1
+"""
+
+
+class RedisTenantBackend(TenantBackend):
+    """One hash per tenant; writes go through a Lua compare-and-set so they are atomic."""
+
+    def __init__(self, url: Text, prefix: Text = "brick:tenant:") -> None:
+        import redis
+
+        self._client = redis.Redis.from_url(url)
+        self._prefix = prefix
+        self._compare_and_set = self._client.register_script(REDIS_COMPARE_AND_SET)
+
+    def load(self, tenant_id: Text) -> Optional[Tuple[int, Text]]:
+        version, settings = self._client.hmget(self._prefix + tenant_id, "version", "settings")
+        return (int(version), settings.decode()) if version else None
+
+    def store(self, tenant_id: Text, settings_json: Text, expected_version: int) -> bool:
+        return bool(self._compare_and_set(keys=[self._prefix + tenant_id], args=[expected_version, settings_json]))
+
+
+class TenantConfigStore:
+    """Read-through LRU of tenant configs over a shared backend.
+
+    Entries are trusted for ``ttl`` seconds, so writes from other workers
+    show up within that window; this process's own writes are visible at
+    once. Tenants that were never configured get the defaults at version 0.
+    """
+
+    def __init__(self, backend: TenantBackend, defaults: Mapping[Text, Any], max_size: int = 1024,
+                 ttl: float = 30.0, clock: Callable[[], float] = time.monotonic) -> None:
+        self.backend = backend
+        self.defaults = _freeze(_thaw(defaults))
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Text, Tuple[TenantConfig, float]]" = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0, "writes": 0, "conflicts": 0}
+
+    def _remember(self, config: TenantConfig) -> TenantConfig:
+        with self._lock:
+            self._entries[config.tenant_id] = (config, self.clock() + self.ttl)
+            self._entries.move_to_end(config.tenant_id)
+            if len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return config
+
+    def _fetch(self, tenant_id: Text) -> TenantConfig:
+        row = self.backend.load(tenant_id)
+        if row is None:
+            settings_json = _encode(self.defaults)
+            return TenantConfig(tenant_id, 0, _etag(settings_json), self.defaults)
+        version, settings_json = row
+        return TenantConfig(tenant_id, version, _etag(settings_json), _freeze(json.loads(settings_json)))
+
+    def get(self, tenant_id: Text) -> TenantConfig:
+        with self._lock:
+            entry = self._entries.get(tenant_id)
+            if entry is not None and self.clock() < entry[1]:
+                self._entries.move_to_end(tenant_id)
+                self.stats["hits"] += 1
+                return entry[0]
+            self.stats["misses"] += 1
+        return self._remember(self._fetch(tenant_id))
+
+    def update(self, tenant_id: Text, changes: Mapping[Text, Any], expected_version: Optional[int] = None,
+               attempts: int = 3, owner: Optional[Text] = None) -> TenantConfig:
+        """Merge ``changes`` into the tenant's settings and bump the version.
+
+        With ``expected_version`` the write fails with VersionConflictError
+        if someone else updated the tenant first; without it, concurrent
+        writers are retried against the latest stored version.
+
+        Chat setup passes ``owner``: the first write claims the tenant for
+        that owner and later ones fail with TenantOwnershipError unless they
+        come from the same owner. Tenants stored without an owner and the
+        default tenant can only be changed without one (by the dashboard).
+        """
+        for _ in range(attempts):
+            current = self._fetch(tenant_id)
+            if expected_version is not None and current.version != expected_version:
+                break
+            if owner is not None:
+                if tenant_id == DEFAULT_TENANT or (current.version and not current.owned_by(owner)):
+                    raise TenantOwnershipError(f"Tenant {tenant_id} is set up by someone else")
+                if not current.version:
+                    changes = {**changes, OWNER_KEY: owner}
+            settings_json = _encode(merge_settings(current.settings, changes))
+            if current.version and _etag(settings_json) == current.etag:
+                # Nothing changed; keep the version (and every client's etag) as is
+                return self._remember(current)
+            if self.backend.store(tenant_id, settings_json, current.version):
+                self.stats["writes"] += 1
+                return self._remember(TenantConfig(
+                    tenant_id, current.version + 1, _etag(settings_json), _freeze(json.loads(settings_json))
+                ))
+            self.stats["conflicts"] += 1
+            if expected_version is not None:
+                break
+        raise VersionConflictError(f"Tenant {tenant_id} was modified concurrently")
+
+    def invalidate(self, tenant_id: Text) -> None:
+        with self._lock:
+            self._entries.pop(tenant_id, None)
+
+
+def tenant_for_tracker(tracker: Any) -> Text:
+    """Tenant of a conversation: the tenant_id slot, else the business name, else BRICK_DEFAULT_TENANT."""
+    tenant_id = tracker.get_slot("tenant_id")
+    if tenant_id:
+        return tenant_id
+    business_name = tracker.get_slot("business_name")
+    return tenant_id_for(business_name) if business_name else DEFAULT_TENANT
+
+
+def owner_for_tracker(tracker: Any) -> Optional[Text]:
+    """Stable id of the user behind a conversation, for tenant ownership.
+
+    Read from the latest message's metadata key named by
+    BRICK_TENANT_OWNER_METADATA, which an authenticating channel fills in.
+    The sender id is not used: it changes with every chat session. None
+    when the setting is off or the message carries no id.
+    """
+    key = os.getenv("BRICK_TENANT_OWNER_METADATA")
+    if not key:
+        return None
+    owner = ((tracker.latest_message or {}).get("metadata") or {}).get(key)
+    return str(owner) if owner else None
+
+
+def backend_from_env() -> TenantBackend:
+    """Pick a backend from BRICK_TENANT_STORE (redis, sqlite or memory)."""
+    kind = os.getenv("BRICK_TENANT_STORE") or ("redis" if os.getenv("REDIS_URL") else "sqlite")
+    if kind == "redis":
+        return RedisTenantBackend(os.environ["REDIS_URL"])
+    if kind == "sqlite":
+        # Absolute, so every worker opens the same file whatever its working directory
+        return SQLiteTenantBackend(os.path.abspath(os.getenv("BRICK_TENANT_DB", DEFAULT_TENANT_DB_PATH)))
+    if kind == "memory":
+        return MemoryTenantBackend()
+    raise ValueError(f"Unknown BRICK_TENANT_STORE '{kind}'")
+
+
+_store: Optional[TenantConfigStore] = None
+_store_lock = threading.Lock()
+
+
+def get_tenant_store() -> TenantConfigStore:
+    """Process-wide tenant config store; see backend_from_env for the backing store."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                with open(os.getenv("BRICK_TENANT_DEFAULTS_PATH", DEFAULT_TENANT_DEFAULTS_PATH), encoding="utf-8") as f:
+                    defaults = json.load(f)
+                backend = backend_from_env()
+                _store = TenantConfigStore(
+                    backend,
+                    defaults,
+                    max_size=int(os.getenv("BRICK_TENANT_CACHE_SIZE", "1024")),
+                    ttl=float(os.getenv("BRICK_TENANT_CACHE_TTL", "30")),
+                )
+                logger.info(f"Tenant config store using {type(backend).__name__}")
+    return _store
@@ -0,0 +1,201 @@
+from typing import Any, Callable, NamedTuple, Optional, Text, Tuple
+import datetime
+import logging
+import os
+import threading
+
+from actions.demand_forecast import DemandForecast
+
+logger = logging.getLogger(__name__)
+
+Clock = Callable[[], datetime.datetime]
+
+
+class TimeSnapshot(NamedTuple):
+    """Everything that only changes when the clock crosses a bucket boundary."""
+    start: datetime.datetime
+    expires: datetime.datetime
+    version: Tuple[Any, ...]
+    weekday: int
+    hour: int
+    period: Text
+    service: Text
+    day_factor: float
+    peak_factor: float
+    forecast: DemandForecast
+    prep_text: Text
+    unavailable: Tuple[Text, ...]
+    recommendations_text: Text
+
+    def covers(self, now: datetime.datetime) -> bool:
+        return self.start <= now < self.expires
+
+
+def bucket_start(now: datetime.datetime, minutes: int) -> datetime.datetime:
+    minute = now.hour * 60 + now.minute
+    minute -= minute % minutes
+    return now.replace(hour=minute // 60, minute=minute % 60, second=0, microsecond=0)
+
+
+def data_version() -> Tuple[Any, ...]:
+    """Changes whenever the pricing rules, catalog, menu, stock levels or forecast history do."""
+    from actions.catalog import get_catalog
+    from actions.demand_forecast import get_demand_forecaster
+    from actions.inventory_store import get_inventory_store
+    from actions.menu_index import get_menu_index
+    from actions.pricing_engine import get_pricing_engine
+
+    return (id(get_pricing_engine()), get_catalog().version, id(get_menu_index()),
+            get_inventory_store().version, get_demand_forecaster().records_ingested)
+
+
+def build_snapshot(start: datetime.datetime, expires: datetime.datetime, version: Tuple[Any, ...]) -> TimeSnapshot:
+    from actions.catalog import get_catalog, time_of_day
+    from actions.demand_forecast import get_demand_forecaster, service_for_hour
+    from actions.inventory_store import get_inventory_store
+    from actions.menu_index import get_menu_index
+    from actions.pricing_engine import get_pricing_engine
+
+    period = time_of_day(start.hour)
+    service = service_for_hour(start.hour)
+    day_factor, peak_factor = get_pricing_engine().factors(start)
+
+    # Today's forecast and the prep list rendered from it
+    forecast = get_demand_forecaster().forecast(start.weekday(), service)
+    weather_factor = 1.0  # Mock weather adjustment
+    event_factor = 1.0    # Mock event adjustment
+    adjustment = weather_factor * event_factor
+    prep_text = "Based on historical data and current factors, here are today's prep recommendations:\n\n"
+    for ingredient, (amount, unit) in forecast.prep.items():
+        prep_text += f"• {ingredient.title()}: {int(amount * adjustment)}{unit}\n"
+    prep_text += f"\nExpected covers: {int(forecast.covers * adjustment)}"
+
+    # The recommendations a guest with an empty cart and no dietary needs gets
+    catalog = get_catalog()
+    unavailable = tuple(get_inventory_store().below_threshold())
+    picks = get_menu_index().recommend(period, unavailable=unavailable)
+    if picks:
+        recommendations_text = catalog.dishes_text(tuple(pick.text for pick in picks))
+    else:
+        recommendations_text = catalog.recommendations_text(period)
+
+    return TimeSnapshot(start, expires, version, start.weekday(), start.hour, period, service,
+                        day_factor, peak_factor, forecast, prep_text, unavailable, recommendations_text)
+
+
+class TimeBucketScheduler:
+    """Serves an immutable snapshot of the time-dependent outputs for the current bucket.
+
+    The snapshot is rebuilt when the clock leaves its bucket or ``version``
+    reports a change in the underlying data; otherwise ``current`` is a
+    clock read, a version check and two comparisons. With ``prefetch``
+    set, a background thread builds each next bucket's snapshot that many
+    seconds ahead, so no request pays for the rebuild at the boundary.
+    Buckets must divide an hour, since the pricing and service tables
+    change on the hour.
+    """
+
+    def __init__(self, bucket_minutes: int = 60, clock: Clock = datetime.datetime.now,
+                 build: Callable[[datetime.datetime, datetime.datetime, Tuple[Any, ...]], TimeSnapshot] = build_snapshot,
+                 version: Callable[[], Tuple[Any, ...]] = data_version,
+                 prefetch: Optional[float] = None) -> None:
+        if bucket_minutes <= 0 or 60 % bucket_minutes:
+            raise ValueError("bucket_minutes must divide 60")
+        self.bucket_minutes = bucket_minutes
+        self.clock = clock
+        self.build = build
+        self.version = version
+        self.prefetch = prefetch
+        self._lock = threading.Lock()
+        self._snapshot: Optional[TimeSnapshot] = None
+        self._next: Optional[TimeSnapshot] = None
+        self._refresher_pid: Optional[int] = None
+        self._stop = threading.Event()
+        self.stats = {"hits": 0, "builds": 0, "prefetched": 0}
+
+    def _build(self, now: datetime.datetime, version: Tuple[Any, ...]) -> TimeSnapshot:
+        start = bucket_start(now, self.bucket_minutes)
+        snapshot = self.build(start, start + datetime.timedelta(minutes=self.bucket_minutes), version)
+        self.stats["builds"] += 1
+        return snapshot
+
+    def current(self, now: Optional[datetime.datetime] = None) -> TimeSnapshot:
+        if self.prefetch is not None and self._refresher_pid != os.getpid():
+            self._start_refresher()
+        now = now or self.clock()
+        version = self.version()
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.covers(now) and snapshot.version == version:
+            self.stats["hits"] += 1
+            return snapshot
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is None or not snapshot.covers(now) or snapshot.version != version:
+                upcoming = self._next
+                if upcoming is not None and upcoming.covers(now) and upcoming.version == version:
+                    snapshot = upcoming
+                    self.stats["prefetched"] += 1
+                else:
+                    snapshot = self._build(now, version)
+                # A single reference swap; readers see either the old snapshot or the new one
+                self._snapshot = snapshot
+                self._next = None
+            return snapshot
+
+    def invalidate(self) -> None:
+        """Drop the snapshot, e.g. after a change ``version`` cannot see."""
+        with self._lock:
+            self._snapshot = self._next = None
+
+    def _start_refresher(self) -> None:
+        with self._lock:
+            # Threads do not survive fork(), so each worker process starts its own
+            if self._refresher_pid == os.getpid():
+                return
+            self._refresher_pid = os.getpid()
+        threading.Thread(target=self._refresh_loop, name="time-snapshot", daemon=True).start()
+
+    def _refresh_loop(self) -> None:
+        while not self._stop.is_set():
+            # The newest snapshot, whether or not a request has swapped it in yet
+            latest = self._next or self._snapshot
+            if latest is None:
+                self._stop.wait(1.0)
+                continue
+            wait = (latest.expires - self.clock()).total_seconds() - (self.prefetch or 0.0)
+            if wait > 0:
+                self._stop.wait(min(wait, 60.0))
+                continue
+            try:
+                upcoming = self._build(max(latest.expires, self.clock()), self.version())
+            except Exception as e:
+                logger.warning(f"Prefetching the next time snapshot failed: {e}")
+                self._stop.wait(1.0)
+                continue
+            with self._lock:
+                self._next = upcoming
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+_scheduler: Optional[TimeBucketScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_time_scheduler() -> TimeBucketScheduler:
+    """Process-wide scheduler; BRICK_TIME_BUCKET_MINUTES sets the bucket, BRICK_TIME_PREFETCH the lead in seconds."""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                prefetch = os.getenv("BRICK_TIME_PREFETCH")
+                _scheduler = TimeBucketScheduler(
+                    bucket_minutes=int(os.getenv("BRICK_TIME_BUCKET_MINUTES", "60")),
+                    prefetch=float(prefetch) if prefetch else None,
+                )
+    return _scheduler
+
+
+def get_time_snapshot(now: Optional[datetime.datetime] = None) -> TimeSnapshot:
+    return get_time_scheduler().current(now)
@@ -0,0 +1,128 @@
+from typing import Callable, Dict, Iterable, Optional, Text
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def _catalog() -> None:
+    from actions.catalog import get_catalog
+
+    get_catalog()
+
+
+def _inventory() -> None:
+    from actions.inventory_store import get_inventory_store
+
+    get_inventory_store()
+
+
+def _pricing() -> None:
+    from actions.pricing_engine import get_pricing_engine
+
+    get_pricing_engine().quote(None)
+
+
+def _forecast() -> None:
+    from actions.demand_forecast import get_demand_forecaster
+
+    get_demand_forecaster()
+
+
+def _menu() -> None:
+    from actions.menu_index import get_menu_index
+
+    # One ranking pass faults the memory-mapped embeddings into the page cache
+    get_menu_index().recommend("evening")
+
+
+def _entities() -> None:
+    from actions.entities import get_entity_normalizer
+
+    get_entity_normalizer()
+
+
+def _reservations() -> None:
+    from actions.reservations import get_reservation_engine
+
+    get_reservation_engine()
+
+
+def _tenants() -> None:
+    from actions.tenant_config import DEFAULT_TENANT, get_tenant_store
+
+    get_tenant_store().get(DEFAULT_TENANT)
+
+
+def _time() -> None:
+    from actions.time_snapshot import get_time_snapshot
+
+    get_time_snapshot()
+
+
+def _feedback() -> None:
+    from actions.feedback_scorer import scorer
+
+    scorer.score("warm up")
+
+
+def _semantic_cache() -> None:
+    from actions.semantic_cache import get_semantic_cache
+
+    # Draws the LSH hyperplanes and indexes BRICK_SEMANTIC_CACHE_PATH, if set
+    get_semantic_cache()
+
+
+def _llm() -> None:
+    from actions.llm_client import get_llm_client
+
+    # Builds the backend, which imports openai and opens its connection pool
+    get_llm_client()
+
+
+STEPS: Dict[Text, Callable[[], None]] = {
+    "catalog": _catalog,
+    "inventory": _inventory,
+    "pricing": _pricing,
+    "forecast": _forecast,
+    "menu": _menu,
+    "entities": _entities,
+    "reservations": _reservations,
+    "tenants": _tenants,
+    "time": _time,
+    "feedback": _feedback,
+    "semantic_cache": _semantic_cache,
+    "llm": _llm,
+}
+
+
+def warm_up(steps: Optional[Iterable[Text]] = None) -> Dict[Text, float]:
+    """Load shared caches and clients ahead of the first request.
+
+    Returns seconds per step. A failing step is logged and skipped so a
+    missing credential cannot keep the server from starting.
+    """
+    timings: Dict[Text, float] = {}
+    for name in steps or STEPS:
+        step = STEPS.get(name)
+        if step is None:
+            logger.warning(f"Unknown warm-up step {name}")
+            continue
+        start = time.perf_counter()
+        try:
+            step()
+        except Exception as e:
+            logger.warning(f"Warm-up step {name} failed: {e}")
+            continue
+        timings[name] = time.perf_counter() - start
+    logger.info("Warm-up finished: " + ", ".join(f"{name} {seconds * 1000:.0f}ms" for name, seconds in timings.items()))
+    return timings
+
+
+# rasa-sdk imports every module in the package before it starts serving, so
+# warming up here delays /health until the caches are ready.
+# BRICK_WARMUP=1 runs every step; a comma-separated list runs only those.
+if os.getenv("BRICK_WARMUP", "0") not in ("", "0"):
+    _setting = os.environ["BRICK_WARMUP"]
+    warm_up(None if _setting == "1" else [name.strip() for name in _setting.split(",")])
@@ -0,0 +1,97 @@
+"""Staff stock and price queries: one round trip per item vs. one batched turn.
+
+Before batching, "check salmon, ribeye and cream" only answered for the
+first item, so staff asked for each item in turn: every item cost a user
+message, a webhook call and the bot reply in the tracker. This replays
+random multi-item queries both ways through the rasa-sdk executor, plus
+the stock + price report for each inventory category against asking for
+stock and price item by item. Reports webhook calls, tracker events and
+response bytes per query, and the action time.
+
+Run from the rasa-brick directory:
+
+    python -m benchmarks.bench_bulk_queries --queries 500 --max-items 5
+"""
+from typing import Any, Awaitable, Callable, Dict, List, Text
+import argparse
+import asyncio
+import random
+import time
+
+from benchmarks.harness import action_call, payload_size, tracker_state, user_event
+from benchmarks.load_test import in_process_runner
+
+ITEMS = ["salmon", "ribeye", "chicken", "cream", "butter", "cheese", "onions", "tomatoes"]
+
+
+def staff_turn(action: Text, text: Text, entities: List[Dict[Text, Any]]) -> Dict[Text, Any]:
+    return action_call(action, tracker_state("staff", [user_event(text, "", entities)]))
+
+
+def food_items(items: List[Text]) -> List[Dict[Text, Any]]:
+    return [{"entity": "food_item", "value": item} for item in items]
+
+
+async def measure(run: Callable[[Dict[Text, Any]], Awaitable[Dict[Text, Any]]],
+                  queries: List[List[Dict[Text, Any]]]) -> Dict[Text, float]:
+    calls = events = size = 0
+    elapsed = 0.0
+    for turns in queries:
+        for payload in turns:
+            start = time.perf_counter()
+            result = await run(payload)
+            elapsed += time.perf_counter() - start
+            calls += 1
+            # The user message, the action and each bot message or returned event
+            events += 2 + len(result.get("responses", [])) + len(result.get("events", []))
+            size += payload_size(result)
+    return {"calls": calls / len(queries), "events": events / len(queries),
+            "bytes": size / len(queries), "ms": elapsed * 1000 / len(queries)}
+
+
+def print_row(label: Text, stats: Dict[Text, float]) -> None:
+    print(f"{label:<24}{stats['calls']:>10.1f}{stats['events']:>10.1f}{stats['bytes']:>12.0f}{stats['ms']:>12.3f}")
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    run = in_process_runner()
+    rng = random.Random(args.seed)
+
+    per_item, batched = [], []
+    for _ in range(args.queries):
+        items = rng.sample(ITEMS, rng.randint(2, args.max_items))
+        per_item.append([staff_turn(action, f"check {item}", food_items([item]))
+                         for item in items for action in ("action_check_inventory", "action_adjust_price")])
+        batched.append([staff_turn(action, "check " + ", ".join(items), food_items(items))
+                        for action in ("action_check_inventory", "action_adjust_price")])
+
+    from actions.inventory_store import get_inventory_store
+
+    inventory = get_inventory_store()
+    by_item, by_category = [], []
+    for category in inventory.category_names():
+        names = inventory.category_columns(category).names
+        by_item.append([staff_turn(action, f"check {name}", food_items([name]))
+                        for name in names for action in ("action_check_inventory", "action_adjust_price")])
+        by_category.append([staff_turn("action_check_inventory", f"stock and prices for {category}",
+                                       [{"entity": "inventory_category", "value": category}])])
+
+    # Warm the stores and caches so neither side pays for loading them
+    await measure(run, batched[:1] + per_item[:1])
+    print(f"{'per staff query':<24}{'calls':>10}{'events':>10}{'bytes':>12}{'action ms':>12}")
+    print_row("item by item", await measure(run, per_item))
+    print_row("batched", await measure(run, batched))
+    print_row("category, item by item", await measure(run, by_item))
+    print_row("category report", await measure(run, by_category))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--max-items", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Slot and payload growth of the compact cart vs. the legacy append-only order list.
+
+Simulates sessions of many order turns over a small menu, as Rasa Core would
+replay them: each turn reads the ``ordered_items`` slot, adds one item and
+writes the slot back, and the custom payload is sent to the client.
+
+Run from the rasa-brick directory:
+
+    python -m benchmarks.bench_cart --turns 500 --sessions 20
+"""
+from typing import Any, Dict, List, Text, Tuple
+import argparse
+import json
+import random
+import time
+
+from actions.cart import Cart
+from actions.entities import parse_quantity
+
+MENU = ["steak", "ribeye", "salmon", "chicken", "risotto", "sushi", "dosa", "tacos"]
+QUANTITIES = [None, "1", "2", "two", "3", "a couple"]
+
+
+def legacy_turn(slot: List[Dict[Text, Any]], item: Text, quantity: Any) -> Tuple[List[Dict[Text, Any]], Dict[Text, Any]]:
+    # Mirrors the original ActionProcessOrder body
+    ordered_items = slot or []
+    ordered_items.append({"item": item, "quantity": quantity or 1})
+    return ordered_items, {"order_data": ordered_items, "cuisine": None, "show_customization": True}
+
+
+def cart_turn(slot: List[Text], item: Text, quantity: Any) -> Tuple[List[Text], Dict[Text, Any]]:
+    cart = Cart.decode(slot)
+    delta = cart.add(item, parse_quantity(quantity))
+    return cart.encode(), {"order_delta": delta.as_dict(), "cuisine": None, "show_customization": True}
+
+
+def run_sessions(turn, sessions: int, turns: int, seed: int) -> Dict[Text, float]:
+    rng = random.Random(seed)
+    slot_bytes = payload_bytes = final_slot = 0
+    elapsed = 0.0
+    for _ in range(sessions):
+        slot: Any = []
+        for _ in range(turns):
+            item, quantity = rng.choice(MENU), rng.choice(QUANTITIES)
+            # Round-trip through JSON like the tracker store does between turns
+            slot = json.loads(json.dumps(slot))
+            start = time.perf_counter()
+            slot, custom = turn(slot, item, quantity)
+            elapsed += time.perf_counter() - start
+            encoded = len(json.dumps(slot))
+            slot_bytes += encoded
+            payload_bytes += len(json.dumps(custom))
+        final_slot += encoded
+    calls = sessions * turns
+    return {
+        "us_per_turn": elapsed / calls * 1e6,
+        "slot_bytes_per_turn": slot_bytes / calls,
+        "payload_bytes_per_turn": payload_bytes / calls,
+        "final_slot_bytes": final_slot / sessions,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--turns", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'':<8}{'us/turn':>10}{'slot B/turn':>14}{'custom B/turn':>16}{'final slot B':>15}")
+    for label, turn in (("legacy", legacy_turn), ("cart", cart_turn)):
+        stats = run_sessions(turn, args.sessions, args.turns, args.seed)
+        print(f"{label:<8}{stats['us_per_turn']:>10.2f}{stats['slot_bytes_per_turn']:>14.0f}"
+              f"{stats['payload_bytes_per_turn']:>16.0f}{stats['final_slot_bytes']:>15.0f}")
+
+
+if __name__ == "__main__":
+    main()
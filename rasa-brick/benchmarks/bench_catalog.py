@@ -0,0 +1,100 @@
+"""Per-call time and allocation cost of catalog-rendered responses vs. the legacy dict rebuilds.
+
+Run from the rasa-brick directory:
+
+    python -m benchmarks.bench_catalog --repeat 20000
+"""
+from typing import Callable, Dict, Text
+import argparse
+import timeit
+import tracemalloc
+
+from actions.catalog import get_catalog
+
+
+def legacy_recommendations(period: Text) -> Text:
+    # Mirrors the original ActionShowRecommendations body
+    recommendations = {
+        "morning": [
+            "Our signature Eggs Benedict with house-made hollandaise",
+            "Artisanal pastry selection from our in-house bakery",
+            "Organic steel-cut oatmeal with seasonal berries"
+        ],
+        "afternoon": [
+            "Chef's tasting menu with wine pairings",
+            "House-aged prime ribeye with truffle butter",
+            "Wild-caught salmon with citrus beurre blanc"
+        ],
+        "evening": [
+            "Seven-course degustation menu",
+            "Dry-aged Tomahawk steak for two",
+            "Fresh seafood tower with champagne"
+        ]
+    }
+    response = "Allow me to present our chef's recommendations:\n\n"
+    for suggestion in recommendations[period]:
+        response += f"• {suggestion}\n"
+    response += "\nEach dish is crafted with seasonal ingredients from our local artisanal partners."
+    return response
+
+
+def legacy_wine(current_cuisine: Text) -> Text:
+    # Mirrors the original ActionSuggestWine body
+    wine_pairings = {
+        "Contemporary": {
+            "red": ["2018 Château Margaux", "2016 Opus One"],
+            "white": ["2019 Puligny-Montrachet"]
+        },
+        "Seafood": {
+            "white": ["2020 Chablis Grand Cru", "2019 Meursault"],
+            "sparkling": ["Krug Grande Cuvée"]
+        },
+        "Italian": {
+            "red": ["2015 Barolo Riserva", "2017 Brunello di Montalcino"],
+            "white": ["2020 Gavi di Gavi"]
+        }
+    }
+    if current_cuisine in wine_pairings:
+        response = "Our sommelier recommends:\n\n"
+        for wine_type, selections in wine_pairings[current_cuisine].items():
+            response += f"{wine_type.title()} Wines:\n"
+            for wine in selections:
+                response += f"• {wine}\n"
+    else:
+        response = "I'd be happy to have our sommelier suggest the perfect wine pairing for your selection."
+    return response
+
+
+def peak_bytes(fn: Callable[[], Text]) -> int:
+    fn()
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    baseline = tracemalloc.get_traced_memory()[0]
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak - baseline
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=10000)
+    args = parser.parse_args()
+
+    catalog = get_catalog()
+    cases: Dict[Text, Callable[[], Text]] = {
+        "legacy recommendations": lambda: legacy_recommendations("evening"),
+        "catalog recommendations": lambda: get_catalog().recommendations_text("evening"),
+        "legacy wine": lambda: legacy_wine("Seafood"),
+        "catalog wine": lambda: get_catalog().wine_text("Seafood"),
+    }
+    assert cases["legacy recommendations"]() == catalog.recommendations_text("evening")
+    assert cases["legacy wine"]() == catalog.wine_text("Seafood")
+
+    for label, fn in cases.items():
+        seconds = timeit.timeit(fn, number=args.repeat)
+        print(f"{label:<26} {seconds / args.repeat * 1e6:8.2f} us/call  {peak_bytes(fn):6d} peak bytes/call")
+
+
+if __name__ == "__main__":
+    main()
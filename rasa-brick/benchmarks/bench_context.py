@@ -0,0 +1,80 @@
+"""Prompt construction cost vs. conversation length for the LLM fallback.
+
+Compares filtering the whole tracker history for user/bot turns on every
+fallback with the incremental per-sender ring buffer, for conversations of
+increasing length. Also checks that both produce the same prompt.
+
+Run from the rasa-brick directory:
+
+    python -m benchmarks.bench_context --lengths 100 1000 10000 50000
+"""
+from typing import Any, Dict, List, Text
+import argparse
+import time
+
+from actions.conversation_context import ROLES, ConversationContext, estimate_tokens
+from benchmarks.harness import bot_event, user_event
+
+SYSTEM = "You are BFF (Brick For Food), an AI assistant for a fine dining restaurant."
+
+
+def conversation(events: int) -> List[Dict[Text, Any]]:
+    history: List[Dict[Text, Any]] = []
+    turn = 0
+    while len(history) < events:
+        history.append(user_event(f"guest message number {turn} about the menu", "chitchat", timestamp=turn + 0.1))
+        history.append({"event": "action", "name": "action_listen", "timestamp": turn + 0.2})
+        history.append(bot_event(f"reply {turn} from the concierge", timestamp=turn + 0.3))
+        history.append({"event": "slot", "name": "current_cuisine", "value": "Italian", "timestamp": turn + 0.4})
+        turn += 1
+    return history[:events]
+
+
+def full_scan_prompt(events: List[Dict[Text, Any]], current: Text, max_turns: int, budget: int) -> List[Dict[Text, Text]]:
+    turns = [(ROLES[e["event"]], e["text"]) for e in events if e.get("event") in ROLES and e.get("text")]
+    turns = turns[-max_turns:]
+    if turns and turns[-1] == ("user", current):
+        turns.pop()
+    used, history = estimate_tokens(SYSTEM) + estimate_tokens(current), []
+    for role, text in reversed(turns):
+        if used + estimate_tokens(text) > budget:
+            break
+        history.append({"role": role, "content": text})
+        used += estimate_tokens(text)
+    return [{"role": "system", "content": SYSTEM}, *reversed(history), {"role": "user", "content": current}]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lengths", type=int, nargs="*", default=[100, 1000, 10000, 50000])
+    parser.add_argument("--fallbacks", type=int, default=200, help="fallback calls timed per length")
+    parser.add_argument("--turns", type=int, default=10)
+    parser.add_argument("--budget", type=int, default=1024)
+    args = parser.parse_args()
+
+    print(f"{'events':>8}{'full scan us':>15}{'incremental us':>17}{'rebuilt':>9}")
+    for length in args.lengths:
+        base = conversation(length)
+        context = ConversationContext(max_turns=args.turns)
+        full_total = incremental_total = 0.0
+        for call in range(args.fallbacks):
+            # Each fallback sees the history so far plus one new exchange
+            current = f"new question {call}"
+            base.append(bot_event(f"answer {call}", timestamp=length + call + 0.1))
+            base.append(user_event(current, "nlu_fallback", timestamp=length + call + 0.2))
+
+            start = time.perf_counter()
+            expected = full_scan_prompt(base, current, args.turns, args.budget)
+            full_total += time.perf_counter() - start
+
+            start = time.perf_counter()
+            prompt = context.build_prompt("bench", base, SYSTEM, current, args.budget)
+            incremental_total += time.perf_counter() - start
+            assert prompt.messages == expected, (prompt.messages, expected)
+
+        print(f"{length:>8}{full_total / args.fallbacks * 1e6:>15.1f}"
+              f"{incremental_total / args.fallbacks * 1e6:>17.1f}{context.stats['rebuilt']:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Entity parsing per turn: every action re-parsing vs. the shared normalizer.
+
+Each simulated turn is read by ``--readers`` actions (e.g. the order action
+and the recommendations and pricing that follow it). The legacy path has
+each reader scan the entity list and parse quantities, party sizes, dates
+and lower-cased item names itself; the normalizer parses once per
+(sender, message id) and every later reader gets the cached result. Also
+reports how many misspelled menu items resolve to the intended id.
+
+Run from the rasa-brick directory:
+
+    python -m benchmarks.bench_entities --turns 20000 --readers 3
+"""
+from typing import Any, Dict, List, Text
+import argparse
+import random
+import time
+import uuid
+from datetime import date
+
+from actions.entities import get_entity_normalizer, get_menu_matcher, parse_party_size, parse_quantity, resolve_date
+
+TYPOS = {"salmn": "salmon", "ribeey": "ribeye", "risoto": "risotto", "sushii": "sushi", "tacoz": "tacos",
+         "dossa": "dosa", "chiken": "chicken", "tiramisuu": "tiramisu", "rib eye": "ribeye", "Steaks": "steak"}
+
+
+class FakeTracker:
+    def __init__(self, sender_id: Text, entities: List[Dict[Text, Any]]) -> None:
+        self.sender_id = sender_id
+        self.latest_message = {"message_id": uuid.uuid4().hex, "entities": entities}
+
+    def get_latest_entity_values(self, entity_type: Text) -> Any:
+        return (e["value"] for e in self.latest_message["entities"] if e["entity"] == entity_type)
+
+
+def legacy_read(tracker: FakeTracker) -> tuple:
+    food_item = next(tracker.get_latest_entity_values("food_item"), None)
+    quantity = parse_quantity(next(tracker.get_latest_entity_values("quantity"), None))
+    guests = parse_party_size(next(tracker.get_latest_entity_values("party_size"), None))
+    day = resolve_date(next(tracker.get_latest_entity_values("date"), None), date.today())
+    return food_item.lower() if food_item else None, quantity, guests, day
+
+
+def shared_read(tracker: FakeTracker) -> tuple:
+    entities = get_entity_normalizer().for_tracker(tracker)
+    return entities.get("food_item"), entities.get("quantity", 1), entities.get("party_size"), entities.get("date")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=20000)
+    parser.add_argument("--readers", type=int, default=3, help="actions reading each turn's entities")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    normalizer = get_entity_normalizer()
+    rng = random.Random(args.seed)
+    items = ["salmon", "ribeye", "risotto", "sushi", "tacos", *TYPOS]
+    trackers = [
+        FakeTracker(f"s{rng.randrange(500)}", [
+            {"entity": "food_item", "value": rng.choice(items)},
+            {"entity": "quantity", "value": rng.choice(["2", "two", "a couple", "3"])},
+            {"entity": "party_size", "value": rng.choice(["4", "four", "six"])},
+            {"entity": "date", "value": rng.choice(["tomorrow", "friday", "2026-01-01"])},
+        ])
+        for _ in range(args.turns)
+    ]
+
+    print(f"{'path':<18}{'us/turn':>10}")
+    for label, read in (("legacy parse", legacy_read), ("shared + memo", shared_read)):
+        start = time.perf_counter()
+        for tracker in trackers:
+            for _ in range(args.readers):
+                read(tracker)
+        print(f"{label:<18}{(time.perf_counter() - start) / len(trackers) * 1e6:>10.2f}")
+    print(f"memo hit rate {normalizer.stats['hits'] / max(1, normalizer.stats['hits'] + normalizer.stats['misses']):.1%}")
+
+    matcher = get_menu_matcher()
+    resolved = sum(matcher.match(typo) == expected for typo, expected in TYPOS.items())
+    print(f"misspelled items resolved: {resolved}/{len(TYPOS)}")
+
+
+if __name__ == "__main__":
+    main()
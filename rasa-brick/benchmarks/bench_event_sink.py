@@ -0,0 +1,49 @@
+"""Measure event sink throughput and response-path cost per backend.
+
+Run from the rasa-brick directory:
+
+    python -m benchmarks.bench_event_sink --events 200000 --policy drop_oldest --queue 5000
+"""
+from typing import Text
+import argparse
+import os
+import tempfile
+import time
+
+from actions.event_sink import EventBackend, EventSink, JsonlFileBackend, SQLiteBackend
+
+
+def run(label: Text, backend: EventBackend, args: argparse.Namespace, spill_path: Text) -> None:
+    sink = EventSink(backend, max_queue=args.queue, batch_size=args.batch,
+                     policy=args.policy, spill_path=spill_path)
+    payload = {"text": "The food was amazing", "sentiment": "positive", "score": 1, "aspects": ["food"]}
+
+    start = time.perf_counter()
+    for i in range(args.events):
+        sink.emit("feedback", payload, sender_id=f"user-{i % 1000}")
+    emitted = time.perf_counter() - start
+    sink.close(timeout=120)
+    total = time.perf_counter() - start
+
+    stats = sink.stats
+    print(f"{label:<8} emit {emitted / args.events * 1e6:6.2f} us/event  "
+          f"drained {stats['written'] / total:10,.0f} events/s  "
+          f"written={stats['written']} dropped={stats['dropped']} spilled={stats['spilled']}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=100000)
+    parser.add_argument("--queue", type=int, default=10000)
+    parser.add_argument("--batch", type=int, default=500)
+    parser.add_argument("--policy", default="drop_newest", choices=EventSink.POLICIES)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        spill = os.path.join(tmp, "spill.jsonl")
+        run("file", JsonlFileBackend(os.path.join(tmp, "events.jsonl")), args, spill)
+        run("sqlite", SQLiteBackend(os.path.join(tmp, "events.db")), args, spill)
+
+
+if __name__ == "__main__":
+    main()
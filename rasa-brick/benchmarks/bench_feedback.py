@@ -0,0 +1,73 @@
+"""Compare single-pass trie scoring against the legacy multi-scan keyword check.
+
+Run from the rasa-brick directory:
+
+    python -m benchmarks.bench_feedback --rows 200000 --processes 4
+"""
+from typing import List, Text
+import argparse
+import random
+import time
+
+from actions.feedback_scorer import ADJACENT_NEGATORS, ASPECTS, NEGATIVE_TERMS, NEGATORS, POSITIVE_TERMS, score_many, scorer
+
+SAMPLES = (
+    "The food was amazing and the service was excellent!",
+    "Honestly not bad, though the steak arrived cold.",
+    "Goodbye and thanks, see you next week",
+    "Service was slow and our waiter got the order wrong",
+    "I loved the dessert but the prices are a bit high",
+    "It took forever to get a table. Never again.",
+    "Nothing was wrong, everything was perfect",
+    "The atmosphere was lovely, music a little loud",
+)
+
+
+def legacy_sentiment(message: Text) -> Text:
+    # Mirrors the original ActionHandleFeedback keyword checks
+    positive_keywords = ['great', 'excellent', 'amazing', 'good', 'love', 'perfect']
+    negative_keywords = ['bad', 'poor', 'terrible', 'slow', 'cold', 'wrong']
+    is_positive = any(word in message.lower() for word in positive_keywords)
+    is_negative = any(word in message.lower() for word in negative_keywords)
+    if is_positive:
+        'service' in message.lower() or 'food' in message.lower()
+    return "positive" if is_positive else "negative" if is_negative else "neutral"
+
+
+def multi_scan(message: Text, vocabulary: List[Text]) -> List[bool]:
+    # The legacy approach scaled to the scorer's full vocabulary
+    return [term in message.lower() for term in vocabulary]
+
+
+def timed(label: Text, rows: int, fn) -> float:
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<30} {rows / elapsed:12,.0f} rows/s")
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--processes", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    backlog: List[Text] = [rng.choice(SAMPLES) for _ in range(args.rows)]
+
+    for text in SAMPLES:
+        print(f"{legacy_sentiment(text):>9} -> {scorer.score(text).sentiment:<9} {text}")
+    print()
+
+    vocabulary = list(POSITIVE_TERMS + NEGATIVE_TERMS + NEGATORS + ADJACENT_NEGATORS) + [w for words in ASPECTS.values() for w in words]
+    timed("legacy multi-scan (12 terms)", args.rows, lambda: [legacy_sentiment(text) for text in backlog])
+    timed(f"multi-scan ({len(vocabulary)} terms)", args.rows, lambda: [multi_scan(text, vocabulary) for text in backlog])
+    timed("trie single-pass", args.rows, lambda: [scorer.score(text) for text in backlog])
+    if args.processes > 1:
+        timed(f"score_many x{args.processes} processes", args.rows,
+              lambda: sum(1 for _ in score_many(iter(backlog), processes=args.processes)))
+
+
+if __name__ == "__main__":
+    main()
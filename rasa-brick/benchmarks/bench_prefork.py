@@ -0,0 +1,99 @@
+"""Throughput scaling of forked action workers over shared static data.
+
+Prepares the actions package in the parent the way ``python -m actions.prefork``
+does, then forks 1..N workers that each drive the executor in a tight loop
+for ``--duration`` seconds. Reports aggregate requests per second, scaling
+against one worker, and each worker's proportional (PSS) vs private memory,
+which shows how much of the parent's data stays shared.
+
+Run from the rasa-brick directory:
+
+    python -m benchmarks.bench_prefork --max-workers 4 --duration 5
+"""
+from typing import Any, Dict, List, Text
+import argparse
+import asyncio
+import multiprocessing
+import os
+import random
+import time
+
+from benchmarks.harness import as_dict
+from benchmarks.load_test import build_payload
+
+# CPU-bound actions; the LLM fallback would only measure the stub's event loop
+ACTIONS = [
+    "action_adjust_price", "action_check_inventory", "action_forecast_prep", "action_handle_feedback",
+    "action_process_order", "action_show_recommendations", "action_suggest_wine",
+]
+
+
+def memory_kib() -> Dict[Text, int]:
+    fields: Dict[Text, int] = {}
+    try:
+        with open("/proc/self/smaps_rollup", encoding="utf-8") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[1].isdigit():
+                    fields[parts[0].rstrip(":")] = int(parts[1])
+    except OSError:
+        pass
+    return {"pss": fields.get("Pss", 0),
+            "private": fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)}
+
+
+def worker(executor: Any, payloads: List[Dict[Text, Any]], duration: float, results: Any) -> None:
+    async def loop() -> int:
+        done, deadline = 0, time.perf_counter() + duration
+        while time.perf_counter() < deadline:
+            as_dict(await executor.run(payloads[done % len(payloads)]))
+            done += 1
+        return done
+
+    count = asyncio.run(loop())
+    results.put((count, memory_kib()))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--duration", type=float, default=3.0)
+    parser.add_argument("--payloads", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    os.environ.setdefault("BRICK_LLM_BACKEND", "stub")
+    os.environ.setdefault("BRICK_EVENT_SINK", "file")
+    os.environ.setdefault("BRICK_EVENT_LOG", os.devnull)
+    from rasa_sdk.executor import ActionExecutor
+
+    from actions.prefork import prepare_workers
+
+    executor = ActionExecutor()
+    executor.register_package("actions")
+    prepare_workers()
+    rng = random.Random(args.seed)
+    payloads = [build_payload(rng.choice(ACTIONS), rng, 5, 200) for _ in range(args.payloads)]
+
+    context = multiprocessing.get_context("fork")
+    print(f"{os.cpu_count()} CPUs available")
+    print(f"{'workers':>8}{'req/s':>12}{'scaling':>10}{'PSS KiB/worker':>17}{'private KiB/worker':>20}")
+    single = None
+    for workers in range(1, args.max_workers + 1):
+        results = context.Queue()
+        processes = [context.Process(target=worker, args=(executor, payloads, args.duration, results))
+                     for _ in range(workers)]
+        for process in processes:
+            process.start()
+        outcomes = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+        throughput = sum(count for count, _ in outcomes) / args.duration
+        single = single or throughput
+        pss = sum(memory["pss"] for _, memory in outcomes) / workers
+        private = sum(memory["private"] for _, memory in outcomes) / workers
+        print(f"{workers:>8}{throughput:>12.0f}{throughput / single:>9.2f}x{pss:>17.0f}{private:>20.0f}")
+
+
+if __name__ == "__main__":
+    main()
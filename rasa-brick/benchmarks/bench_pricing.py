@@ -0,0 +1,62 @@
+"""Compare the compiled pricing engine against the legacy per-call path.
+
+Run from the rasa-brick directory:
+
+    python -m benchmarks.bench_pricing --items 200 --repeat 2000
+"""
+from typing import Dict, List, Text
+import argparse
+import datetime
+import timeit
+
+from actions.pricing_engine import get_pricing_engine
+
+
+def legacy_quote(food_item: Text, now: datetime.datetime) -> Dict[Text, float]:
+    # Mirrors the original ActionAdjustPrice.run body
+    hour = now.hour
+    day = now.strftime('%A').lower()
+    peak_hours = {
+        'lunch': (11, 14),
+        'dinner': (18, 21)
+    }
+    day_factors = {
+        'monday': 0.9,
+        'friday': 1.2,
+        'saturday': 1.3,
+        'sunday': 1.1
+    }
+    is_peak = False
+    for period, (start, end) in peak_hours.items():
+        if start <= hour <= end:
+            is_peak = True
+            break
+    base_price = 20.0
+    day_factor = day_factors.get(day, 1.0)
+    peak_factor = 1.2 if is_peak else 1.0
+    return {"base": base_price, "adjusted": base_price * day_factor * peak_factor}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=100, help="items per cart/menu page")
+    parser.add_argument("--repeat", type=int, default=1000, help="requests to time")
+    args = parser.parse_args()
+
+    engine = get_pricing_engine()
+    names = engine.items or ["item"]
+    cart: List[Text] = [names[i % len(names)] for i in range(args.items)]
+    now = datetime.datetime(2024, 3, 15, 19, 30)
+
+    legacy = timeit.timeit(lambda: [legacy_quote(item, now) for item in cart], number=args.repeat)
+    single = timeit.timeit(lambda: [engine.quote(item, now) for item in cart], number=args.repeat)
+    batch = timeit.timeit(lambda: engine.quote_batch(cart, when=now), number=args.repeat)
+
+    print(f"{args.items} items x {args.repeat} requests")
+    for label, seconds in (("legacy per-call", legacy), ("engine.quote", single), ("engine.quote_batch", batch)):
+        per_request = seconds / args.repeat * 1e6
+        print(f"{label:<20} {per_request:10.1f} us/request  {legacy / seconds:6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Top-k ranking latency of the menu index over a large synthetic catalog.
+
+Writes random unit embeddings for ``--items`` dishes to a temporary .npy
+file, memory-maps it the way get_menu_index does, and times filtered top-k
+queries against a full argsort of the same scores.
+
+Run from the rasa-brick directory:
+
+    python -m benchmarks.bench_recommendations --items 100000
+"""
+from typing import Any, Dict, List, Text
+import argparse
+import os
+import random
+import tempfile
+import time
+
+import numpy as np
+
+from actions.menu_index import DIETARY_BITS, EMBEDDING_DIM, PERIOD_BITS, MenuIndex
+from benchmarks.harness import print_table, summarize
+
+
+def synthetic_menu(count: int, rng: random.Random) -> List[Dict[Text, Any]]:
+    periods, dietary = list(PERIOD_BITS), list(DIETARY_BITS)
+    stock = [f"ingredient-{n}" for n in range(200)]
+    return [
+        {
+            "name": f"dish-{n}",
+            "periods": rng.sample(periods, rng.randint(1, 3)),
+            "dietary": rng.sample(dietary, rng.randint(0, 2)),
+            "stock_item": rng.choice(stock),
+            "signature": ["evening"] if n % 1000 == 0 else [],
+        }
+        for n in range(count)
+    ]
+
+
+def timed(fn, samples: int) -> List[float]:
+    latencies = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        fn()
+        latencies.append((time.perf_counter() - start) * 1000.0)
+    return latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=100000)
+    parser.add_argument("--dim", type=int, default=EMBEDDING_DIM)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--samples", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    generator = np.random.default_rng(args.seed)
+    matrix = generator.standard_normal((args.items, args.dim), dtype=np.float32)
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "embeddings.npy")
+        np.save(path, matrix)
+        del matrix
+        start = time.perf_counter()
+        index = MenuIndex(synthetic_menu(args.items, rng), np.load(path, mmap_mode="r"))
+        print(f"Indexed {len(index)} items x {args.dim} dims in {time.perf_counter() - start:.2f}s "
+              f"({os.path.getsize(path) / 2**20:.0f} MiB memory-mapped)")
+
+        unavailable = [f"ingredient-{n}" for n in range(0, 200, 10)]
+        queries = [index.vector_for([rng.randrange(args.items)]) for _ in range(32)]
+
+        def full_sort() -> None:
+            scores = index.embeddings @ rng.choice(queries)
+            np.argsort(-scores)[:args.k]
+
+        report = {
+            "matvec + full argsort": summarize(timed(full_sort, args.samples)),
+            "rank, no filters": summarize(timed(lambda: index.rank(rng.choice(queries), k=args.k), args.samples)),
+            "rank, period+diet+stock": summarize(timed(
+                lambda: index.rank(rng.choice(queries), "evening", ["vegan"], unavailable, k=args.k), args.samples)),
+            "recommend (signature)": summarize(timed(
+                lambda: index.recommend("evening", dietary=["gluten free"], unavailable=unavailable, k=args.k),
+                args.samples)),
+        }
+        print("\nlatency in milliseconds")
+        print_table(report)
+        del index
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""Availability search and hold latency of the reservation engine under load.
+
+Builds a synthetic multi-location floor plan, fills it with random bookings,
+then times availability checks, next-free-slot searches and holds against
+the in-memory and SQLite stores. Finishes with workers racing for the same
+table through a shared SQLite file, which must produce exactly one hold.
+
+Run from the rasa-brick directory:
+
+    python -m benchmarks.bench_reservations --locations 50 --days 14 --bookings 20000
+"""
+from typing import Any, Dict, List, Text
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+
+from actions.reservations import (MemoryReservationStore, ReservationEngine, ReservationStore,
+                                  SQLiteReservationStore, SlotUnavailableError)
+from benchmarks.harness import print_table, summarize
+
+
+def floor_plan(locations: int) -> Dict[Text, Any]:
+    tables = [
+        {"prefix": "W", "area": "window", "seats": 2, "count": 8},
+        {"prefix": "A", "area": "alcove", "seats": 4, "count": 8},
+        {"prefix": "B", "area": "alcove", "seats": 6, "count": 4},
+        {"prefix": "P", "area": "private", "seats": 12, "count": 2},
+    ]
+    return {"locations": {f"loc{n}": {"open": "11:00", "close": "23:00", "tables": tables} for n in range(locations)}}
+
+
+def fill(engine: ReservationEngine, rng: random.Random, days: List[Text], bookings: int) -> int:
+    placed = 0
+    locations = list(engine.tables)
+    for _ in range(bookings):
+        location, day = rng.choice(locations), rng.choice(days)
+        offer = engine.find_slot(location, day, rng.choice((2, 2, 3, 4, 5, 8)), rng.randrange(44, 84))
+        if offer:
+            booking = engine.hold(location, day, offer.table.seats, offer.start_slot)
+            engine.confirm(booking.booking_id)
+            placed += 1
+    return placed
+
+
+def time_calls(fn, samples: int) -> List[float]:
+    latencies = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        fn()
+        latencies.append((time.perf_counter() - start) * 1e6)
+    return latencies
+
+
+def bench_store(label: Text, store: ReservationStore, args: argparse.Namespace, report: Dict[Text, Dict[Text, Any]]) -> None:
+    rng = random.Random(args.seed)
+    engine = ReservationEngine(floor_plan(args.locations), store)
+    days = [f"2030-01-{day + 1:02d}" for day in range(args.days)]
+    start = time.perf_counter()
+    placed = fill(engine, rng, days, args.bookings)
+    print(f"{label}: placed {placed} of {args.bookings} bookings in {time.perf_counter() - start:.2f}s")
+
+    locations = list(engine.tables)
+    report[f"{label} is_available"] = summarize(time_calls(
+        lambda: engine.is_available(rng.choice(locations), rng.choice(days), rng.choice((2, 4, 6)), rng.randrange(44, 84)),
+        args.samples))
+    report[f"{label} find_slot"] = summarize(time_calls(
+        lambda: engine.find_slot(rng.choice(locations), rng.choice(days), rng.choice((2, 4, 6)), rng.randrange(44, 84)),
+        args.samples))
+
+    def hold_and_release() -> None:
+        try:
+            engine.release(engine.hold(rng.choice(locations), rng.choice(days), 2, rng.randrange(44, 84)).booking_id)
+        except SlotUnavailableError:
+            pass
+    report[f"{label} hold+release"] = summarize(time_calls(hold_and_release, args.samples))
+
+
+def race(path: Text, workers: int) -> int:
+    plan = floor_plan(1)
+    engines = [ReservationEngine(plan, SQLiteReservationStore(path)) for _ in range(workers)]
+    barrier = threading.Barrier(workers)
+    wins: List[Text] = []
+
+    def worker(engine: ReservationEngine) -> None:
+        barrier.wait()
+        for table_slot in range(0, 48, 6):
+            try:
+                wins.append(engine.hold("loc0", "2030-02-01", 12, 44 + table_slot).booking_id)
+            except SlotUnavailableError:
+                pass
+
+    threads = [threading.Thread(target=worker, args=(engine,)) for engine in engines]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return len(wins)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--locations", type=int, default=50)
+    parser.add_argument("--days", type=int, default=14)
+    parser.add_argument("--bookings", type=int, default=20000)
+    parser.add_argument("--samples", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    report: Dict[Text, Dict[Text, Any]] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        bench_store("memory", MemoryReservationStore(), args, report)
+        bench_store("sqlite", SQLiteReservationStore(os.path.join(tmp, "bench.db")), args, report)
+        print("\nlatency in microseconds")
+        print_table(report)
+        # Two 12-seat rooms and eight 90-minute starts: 16 holds available, however many workers race
+        holds = race(os.path.join(tmp, "race.db"), args.workers)
+        print(f"\n{args.workers} workers racing through one SQLite file: {holds} holds granted (expected 16)")
+
+
+if __name__ == "__main__":
+    main()
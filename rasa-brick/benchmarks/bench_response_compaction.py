@@ -0,0 +1,149 @@
+"""Tracker store / event broker volume with and without response compaction.
+
+Runs actions with compaction off, then compacts each response the way the
+action server would and compares the events and bytes each one adds to
+the tracker. Sessions come from a recorded export (any layout
+``benchmarks.replay`` reads) or are simulated: per sender, a sequence of
+the load test's scenarios, with the tracker carried over between turns
+as Rasa Core would (user event, action, returned events, bot messages).
+
+Run from the rasa-brick directory:
+
+    python -m benchmarks.bench_response_compaction --senders 200 --turns 30
+    python -m benchmarks.bench_response_compaction --export events.jsonl.gz
+"""
+from typing import Any, Dict, Iterator, List, Optional, Text, Tuple
+import argparse
+import asyncio
+import copy
+import json
+import os
+import random
+import time
+
+import yaml
+
+from benchmarks.harness import action_call, tracker_state, user_event
+from benchmarks.load_test import SCENARIOS, in_process_runner
+from benchmarks.replay import ConversationRebuilder, read_events
+
+# Staff and guest turns a session draws from, with weights
+TURNS = {
+    "action_set_business_info": 1, "action_handle_reservation": 3, "action_process_order": 4,
+    "action_check_inventory": 3, "action_adjust_price": 2, "action_show_recommendations": 2,
+    "action_suggest_wine": 1, "action_forecast_prep": 1,
+}
+
+
+def domain_slots(path: Text = "domain.yml") -> Dict[Text, Any]:
+    with open(path, encoding="utf-8") as f:
+        return {name: None for name in yaml.safe_load(f).get("slots", {})}
+
+
+def bot_event(message: Dict[Text, Any]) -> Dict[Text, Any]:
+    data = {key: message.get(key) for key in ("elements", "quick_replies", "buttons", "attachment", "image", "custom")}
+    return {"event": "bot", "timestamp": time.time(), "text": message.get("text"), "data": data}
+
+
+def added_events(action: Text, result: Dict[Text, Any]) -> List[Dict[Text, Any]]:
+    """What the turn appends to the tracker: the action, its events and its bot messages."""
+    return ([{"event": "action", "name": action, "timestamp": time.time()}] + list(result.get("events") or [])
+            + [bot_event(message) for message in result.get("responses") or []])
+
+
+def simulated(args: argparse.Namespace) -> Iterator[Tuple[Text, Dict[Text, Any]]]:
+    """Payloads of simulated sessions; each tracker includes the compacted responses before it."""
+    rng = random.Random(args.seed)
+    actions, weights = zip(*TURNS.items())
+    sessions = []
+    for sender in range(args.senders):
+        sessions.append({"sender": f"session-{sender}", "events": [], "slots": domain_slots()})
+    for _ in range(args.turns):
+        for session in sessions:
+            action = rng.choices(actions, weights)[0]
+            scenario = rng.choice(SCENARIOS[action])
+            session["events"].append(user_event(scenario["text"], scenario.get("intent", ""), scenario.get("entities")))
+            slots = {**session["slots"], **scenario.get("slots", {})}
+            payload = action_call(action, tracker_state(session["sender"], session["events"], slots))
+            result = yield action, payload
+            session["events"] += added_events(action, result)
+            for event in result.get("events") or []:
+                if event.get("event") == "slot":
+                    session["slots"][event["name"]] = event.get("value")
+
+
+def recorded(args: argparse.Namespace) -> Iterator[Tuple[Text, Dict[Text, Any]]]:
+    rebuilder = ConversationRebuilder(set(TURNS) | set(SCENARIOS), max_history=args.max_history)
+    defaults = domain_slots()
+
+    def jobs() -> Iterator[Any]:
+        for sender_id, event in read_events(args.export):
+            yield from rebuilder.feed(sender_id, event)
+        yield from rebuilder.flush()
+
+    for job in jobs():
+        # Rasa Core sends every domain slot, set or not
+        tracker = job.payload["tracker"]
+        tracker["slots"] = {**defaults, **tracker["slots"]}
+        yield job.action, job.payload
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    # The executor's own compaction stays off; each response is compacted here
+    os.environ["BRICK_COMPACT_SLOTS"] = "0"
+    run = in_process_runner()
+    from actions.compaction import ResponseCompactor
+
+    compactor = ResponseCompactor()
+    totals: Dict[Text, Dict[Text, float]] = {}
+    source = recorded(args) if args.export else simulated(args)
+    compacted: Optional[Dict[Text, Any]] = None
+    while True:
+        try:
+            action, payload = source.send(compacted) if compacted is not None else next(source)
+        except StopIteration:
+            break
+        result = await run(payload)
+        tracker = payload["tracker"]
+        before = added_events(action, result)
+        compacted = copy.deepcopy(result)
+        start = time.perf_counter()
+        compacted["events"], _ = compactor.process(tracker["slots"], compacted.get("events"))
+        elapsed = time.perf_counter() - start
+        after = added_events(action, compacted)
+
+        row = totals.setdefault(action, {"calls": 0, "events": 0, "events_after": 0, "bytes": 0, "bytes_after": 0, "us": 0.0})
+        row["calls"] += 1
+        row["events"] += len(before)
+        row["events_after"] += len(after)
+        row["bytes"] += len(json.dumps(before, default=str))
+        row["bytes_after"] += len(json.dumps(after, default=str))
+        row["us"] += elapsed * 1e6
+
+    print(f"{'action':<30}{'calls':>7}{'events':>9}{'after':>8}{'B/call':>9}{'after':>8}{'saved':>8}{'us':>7}")
+    overall = {"bytes": 0, "bytes_after": 0, "events": 0, "events_after": 0}
+    for action, row in sorted(totals.items()):
+        calls = row["calls"]
+        print(f"{action:<30}{calls:>7}{row['events'] / calls:>9.2f}{row['events_after'] / calls:>8.2f}"
+              f"{row['bytes'] / calls:>9.0f}{row['bytes_after'] / calls:>8.0f}"
+              f"{1 - row['bytes_after'] / row['bytes']:>8.1%}{row['us'] / calls:>7.1f}")
+        for key in overall:
+            overall[key] += row[key]
+    if overall["bytes"]:
+        print(f"total: {overall['events']} -> {overall['events_after']} events, "
+              f"{overall['bytes']} -> {overall['bytes_after']} bytes ({1 - overall['bytes_after'] / overall['bytes']:.1%} saved); "
+              f"{compactor.stats['slot_events_dropped']} slot events dropped")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--export", help="recorded events to replay instead of simulated sessions")
+    parser.add_argument("--senders", type=int, default=200)
+    parser.add_argument("--turns", type=int, default=30, help="turns per simulated session")
+    parser.add_argument("--max-history", type=int, default=200, help="events kept per replayed sender")
+    parser.add_argument("--seed", type=int, default=0)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""LLM fallback volume with and without the semantic cache in front of it.
+
+Replays a stream of out-of-domain questions: a set of FAQ topics, each
+asked in several phrasings with random casing, punctuation, filler words
+and typos, mixed with one-off questions the cache cannot know. Every
+question the cache cannot answer goes to a stub LLM with a fixed delay
+(through the exact-match response cache, as in the fallback action) and
+its answer is added. Reports the deflection rate, the LLM time saved, the
+lookup cost, and how many deflections answered a different topic than the
+one asked about.
+
+Run from the rasa-brick directory:
+
+    python -m benchmarks.bench_semantic_cache --queries 5000 --llm-delay 0.05
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from actions.llm_client import CachedLLMClient, StubBackend
+from actions.semantic_cache import SemanticCache, cacheable
+
+TOPICS = {
+    "parking": ["do you have parking nearby", "is there parking nearby", "do you have parking near the restaurant"],
+    "holidays": ["are you open on holidays", "are you open on public holidays", "are you open on bank holidays"],
+    "cards": ["do you take credit cards", "do you accept credit cards", "can I pay with a credit card"],
+    "dogs": ["can I bring my dog", "can i bring my dog with me", "are dogs allowed inside"],
+    "wine": ["can I bring my own wine", "can i bring my own bottle of wine", "do you charge corkage"],
+    "dress": ["is there a dress code", "what is the dress code", "do you have a dress code"],
+    "kids": ["is there a kids menu", "do you have a kids menu", "do you have a menu for children"],
+    "wifi": ["do you have free wifi", "is there wifi in the restaurant", "do you have wifi for guests"],
+    "gift": ["do you sell gift cards", "can I buy a gift card", "do you have gift vouchers"],
+    "private": ["can I book a private room", "do you have a private dining room", "do you host private events"],
+}
+FILLERS = ["", "hi ", "hey, ", "quick question: ", "sorry, "]
+ENDINGS = ["", "?", "??", " please", " thanks"]
+ONE_OFF = ["what's the weather like on {} street", "who designed the {} logo", "tell me a joke about {}",
+           "how far is the {} station from you", "what music are you playing on {}"]
+
+
+def typo(rng: random.Random, text: str) -> str:
+    i = rng.randrange(1, len(text) - 1)
+    return text[:i] + text[i + 1:] if rng.random() < 0.5 else text[:i] + text[i + 1] + text[i] + text[i + 2:]
+
+
+def make_stream(rng: random.Random, count: int, one_off_rate: float) -> list:
+    stream = []
+    for n in range(count):
+        if rng.random() < one_off_rate:
+            stream.append((None, rng.choice(ONE_OFF).format(f"item{n}")))
+            continue
+        topic = rng.choice(list(TOPICS))
+        text = rng.choice(TOPICS[topic])
+        if rng.random() < 0.2:
+            text = typo(rng, text)
+        if rng.random() < 0.3:
+            text = text.capitalize()
+        stream.append((topic, rng.choice(FILLERS) + text + rng.choice(ENDINGS)))
+    return stream
+
+
+async def run(args: argparse.Namespace) -> None:
+    rng = random.Random(args.seed)
+    stream = make_stream(rng, args.queries, args.one_off_rate)
+    topic_of = {text: topic for topic, text in stream}
+    client = CachedLLMClient(StubBackend(delay=args.llm_delay))
+    cache = SemanticCache(threshold=args.threshold)
+    print(f"vectorizer backend: {cache.vectorizer.backend}")
+
+    start = time.perf_counter()
+    llm_calls = wrong = 0
+    lookup_seconds = 0.0
+    for topic, query in stream:
+        if cacheable(query):
+            lookup_start = time.perf_counter()
+            hit = cache.lookup(query)
+            lookup_seconds += time.perf_counter() - lookup_start
+            if hit is not None:
+                wrong += topic_of[hit.query] != topic
+                continue
+        response, metrics = await client.complete([{"role": "user", "content": query}])
+        llm_calls += 1
+        if metrics["cache"] == "miss":
+            cache.record_upstream(metrics["latency_ms"])
+        if cacheable(query) and response.finish_reason == "stop":
+            cache.add(query, response.text)
+    elapsed = time.perf_counter() - start
+
+    lookups = cache.stats["lookups"]
+    print(f"queries {len(stream)}, LLM calls {llm_calls} ({client.stats['miss']} upstream), "
+          f"cached answers {len(cache)}")
+    print(f"deflection rate {cache.deflection_rate:.1%}, wrong-topic deflections {wrong}")
+    print(f"LLM time saved {cache.stats['saved_ms'] / 1000:.1f}s "
+          f"(without the cache: ~{(elapsed * 1000 + cache.stats['saved_ms']) / 1000:.1f}s, with: {elapsed:.1f}s)")
+    print(f"lookup {lookup_seconds / max(1, lookups) * 1e6:.1f} us")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--queries", type=int, default=5000)
+    parser.add_argument("--llm-delay", type=float, default=0.05, help="stub LLM latency in seconds")
+    parser.add_argument("--one-off-rate", type=float, default=0.3, help="share of questions asked only once")
+    parser.add_argument("--threshold", type=float, default=0.85)
+    parser.add_argument("--seed", type=int, default=0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Import time per action module, measured with ``python -X importtime`` in fresh interpreters.
+
+Each module is imported on its own (so shared dependencies are charged to
+every module that pulls them in), then the whole package is registered the
+way ``rasa run actions`` does it and the heaviest top-level packages are
+listed. ``--warmup`` also times each BRICK_WARMUP step.
+
+Run from the rasa-brick directory:
+
+    python -m benchmarks.bench_startup --output startup.json
+    python -m benchmarks.bench_startup --baseline startup.json --max-regression 0.25
+"""
+from typing import Dict, List, Text, Tuple
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+ACTIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "actions")
+REGISTER = "from rasa_sdk.executor import ActionExecutor; ActionExecutor().register_package('actions')"
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def action_modules() -> List[Text]:
+    return sorted(f"actions.{name[:-3]}" for name in os.listdir(ACTIONS_DIR)
+                  if name.endswith(".py") and not name.startswith("_"))
+
+
+def import_times(code: Text) -> List[Tuple[Text, int, int, int]]:
+    """(module, self us, cumulative us, depth) for every import made by ``code``."""
+    env = {key: value for key, value in os.environ.items() if not key.startswith("BRICK_")}
+    env["BRICK_LLM_BACKEND"] = "stub"
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=os.path.dirname(ACTIONS_DIR),
+                            env=env, capture_output=True, text=True, check=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            rows.append((match.group(4), int(match.group(1)), int(match.group(2)), len(match.group(3)) // 2))
+    return rows
+
+
+def module_time_ms(module: Text, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        rows = import_times(f"import {module}")
+        samples.append(next(cumulative for name, _, cumulative, _ in rows if name == module) / 1000.0)
+    return statistics.median(samples)
+
+
+def heaviest_packages(rows: List[Tuple[Text, int, int, int]], limit: int) -> List[Tuple[Text, float]]:
+    totals: Dict[Text, int] = {}
+    for name, self_us, _, _ in rows:
+        package = name.split(".")[0]
+        totals[package] = totals.get(package, 0) + self_us
+    return sorted(((package, us / 1000.0) for package, us in totals.items()), key=lambda item: -item[1])[:limit]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3, help="fresh interpreters per module; the median is kept")
+    parser.add_argument("--top", type=int, default=12, help="heaviest top-level packages to list")
+    parser.add_argument("--warmup", action="store_true", help="also time each warm-up step in-process")
+    parser.add_argument("--output", help="write per-module import times as JSON")
+    parser.add_argument("--baseline", help="JSON report to compare import times against")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="allowed fractional increase")
+    args = parser.parse_args()
+
+    report = {module: module_time_ms(module, args.repeat) for module in action_modules()}
+    print(f"{'module':<34}{'import ms':>12}")
+    for module, ms in report.items():
+        print(f"{module:<34}{ms:>12.1f}")
+
+    rows = import_times(REGISTER)
+    report["__register_package__"] = sum(cumulative for _, _, cumulative, depth in rows if depth == 0) / 1000.0
+    print(f"\nregister_package('actions'): {report['__register_package__']:.1f} ms of imports")
+    for package, ms in heaviest_packages(rows, args.top):
+        print(f"  {package:<32}{ms:>10.1f} ms")
+
+    if args.warmup:
+        sys.path.insert(0, os.path.dirname(ACTIONS_DIR))
+        from actions.warmup import warm_up
+
+        print("\nwarm-up steps")
+        for step, seconds in warm_up().items():
+            print(f"  {step:<32}{seconds * 1000:>10.1f} ms")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        failures = [f"{module}: {ms:.1f}ms vs baseline {baseline[module]:.1f}ms"
+                    for module, ms in report.items()
+                    if baseline.get(module) and ms > baseline[module] * (1 + args.max_regression)]
+        for failure in failures:
+            print(f"REGRESSION {failure}")
+        sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
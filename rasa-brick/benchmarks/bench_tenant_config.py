@@ -0,0 +1,120 @@
+"""Tenant settings lookups and business_info payload size.
+
+Compares rebuilding the default hours/features dicts and shipping the whole
+profile on every ActionSetBusinessInfo call with the cached tenant store,
+where repeat calls from a client that already holds the current etag only
+carry the version and etag. Also times cache misses against the SQLite
+backend and concurrent compare-and-set writes.
+
+Run from the rasa-brick directory:
+
+    python -m benchmarks.bench_tenant_config --tenants 1000 --lookups 100000
+"""
+from typing import Any, Dict, Text
+import argparse
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+
+from actions.tenant_config import (DEFAULT_TENANT_DEFAULTS_PATH, SQLiteTenantBackend, TenantConfigStore,
+                                   VersionConflictError, tenant_id_for)
+
+
+def legacy_business_info(name: Text, cuisine: Text) -> Dict[Text, Any]:
+    default_hours = {
+        "monday": {"open": "09:00", "close": "22:00"},
+        "tuesday": {"open": "09:00", "close": "22:00"},
+        "wednesday": {"open": "09:00", "close": "22:00"},
+        "thursday": {"open": "09:00", "close": "22:00"},
+        "friday": {"open": "09:00", "close": "23:00"},
+        "saturday": {"open": "10:00", "close": "23:00"},
+        "sunday": {"open": "10:00", "close": "22:00"}
+    }
+    default_features = {
+        "autoUpsell": True,
+        "allergyWarnings": True,
+        "dietaryRecommendations": True,
+        "smartPairing": True
+    }
+    return {"name": name, "type": "restaurant", "cuisine": cuisine,
+            "operating_hours": default_hours, "ai_features": default_features}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tenants", type=int, default=1000)
+    parser.add_argument("--lookups", type=int, default=100000)
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with open(DEFAULT_TENANT_DEFAULTS_PATH, encoding="utf-8") as f:
+        defaults = json.load(f)
+    rng = random.Random(args.seed)
+    names = [f"Bistro {n}" for n in range(args.tenants)]
+    picks = [rng.choice(names) for _ in range(args.lookups)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = TenantConfigStore(SQLiteTenantBackend(os.path.join(directory, "tenants.db")), defaults,
+                                  max_size=args.tenants, ttl=3600)
+        etags = {}
+        for name in names:
+            etags[name] = store.update(tenant_id_for(name), {"name": name, "cuisine": "italian"}).etag
+
+        start = time.perf_counter()
+        legacy_bytes = 0
+        for name in picks:
+            legacy_bytes += len(json.dumps({"business_info": legacy_business_info(name, "italian")}))
+        legacy = time.perf_counter() - start
+
+        store.stats.update(hits=0, misses=0)
+        start = time.perf_counter()
+        cached_bytes = 0
+        for name in picks:
+            config = store.get(tenant_id_for(name))
+            payload = {"tenant": config.tenant_id, "version": config.version, "etag": config.etag}
+            if etags[name] != config.etag:
+                payload["settings"] = config.settings_dict()
+            cached_bytes += len(json.dumps({"business_info": payload}))
+        cached = time.perf_counter() - start
+        hit_rate = store.stats["hits"] / max(1, store.stats["hits"] + store.stats["misses"])
+
+        store.ttl = 0
+        for name in names:
+            store.invalidate(tenant_id_for(name))
+        start = time.perf_counter()
+        for name in picks[:10000]:
+            store.get(tenant_id_for(name))
+        miss = (time.perf_counter() - start) / min(len(picks), 10000)
+
+        # Concurrent writers on one tenant: every update must land exactly once
+        conflicts = []
+
+        def writer(worker: int) -> None:
+            for n in range(50):
+                try:
+                    store.update("contended", {"counter": {f"w{worker}": n}}, attempts=100)
+                except VersionConflictError:
+                    conflicts.append(worker)
+
+        threads = [threading.Thread(target=writer, args=(w,)) for w in range(args.writers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        final = store.get("contended")
+
+    print(f"{'path':<22}{'us/lookup':>12}{'bytes/response':>16}")
+    print(f"{'legacy rebuild':<22}{legacy / len(picks) * 1e6:>12.2f}{legacy_bytes / len(picks):>16.0f}")
+    print(f"{'cached + etag':<22}{cached / len(picks) * 1e6:>12.2f}{cached_bytes / len(picks):>16.0f}")
+    print(f"{'sqlite miss':<22}{miss * 1e6:>12.2f}")
+    print(f"cache hit rate {hit_rate:.1%}")
+    print(f"{args.writers} writers x 50 updates: version {final.version}, "
+          f"{store.stats['conflicts']} retried conflicts, {len(conflicts)} failed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Time-of-day dependent work per request vs. one snapshot per time bucket.
+
+The legacy path reads the clock, works out the weekday/hour factors,
+service and period, renders the prep list and ranks the default
+recommendations on every request. The scheduler does that once per bucket.
+A simulated day of traffic on an injected clock checks that rebuilds only
+happen at bucket boundaries.
+
+Run from the rasa-brick directory:
+
+    python -m benchmarks.bench_time_snapshot --requests 20000 --day-requests 100000
+"""
+import argparse
+import datetime
+import time
+
+from actions.catalog import get_catalog, time_of_day
+from actions.demand_forecast import get_demand_forecaster, service_for_hour
+from actions.inventory_store import get_inventory_store
+from actions.menu_index import get_menu_index
+from actions.pricing_engine import get_pricing_engine
+from actions.time_snapshot import TimeBucketScheduler
+
+
+def legacy_request() -> tuple:
+    now = datetime.datetime.now()
+    factors = get_pricing_engine().factors(now)
+    forecast = get_demand_forecaster().forecast(now.weekday(), service_for_hour(now.hour))
+    prep = "".join(f"• {name.title()}: {int(amount)}{unit}\n" for name, (amount, unit) in forecast.prep.items())
+    period = time_of_day(now.hour)
+    picks = get_menu_index().recommend(period, unavailable=get_inventory_store().below_threshold())
+    return factors, prep, get_catalog().dishes_text(tuple(pick.text for pick in picks))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--day-requests", type=int, default=100000, help="requests spread over a simulated day")
+    parser.add_argument("--bucket-minutes", type=int, default=60)
+    args = parser.parse_args()
+
+    legacy_request()
+    start = time.perf_counter()
+    for _ in range(args.requests):
+        legacy_request()
+    legacy = (time.perf_counter() - start) / args.requests
+
+    scheduler = TimeBucketScheduler(bucket_minutes=args.bucket_minutes)
+    scheduler.current()
+    start = time.perf_counter()
+    for _ in range(args.requests):
+        scheduler.current()
+    snapshot = (time.perf_counter() - start) / args.requests
+
+    print(f"{'path':<20}{'us/request':>12}")
+    print(f"{'legacy':<20}{legacy * 1e6:>12.2f}")
+    print(f"{'snapshot':<20}{snapshot * 1e6:>12.2f}")
+
+    # One day of evenly spaced requests on a fake clock
+    clock = [datetime.datetime(2026, 1, 5)]
+    day = TimeBucketScheduler(bucket_minutes=args.bucket_minutes, clock=lambda: clock[0])
+    step = datetime.timedelta(days=1) / args.day_requests
+    for _ in range(args.day_requests):
+        day.current()
+        clock[0] += step
+    expected = 24 * 60 // args.bucket_minutes
+    print(f"simulated day: {args.day_requests} requests, {day.stats['builds']} rebuilds "
+          f"(expected {expected}), {day.stats['hits']} served from the snapshot")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Local OpenAI-compatible chat server that injects delays and errors.
+
+Point the action server at it to exercise the fallback deadline, hedging
+and circuit breaker without touching the real API:
+
+    python -m benchmarks.fake_llm_server --port 8089 --delay 0.2 --slow-rate 0.1 --slow-delay 5 --error-rate 0.05
+    OPENAI_BASE_URL=http://127.0.0.1:8089/v1 OPENAI_API_KEY=fake rasa run actions
+"""
+from typing import Any, Dict, Text, Tuple
+import argparse
+import asyncio
+import json
+import random
+import time
+
+
+class FakeLLMServer:
+    def __init__(self, delay: float = 0.1,
+                 jitter: float = 0.0,
+                 slow_rate: float = 0.0,
+                 slow_delay: float = 5.0,
+                 error_rate: float = 0.0,
+                 seed: int = 0) -> None:
+        self.delay = delay
+        self.jitter = jitter
+        self.slow_rate = slow_rate
+        self.slow_delay = slow_delay
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.errors = 0
+
+    def _plan(self) -> Tuple[float, bool]:
+        delay = self.delay + self.random.uniform(0, self.jitter)
+        if self.random.random() < self.slow_rate:
+            delay += self.slow_delay
+        return delay, self.random.random() < self.error_rate
+
+    def _completion(self, request: Dict[Text, Any]) -> Dict[Text, Any]:
+        messages = request.get("messages") or [{"content": ""}]
+        return {
+            "id": f"chatcmpl-fake-{self.requests}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "fake"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": f"(fake) {messages[-1].get('content', '')}"},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        }
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", "0")))
+
+                self.requests += 1
+                delay, fail = self._plan()
+                await asyncio.sleep(delay)
+                if fail:
+                    self.errors += 1
+                    status, payload = "500 Internal Server Error", {"error": {"message": "injected failure", "type": "server_error"}}
+                else:
+                    status, payload = "200 OK", self._completion(json.loads(body or b"{}"))
+
+                data = json.dumps(payload).encode()
+                writer.write(
+                    f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\n\r\n".encode() + data
+                )
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host: Text = "127.0.0.1", port: int = 8089) -> asyncio.AbstractServer:
+        return await asyncio.start_server(self.handle, host, port)
+
+
+async def _serve(args: argparse.Namespace) -> None:
+    server = FakeLLMServer(args.delay, args.jitter, args.slow_rate, args.slow_delay, args.error_rate, args.seed)
+    listener = await server.start(args.host, args.port)
+    print(f"Fake LLM listening on http://{args.host}:{args.port}/v1")
+    async with listener:
+        await listener.serve_forever()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--delay", type=float, default=0.1, help="base response delay (s)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra uniform delay (s)")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="fraction of requests that stall")
+    parser.add_argument("--slow-delay", type=float, default=5.0, help="stall length (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with HTTP 500")
+    parser.add_argument("--seed", type=int, default=0)
+    asyncio.run(_serve(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
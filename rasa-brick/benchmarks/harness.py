@@ -0,0 +1,89 @@
+"""Shared helpers for driving actions outside of Rasa Core."""
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Text
+import json
+import time
+import uuid
+
+import numpy as np
+
+
+def user_event(text: Text, intent: Text = "", entities: Optional[List[Dict[Text, Any]]] = None,
+               timestamp: Optional[float] = None) -> Dict[Text, Any]:
+    return {
+        "event": "user",
+        "timestamp": timestamp or time.time(),
+        "text": text,
+        "parse_data": {
+            "text": text,
+            "intent": {"name": intent, "confidence": 1.0},
+            "entities": entities or [],
+            "message_id": uuid.uuid4().hex,
+        },
+        "message_id": uuid.uuid4().hex,
+    }
+
+
+def bot_event(text: Text, timestamp: Optional[float] = None) -> Dict[Text, Any]:
+    return {"event": "bot", "timestamp": timestamp or time.time(), "text": text, "data": {}}
+
+
+def tracker_state(sender_id: Text,
+                  events: Sequence[Dict[Text, Any]],
+                  slots: Optional[Dict[Text, Any]] = None) -> Dict[Text, Any]:
+    """Tracker JSON as Rasa Core sends it to the action webhook."""
+    latest = next((event for event in reversed(events) if event.get("event") == "user"), None)
+    latest_message = dict(latest["parse_data"]) if latest else {"text": "", "intent": {}, "entities": []}
+    if latest:
+        latest_message["message_id"] = latest.get("message_id")
+    return {
+        "sender_id": sender_id,
+        "slots": dict(slots or {}),
+        "latest_message": latest_message,
+        "events": list(events),
+        "paused": False,
+        "followup_action": None,
+        "active_loop": {},
+        "latest_action_name": "action_listen",
+    }
+
+
+def action_call(action_name: Text, tracker: Dict[Text, Any], domain: Optional[Dict[Text, Any]] = None) -> Dict[Text, Any]:
+    return {
+        "next_action": action_name,
+        "sender_id": tracker["sender_id"],
+        "tracker": tracker,
+        "domain": domain or {},
+        "version": "3.6.15",
+    }
+
+
+def as_dict(result: Any) -> Dict[Text, Any]:
+    """Normalize executor results across rasa-sdk versions."""
+    if result is None:
+        return {"events": [], "responses": []}
+    if hasattr(result, "model_dump"):
+        return result.model_dump()
+    return result
+
+
+def payload_size(result: Dict[Text, Any]) -> int:
+    return len(json.dumps(result, default=str))
+
+
+def summarize(latencies_ms: Iterable[float]) -> Dict[Text, float]:
+    samples = np.fromiter(latencies_ms, dtype=np.float64)
+    if not len(samples):
+        return {"count": 0, "p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+    p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+    return {"count": int(len(samples)), "p50": float(p50), "p95": float(p95), "p99": float(p99), "max": float(samples.max())}
+
+
+def print_table(rows: Dict[Text, Dict[Text, float]], extra: Sequence[Text] = ()) -> None:
+    columns = ["count", "p50", "p95", "p99", "max", *extra]
+    print(f"{'action':<30}" + "".join(f"{column:>12}" for column in columns))
+    for name, stats in sorted(rows.items()):
+        cells = []
+        for column in columns:
+            value = stats.get(column, 0)
+            cells.append(f"{value:>12d}" if isinstance(value, int) else f"{value:>12.2f}")
+        print(f"{name:<30}" + "".join(cells))
@@ -0,0 +1,240 @@
+"""Load-test every registered action with synthetic trackers.
+
+Runs in-process through the rasa-sdk ActionExecutor, or against a running
+action server's /webhook, and reports p50/p95/p99 latency, throughput and
+payload sizes per action. The LLM fallback is stubbed in-process so the
+run is fully offline; start a server under test with BRICK_LLM_BACKEND=stub
+for the same effect over HTTP.
+
+Run from the rasa-brick directory:
+
+    python -m benchmarks.load_test --requests 2000 --concurrency 32
+    python -m benchmarks.load_test --url http://localhost:5055/webhook --concurrency 64
+    python -m benchmarks.load_test --output baseline.json
+    python -m benchmarks.load_test --baseline baseline.json --max-regression 0.25
+"""
+from typing import Any, Awaitable, Callable, Dict, List, Text
+import argparse
+import asyncio
+import atexit
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.harness import action_call, as_dict, bot_event, payload_size, print_table, summarize, tracker_state, user_event
+
+# Message text, entities and slots for each action; unknown actions get an empty turn
+SCENARIOS: Dict[Text, List[Dict[Text, Any]]] = {
+    "action_process_order": [
+        {"text": "I'll have the salmon", "intent": "order_food", "entities": [{"entity": "food_item", "value": "salmon"}]},
+        {"text": "two risotto please", "intent": "order_food",
+         "entities": [{"entity": "food_item", "value": "risotto"}, {"entity": "quantity", "value": "2"}]},
+    ],
+    "action_show_recommendations": [{"text": "what do you recommend?", "intent": "ask_recommendations"}],
+    "action_suggest_wine": [
+        {"text": "what wine goes with that?", "intent": "ask_recommendations", "slots": {"current_cuisine": "Seafood"}},
+        {"text": "any wine?", "intent": "ask_recommendations", "slots": {"current_cuisine": "Mexican"}},
+    ],
+    "action_handle_reservation": [
+        {"text": "table for 4 tomorrow for a birthday", "intent": "make_reservation",
+         "entities": [{"entity": "party_size", "value": "4"}, {"entity": "date", "value": "tomorrow"},
+                      {"entity": "occasion", "value": "birthday"}]},
+    ],
+    "action_adjust_price": [
+        {"text": "how much is the ribeye?", "intent": "ask_price", "entities": [{"entity": "food_item", "value": "ribeye"}]},
+        {"text": "prices for salmon, sushi and tacos", "intent": "ask_price",
+         "entities": [{"entity": "food_item", "value": "salmon"}, {"entity": "food_item", "value": "sushi"},
+                      {"entity": "food_item", "value": "tacos"}]},
+    ],
+    "action_check_inventory": [
+        {"text": "check salmon stock", "entities": [{"entity": "food_item", "value": "salmon"}]},
+        {"text": "inventory status"},
+        {"text": "check salmon, ribeye and cream",
+         "entities": [{"entity": "food_item", "value": "salmon"}, {"entity": "food_item", "value": "ribeye"},
+                      {"entity": "food_item", "value": "cream"}]},
+        {"text": "stock and prices for proteins", "entities": [{"entity": "inventory_category", "value": "proteins"}]},
+    ],
+    "action_forecast_prep": [{"text": "what should we prep today?"}],
+    "action_handle_feedback": [
+        {"text": "The food was amazing but service was slow", "intent": "give_feedback"},
+        {"text": "not bad at all, lovely atmosphere", "intent": "give_feedback"},
+    ],
+    "action_set_business_info": [
+        {"text": "set up Brick Bistro, italian", "entities": [{"entity": "business_name", "value": "Brick Bistro"},
+                                                              {"entity": "cuisine_type", "value": "italian"}]},
+        {"text": "we're serving french now", "entities": [{"entity": "cuisine_type", "value": "french"}],
+         "slots": {"tenant_id": "brick-bistro"}},
+    ],
+    "action_default_fallback": [
+        {"text": "are you open on holidays?", "intent": "nlu_fallback"},
+        {"text": "do you have parking nearby?", "intent": "nlu_fallback"},
+    ],
+}
+
+
+def build_payload(action_name: Text, rng: random.Random, history: int, senders: int) -> Dict[Text, Any]:
+    scenario = rng.choice(SCENARIOS.get(action_name) or [{"text": "hello"}])
+    events: List[Dict[Text, Any]] = []
+    for turn in range(history):
+        events.append(user_event(f"earlier message {turn}", "chitchat"))
+        events.append(bot_event(f"earlier reply {turn}"))
+    events.append(user_event(scenario["text"], scenario.get("intent", ""), scenario.get("entities")))
+    sender = f"load-{rng.randrange(senders)}"
+    return action_call(action_name, tracker_state(sender, events, scenario.get("slots")))
+
+
+def in_process_runner() -> Callable[[Dict[Text, Any]], Awaitable[Dict[Text, Any]]]:
+    os.environ.setdefault("BRICK_LLM_BACKEND", "stub")
+    # Keep the tenant store and analytics events of synthetic senders out of the working directory
+    scratch = tempfile.mkdtemp(prefix="brick-load-")
+    atexit.register(shutil.rmtree, scratch, ignore_errors=True)
+    os.environ.setdefault("BRICK_TENANT_DB", os.path.join(scratch, "brick_tenants.db"))
+    os.environ.setdefault("BRICK_EVENT_LOG", os.path.join(scratch, "brick_events.jsonl"))
+    os.environ.setdefault("BRICK_EVENT_DB", os.path.join(scratch, "brick_events.db"))
+    from rasa_sdk.executor import ActionExecutor
+
+    executor = ActionExecutor()
+    executor.register_package("actions")
+
+    async def run(payload: Dict[Text, Any]) -> Dict[Text, Any]:
+        return as_dict(await executor.run(payload))
+
+    run.actions = sorted(executor.actions)  # type: ignore[attr-defined]
+    return run
+
+
+def http_runner(url: Text, concurrency: int) -> Callable[[Dict[Text, Any]], Awaitable[Dict[Text, Any]]]:
+    import httpx
+
+    client = httpx.AsyncClient(timeout=30.0, limits=httpx.Limits(max_connections=concurrency))
+
+    async def run(payload: Dict[Text, Any]) -> Dict[Text, Any]:
+        response = await client.post(url, json=payload)
+        response.raise_for_status()
+        return response.json()
+
+    run.actions = sorted(SCENARIOS)  # type: ignore[attr-defined]
+    return run
+
+
+async def drive(run: Callable[[Dict[Text, Any]], Awaitable[Dict[Text, Any]]],
+                payloads: List[Dict[Text, Any]], concurrency: int) -> Dict[Text, Dict[Text, Any]]:
+    latencies: Dict[Text, List[float]] = {}
+    sizes: Dict[Text, List[int]] = {}
+    errors: Dict[Text, int] = {}
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(payload: Dict[Text, Any]) -> None:
+        name = payload["next_action"]
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                result = await run(payload)
+            except Exception:
+                errors[name] = errors.get(name, 0) + 1
+                return
+            latencies.setdefault(name, []).append((time.perf_counter() - start) * 1000.0)
+            sizes.setdefault(name, []).append(payload_size(result))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(payload) for payload in payloads))
+    elapsed = time.perf_counter() - start
+
+    report: Dict[Text, Dict[Text, Any]] = {}
+    for name in set(latencies) | set(errors):
+        stats: Dict[Text, Any] = summarize(latencies.get(name, []))
+        stats["errors"] = errors.get(name, 0)
+        stats["payload_bytes"] = sum(sizes.get(name, [0])) / max(len(sizes.get(name, [])), 1)
+        report[name] = stats
+    report["__total__"] = {**summarize(v for values in latencies.values() for v in values),
+                           "errors": sum(errors.values()), "throughput_rps": len(payloads) / elapsed}
+    return report
+
+
+async def measure_allocations(run: Callable[[Dict[Text, Any]], Awaitable[Dict[Text, Any]]],
+                              actions: List[Text], rng: random.Random, args: argparse.Namespace) -> Dict[Text, float]:
+    """Peak traced bytes per call, measured sequentially after a warm-up call."""
+    peaks: Dict[Text, float] = {}
+    for name in actions:
+        payload = build_payload(name, rng, args.history, args.senders)
+        await run(payload)
+        tracemalloc.start()
+        total = 0
+        for _ in range(args.alloc_samples):
+            tracemalloc.reset_peak()
+            current = tracemalloc.get_traced_memory()[0]
+            await run(build_payload(name, rng, args.history, args.senders))
+            total += tracemalloc.get_traced_memory()[1] - current
+        tracemalloc.stop()
+        peaks[name] = total / args.alloc_samples / 1024.0
+    return peaks
+
+
+def check_regressions(report: Dict[Text, Dict[Text, Any]], baseline_path: Text, max_regression: float) -> List[Text]:
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    failures = []
+    for name, stats in report.items():
+        before = baseline.get(name, {}).get("p95")
+        if before and stats["p95"] > before * (1 + max_regression):
+            failures.append(f"{name}: p95 {stats['p95']:.2f}ms vs baseline {before:.2f}ms")
+    return failures
+
+
+async def main_async(args: argparse.Namespace) -> int:
+    run = http_runner(args.url, args.concurrency) if args.url else in_process_runner()
+    actions = args.actions or run.actions  # type: ignore[attr-defined]
+    rng = random.Random(args.seed)
+
+    payloads = [build_payload(rng.choice(actions), rng, args.history, args.senders) for _ in range(args.requests)]
+    for name in actions:
+        await run(build_payload(name, rng, args.history, args.senders))
+    report = await drive(run, payloads, args.concurrency)
+
+    extra = ["errors", "payload_bytes"]
+    if not args.url and args.alloc_samples:
+        for name, kib in (await measure_allocations(run, actions, rng, args)).items():
+            report.setdefault(name, {})["alloc_kib"] = kib
+        extra.append("alloc_kib")
+
+    total = report.pop("__total__")
+    print_table(report, extra)
+    print(f"\n{args.requests} requests, concurrency {args.concurrency}: "
+          f"{total['throughput_rps']:.0f} req/s, p50 {total['p50']:.2f}ms, p95 {total['p95']:.2f}ms, "
+          f"p99 {total['p99']:.2f}ms, {total['errors']} errors")
+    report["__total__"] = total
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.baseline:
+        failures = check_regressions(report, args.baseline, args.max_regression)
+        for failure in failures:
+            print(f"REGRESSION {failure}")
+        return 1 if failures else 0
+    return 1 if total["errors"] else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="action server webhook; runs in-process when omitted")
+    parser.add_argument("--actions", nargs="*", help="limit to these action names")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--history", type=int, default=5, help="prior user/bot turns per tracker")
+    parser.add_argument("--senders", type=int, default=200, help="distinct sender ids")
+    parser.add_argument("--alloc-samples", type=int, default=20, help="calls per action for allocation tracing (0 disables)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the report as JSON")
+    parser.add_argument("--baseline", help="JSON report to compare p95 latencies against")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="allowed fractional p95 increase")
+    sys.exit(asyncio.run(main_async(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,343 @@
+"""Replay recorded conversations through the actions and diff the responses.
+
+Streams an export of tracker events, rebuilds each sender's tracker as it
+goes and, whenever the recording shows a custom action being executed,
+runs that action against the tracker as it stood at that point. The bot
+messages the action sends are compared with the ones recorded after it,
+and latency is reported per action.
+
+Accepted inputs (``.jsonl``, ``.jsonl.gz`` or ``.parquet``), one record per
+line/row, in export order:
+
+* events as published to the ``rasa_events`` queue (``{"sender_id", "event", ...}``)
+* rows of the SQL tracker store's ``events`` table (``{"sender_id", "data": "<event json>"}``)
+* whole trackers (``{"sender_id", "events": [...]}``)
+
+Memory stays bounded however large the export is: each sender keeps only
+its last ``--max-history`` events, at most ``--max-senders`` senders are
+tracked at once (least recently active ones are dropped), pending actions
+are queued in a bounded queue and latencies are reservoir-sampled.
+
+Run from the rasa-brick directory:
+
+    python -m benchmarks.replay events.jsonl.gz --processes 4 --concurrency 32
+    python -m benchmarks.replay events.parquet --actions action_process_order --diffs diffs.jsonl
+    python -m benchmarks.replay events.jsonl --output replay.json --baseline baseline.json
+"""
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterator, List, Optional, Set, Text, Tuple
+from collections import OrderedDict, deque
+import argparse
+import asyncio
+import gzip
+import json
+import os
+import random
+import re
+import sys
+import time
+import zlib
+
+from benchmarks.harness import action_call, print_table, summarize, tracker_state
+from benchmarks.load_test import check_regressions, http_runner, in_process_runner
+
+Event = Dict[Text, Any]
+Runner = Callable[[Dict[Text, Any]], Awaitable[Dict[Text, Any]]]
+
+# Events after which Rasa forgets the conversation (and, for restart, the slots)
+HISTORY_RESETS = ("restart", "session_started")
+_NUMBER = re.compile(r"\d+(?:[.,:]\d+)*")
+_SPACE = re.compile(r"\s+")
+
+
+def _open(path: Text) -> Any:
+    return gzip.open(path, "rt", encoding="utf-8") if path.endswith(".gz") else open(path, encoding="utf-8")
+
+
+def read_records(path: Text, batch_size: int = 10000) -> Iterator[Dict[Text, Any]]:
+    if path.endswith(".parquet"):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("Reading Parquet exports requires pyarrow (pip install pyarrow)")
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_size):
+            yield from batch.to_pylist()
+        return
+    with _open(path) as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def read_events(path: Text) -> Iterator[Tuple[Text, Event]]:
+    """(sender_id, event) pairs from any of the accepted export layouts."""
+    for record in read_records(path):
+        sender_id = record.get("sender_id")
+        if "events" in record and "event" not in record:
+            for event in record["events"]:
+                yield sender_id, event
+        elif "data" in record and "event" not in record:
+            data = record["data"]
+            yield sender_id, json.loads(data) if isinstance(data, (str, bytes)) else data
+        else:
+            yield sender_id, record
+
+
+def normalize(text: Text, mask_numbers: bool) -> Text:
+    text = _SPACE.sub(" ", text or "").strip()
+    return _NUMBER.sub("#", text) if mask_numbers else text
+
+
+class ReplayJob:
+    __slots__ = ("action", "sender_id", "payload", "expected")
+
+    def __init__(self, action: Text, sender_id: Text, payload: Dict[Text, Any]) -> None:
+        self.action = action
+        self.sender_id = sender_id
+        self.payload = payload
+        self.expected: List[Text] = []
+
+
+class SenderState:
+    __slots__ = ("events", "slots", "pending")
+
+    def __init__(self, max_history: int) -> None:
+        self.events: Deque[Event] = deque(maxlen=max_history)
+        self.slots: Dict[Text, Any] = {}
+        self.pending: Optional[ReplayJob] = None
+
+
+class ConversationRebuilder:
+    """Turns an event stream into replay jobs, one per recorded custom action call.
+
+    Rasa logs a custom action's ``action`` event before the bot messages it
+    returned, so a job collects the bot events that follow it and is
+    emitted at the sender's next user or action event.
+    """
+
+    def __init__(self, actions: Set[Text], max_history: int = 200, max_senders: int = 10000) -> None:
+        self.actions = actions
+        self.max_history = max_history
+        self.max_senders = max_senders
+        self._senders: "OrderedDict[Text, SenderState]" = OrderedDict()
+        self.stats = {"events": 0, "senders_evicted": 0}
+
+    def _state(self, sender_id: Text, ready: List[ReplayJob]) -> SenderState:
+        state = self._senders.get(sender_id)
+        if state is None:
+            state = self._senders[sender_id] = SenderState(self.max_history)
+            if len(self._senders) > self.max_senders:
+                _, evicted = self._senders.popitem(last=False)
+                self.stats["senders_evicted"] += 1
+                if evicted.pending:
+                    ready.append(evicted.pending)
+        else:
+            self._senders.move_to_end(sender_id)
+        return state
+
+    def feed(self, sender_id: Text, event: Event) -> List[ReplayJob]:
+        ready: List[ReplayJob] = []
+        self.stats["events"] += 1
+        state = self._state(sender_id, ready)
+        kind = event.get("event")
+        if kind == "bot" and state.pending is not None:
+            state.pending.expected.append(event.get("text") or "")
+        elif kind in ("user", "action") and state.pending is not None:
+            ready.append(state.pending)
+            state.pending = None
+
+        if kind == "action" and event.get("name") in self.actions:
+            # The tracker the action saw: everything before its own action event
+            tracker = tracker_state(sender_id, list(state.events), state.slots)
+            state.pending = ReplayJob(event["name"], sender_id, action_call(event["name"], tracker))
+        elif kind == "slot":
+            state.slots[event.get("name")] = event.get("value")
+        elif kind in HISTORY_RESETS:
+            state.events.clear()
+            if kind == "restart":
+                state.slots.clear()
+        state.events.append(event)
+        return ready
+
+    def flush(self) -> List[ReplayJob]:
+        ready = [state.pending for state in self._senders.values() if state.pending is not None]
+        self._senders.clear()
+        return ready
+
+
+class Reservoir:
+    """Uniform sample of at most ``size`` values from a stream of unknown length."""
+
+    def __init__(self, size: int, seed: int = 0) -> None:
+        self.size = size
+        self.seen = 0
+        self.samples: List[float] = []
+        self._rng = random.Random(seed)
+
+    def add(self, value: float) -> None:
+        self.seen += 1
+        if len(self.samples) < self.size:
+            self.samples.append(value)
+        else:
+            slot = self._rng.randrange(self.seen)
+            if slot < self.size:
+                self.samples[slot] = value
+
+
+class ActionTally:
+    __slots__ = ("latencies", "calls", "errors", "mismatches", "max_ms")
+
+    def __init__(self, reservoir: int) -> None:
+        self.latencies = Reservoir(reservoir)
+        self.calls = self.errors = self.mismatches = 0
+        self.max_ms = 0.0
+
+    def as_dict(self) -> Dict[Text, Any]:
+        return {"calls": self.calls, "errors": self.errors, "mismatches": self.mismatches,
+                "max_ms": self.max_ms, "samples": self.latencies.samples}
+
+
+async def replay(run: Runner, args: argparse.Namespace, actions: Set[Text],
+                 shard: int = 0, shards: int = 1) -> Dict[Text, Any]:
+    rebuilder = ConversationRebuilder(actions, args.max_history, args.max_senders)
+    tallies: Dict[Text, ActionTally] = {}
+    queue: "asyncio.Queue[Optional[ReplayJob]]" = asyncio.Queue(maxsize=args.concurrency * 4)
+    diffs = open(f"{args.diffs}.{shard}" if args.diffs and shards > 1 else args.diffs, "w",
+                 encoding="utf-8") if args.diffs else None
+    diffs_written = 0
+
+    async def worker() -> None:
+        nonlocal diffs_written
+        while True:
+            job = await queue.get()
+            if job is None:
+                return
+            tally = tallies.setdefault(job.action, ActionTally(args.reservoir))
+            tally.calls += 1
+            start = time.perf_counter()
+            try:
+                result = await run(job.payload)
+            except Exception as e:
+                tally.errors += 1
+                if diffs and diffs_written < args.max_diffs:
+                    diffs.write(json.dumps({"action": job.action, "sender_id": job.sender_id, "error": repr(e)}) + "\n")
+                    diffs_written += 1
+                continue
+            elapsed = (time.perf_counter() - start) * 1000.0
+            tally.latencies.add(elapsed)
+            tally.max_ms = max(tally.max_ms, elapsed)
+            actual = [response.get("text") or "" for response in result.get("responses", [])]
+            if [normalize(t, args.mask_numbers) for t in actual] != [normalize(t, args.mask_numbers) for t in job.expected]:
+                tally.mismatches += 1
+                if diffs and diffs_written < args.max_diffs:
+                    diffs.write(json.dumps({"action": job.action, "sender_id": job.sender_id,
+                                            "expected": job.expected, "actual": actual}) + "\n")
+                    diffs_written += 1
+
+    workers = [asyncio.ensure_future(worker()) for _ in range(args.concurrency)]
+    replayed = 0
+    for sender_id, event in read_events(args.export):
+        if shards > 1 and zlib.crc32(str(sender_id).encode()) % shards != shard:
+            continue
+        for job in rebuilder.feed(sender_id, event):
+            await queue.put(job)
+            replayed += 1
+        if args.limit and replayed >= args.limit:
+            break
+    for job in rebuilder.flush():
+        if not args.limit or replayed < args.limit:
+            await queue.put(job)
+            replayed += 1
+    for _ in workers:
+        await queue.put(None)
+    await asyncio.gather(*workers)
+    if diffs:
+        diffs.close()
+    return {"tallies": {name: tally.as_dict() for name, tally in tallies.items()}, **rebuilder.stats}
+
+
+def make_runner(args: argparse.Namespace) -> Tuple[Runner, Set[Text]]:
+    run = http_runner(args.url, args.concurrency) if args.url else in_process_runner()
+    return run, set(args.actions or run.actions)  # type: ignore[attr-defined]
+
+
+def run_shard(args: argparse.Namespace, shard: int, shards: int, results: Any) -> None:
+    run, actions = make_runner(args)
+    results.put(asyncio.run(replay(run, args, actions, shard, shards)))
+
+
+def merge(shards: List[Dict[Text, Any]]) -> Dict[Text, Dict[Text, Any]]:
+    merged: Dict[Text, Dict[Text, Any]] = {}
+    for result in shards:
+        for name, tally in result["tallies"].items():
+            into = merged.setdefault(name, {"calls": 0, "errors": 0, "mismatches": 0, "max_ms": 0.0, "samples": []})
+            for key in ("calls", "errors", "mismatches"):
+                into[key] += tally[key]
+            into["max_ms"] = max(into["max_ms"], tally["max_ms"])
+            into["samples"].extend(tally["samples"])
+    report: Dict[Text, Dict[Text, Any]] = {}
+    for name, tally in merged.items():
+        stats: Dict[Text, Any] = summarize(tally["samples"])
+        stats.update(count=tally["calls"], max=tally["max_ms"], errors=tally["errors"],
+                     mismatch_rate=tally["mismatches"] / max(tally["calls"] - tally["errors"], 1))
+        report[name] = stats
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("export", help="events export (.jsonl, .jsonl.gz or .parquet)")
+    parser.add_argument("--url", help="action server webhook; runs in-process when omitted")
+    parser.add_argument("--actions", nargs="*", help="only replay these actions")
+    parser.add_argument("--processes", type=int, default=1, help="worker processes, each replaying a share of the senders")
+    parser.add_argument("--concurrency", type=int, default=16, help="in-flight actions per process")
+    parser.add_argument("--max-history", type=int, default=200, help="events kept per sender")
+    parser.add_argument("--max-senders", type=int, default=10000, help="senders tracked at once per process")
+    parser.add_argument("--reservoir", type=int, default=100000, help="latency samples kept per action")
+    parser.add_argument("--limit", type=int, default=0, help="stop after this many action calls per process")
+    parser.add_argument("--mask-numbers", action="store_true",
+                        help="ignore digits when diffing (prices, times and counts that depend on the clock)")
+    parser.add_argument("--diffs", help="write mismatching responses here as JSON lines")
+    parser.add_argument("--max-diffs", type=int, default=1000)
+    parser.add_argument("--output", help="write the report as JSON")
+    parser.add_argument("--baseline", help="JSON report to compare p95 latencies against")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="allowed fractional p95 increase")
+    args = parser.parse_args()
+
+    os.environ.setdefault("BRICK_EVENT_SINK", "file")
+    os.environ.setdefault("BRICK_EVENT_LOG", os.devnull)
+    start = time.perf_counter()
+    if args.processes > 1:
+        import multiprocessing
+
+        context = multiprocessing.get_context("fork")
+        results = context.Queue()
+        processes = [context.Process(target=run_shard, args=(args, shard, args.processes, results))
+                     for shard in range(args.processes)]
+        for process in processes:
+            process.start()
+        shards = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+    else:
+        run, actions = make_runner(args)
+        shards = [asyncio.run(replay(run, args, actions))]
+    elapsed = time.perf_counter() - start
+
+    report = merge(shards)
+    print_table(report, ["errors", "mismatch_rate"])
+    calls = sum(stats["count"] for stats in report.values())
+    events = sum(shard["events"] for shard in shards)
+    print(f"\n{events} events, {calls} action calls in {elapsed:.1f}s ({calls / max(elapsed, 1e-9):.0f} calls/s), "
+          f"{sum(shard['senders_evicted'] for shard in shards)} senders evicted")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    failures = check_regressions(report, args.baseline, args.max_regression) if args.baseline else []
+    for failure in failures:
+        print(f"REGRESSION {failure}")
+    sys.exit(1 if failures or any(stats["errors"] for stats in report.values()) else 0)
+
+
+if __name__ == "__main__":
+    main()
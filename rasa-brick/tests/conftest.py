@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The action modules import as ``actions.*`` from the rasa-brick directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,46 @@
+import pytest
+
+from actions.cart import MAX_CART_LINES, MAX_LINE_QUANTITY, Cart, CartFullError
+
+
+def test_encode_decode_round_trip():
+    cart = Cart()
+    cart.add("Steak", 2)
+    cart.add("salmon")
+    cart.add("steak", 3)
+    slot = cart.encode()
+    assert slot == ["steak:5", "salmon:1"]
+    decoded = Cart.decode(slot)
+    assert decoded.lines == cart.lines
+    assert decoded.encode() == slot
+    assert decoded.total_items == 6
+
+
+def test_item_names_may_contain_colons():
+    cart = Cart()
+    cart.add("chef's special: ramen", 2)
+    assert Cart.decode(cart.encode()).lines == {"chef's special: ramen": 2}
+
+
+def test_decode_accepts_legacy_item_dicts():
+    legacy = [{"item": "Steak", "quantity": "two"}, {"item": "steak", "quantity": None}, {"item": "tacos", "quantity": 1}]
+    assert Cart.decode(legacy).encode() == ["steak:3", "tacos:1"]
+    assert Cart.decode(None).lines == {}
+
+
+def test_add_reports_the_delta_and_caps_quantities():
+    cart = Cart()
+    delta = cart.add("sushi", 4)
+    assert delta.as_dict() == {"item": "sushi", "added": 4, "quantity": 4, "lines": 1, "total_items": 4}
+    delta = cart.add("sushi", MAX_LINE_QUANTITY)
+    assert (delta.added, delta.quantity) == (MAX_LINE_QUANTITY - 4, MAX_LINE_QUANTITY)
+
+
+def test_cart_has_a_fixed_number_of_lines():
+    cart = Cart()
+    for i in range(MAX_CART_LINES):
+        cart.add(f"dish {i}")
+    cart.add("dish 0")
+    with pytest.raises(CartFullError):
+        cart.add("one more dish")
+    assert len(Cart.decode(cart.encode()).lines) == MAX_CART_LINES
@@ -0,0 +1,13 @@
+from actions.catalog import DEFAULT_CATALOG_PATH, Catalog
+
+
+def test_only_catalog_keys_are_memoized():
+    catalog = Catalog.from_file(DEFAULT_CATALOG_PATH)
+    occasion = next(iter(catalog.special_touches))
+    assert catalog.special_touch(occasion) is catalog.special_touch(occasion)
+    for i in range(50):
+        catalog.special_touch(f"surprise party {i}")
+        catalog.wine_text(f"martian {i}")
+        catalog.pairing_suggestion(f"martian {i}")
+    assert catalog.wine_text("martian 0").startswith("I'd be happy")
+    assert list(catalog._rendered) == [("special_touch", occasion)]
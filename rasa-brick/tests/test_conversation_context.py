@@ -0,0 +1,67 @@
+from actions.conversation_context import ConversationContext, estimate_tokens
+
+SYSTEM = "You are a restaurant assistant."
+
+
+def user(text, timestamp):
+    return {"event": "user", "text": text, "timestamp": timestamp}
+
+
+def bot(text, timestamp):
+    return {"event": "bot", "text": text, "timestamp": timestamp}
+
+
+def conversation(turns):
+    events = []
+    for i in range(turns):
+        events += [user(f"question {i}", 2 * i), bot(f"answer {i}", 2 * i + 1)]
+    return events
+
+
+def test_window_keeps_the_latest_turns_in_order():
+    context = ConversationContext(max_turns=4)
+    events = conversation(5) + [user("what now", 10)]
+    prompt = context.build_prompt("s1", events, SYSTEM, "what now", budget=1000)
+    contents = [message["content"] for message in prompt.messages]
+    # The current message is already in the events; it is sent once, last
+    assert contents == [SYSTEM, "answer 3", "question 4", "answer 4", "what now"]
+    assert prompt.history_turns == 3
+    assert prompt.tokens == sum(estimate_tokens(text) for text in contents)
+
+
+def test_new_events_are_read_incrementally():
+    context = ConversationContext(max_turns=4)
+    events = conversation(3)
+    context.sync("s1", events)
+    events += [user("more", 6), bot("sure", 7)]
+    buffer = context.sync("s1", events)
+    assert [turn.content for turn in buffer.turns] == ["question 2", "answer 2", "more", "sure"]
+    assert context.stats == {"incremental": 1, "rebuilt": 1}
+
+
+def test_foreign_history_triggers_a_rebuild():
+    context = ConversationContext(max_turns=4)
+    context.sync("s1", conversation(3))
+    # Another worker served these turns, so the buffer's last event no longer matches
+    other = conversation(2) + [user("elsewhere", 100), bot("ok", 101)]
+    buffer = context.sync("s1", other)
+    assert [turn.content for turn in buffer.turns][-2:] == ["elsewhere", "ok"]
+    assert context.stats["rebuilt"] == 2
+
+
+def test_restart_clears_the_history():
+    context = ConversationContext(max_turns=4)
+    events = conversation(2) + [{"event": "restart", "timestamp": 5}, user("hello again", 6)]
+    prompt = context.build_prompt("s1", events, SYSTEM, "hello again", budget=1000)
+    assert prompt.history_turns == 0
+
+
+def test_budget_drops_the_oldest_turns_but_never_the_current_message():
+    context = ConversationContext(max_turns=10)
+    events = conversation(4)
+    budget = sum(estimate_tokens(text) for text in (SYSTEM, "next", "question 3", "answer 3"))
+    prompt = context.build_prompt("s1", events, SYSTEM, "next", budget=budget)
+    assert [message["content"] for message in prompt.messages] == [SYSTEM, "question 3", "answer 3", "next"]
+    prompt = context.build_prompt("s1", events, SYSTEM, "x" * 400, budget=10)
+    assert prompt.history_turns == 0
+    assert prompt.messages[-1]["content"] == "x" * 400
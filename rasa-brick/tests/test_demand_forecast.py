@@ -0,0 +1,60 @@
+import datetime
+
+import pytest
+
+from actions.demand_forecast import DemandForecaster, OrderRecord
+
+RECIPES = {
+    "ingredients": {"rice": "kg", "proteins": "kg"},
+    "items": {
+        "steak": {"mix": 0.5, "yields": {"proteins": 0.4}},
+        "sushi": {"mix": 0.5, "yields": {"rice": 0.5, "proteins": 0.2}},
+    },
+}
+BASELINE = {"monday": {"lunch": 100, "dinner": 200}}
+MONDAY = datetime.date(2024, 6, 3)
+
+
+def orders(day: datetime.date, hour: int, **items: float):
+    when = datetime.datetime.combine(day, datetime.time(hour))
+    return [OrderRecord(when, item, quantity) for item, quantity in items.items()]
+
+
+def test_baseline_seeds_every_service():
+    forecast = DemandForecaster(RECIPES, BASELINE).forecast(0, "dinner")
+    assert forecast.covers == pytest.approx(200)
+    assert forecast.items == pytest.approx({"steak": 100, "sushi": 100})
+    assert forecast.prep["rice"] == (pytest.approx(50), "kg")
+    assert forecast.prep["proteins"][0] == pytest.approx(60)
+
+
+def test_first_day_replaces_the_baseline_then_ewma():
+    forecaster = DemandForecaster(RECIPES, BASELINE, alpha=0.5)
+    week = datetime.timedelta(days=7)
+    forecaster.ingest(orders(MONDAY, 19, steak=10))
+    forecaster.ingest(orders(MONDAY + week, 19, steak=30))
+    forecaster.flush()
+    dinner = forecaster.forecast(0, "dinner")
+    assert dinner.items["steak"] == pytest.approx(20)
+    assert dinner.items["sushi"] == 0
+    assert dinner.prep["proteins"][0] == pytest.approx(8)
+    # Lunch had no orders on either Monday, so it closed as zero
+    assert forecaster.forecast(0, "lunch").covers == 0
+
+
+def test_quiet_days_between_orders_close_as_zero():
+    forecaster = DemandForecaster(RECIPES, BASELINE)
+    forecaster.ingest(orders(MONDAY - datetime.timedelta(days=1), 19, steak=5))
+    forecaster.ingest(orders(MONDAY + datetime.timedelta(days=1), 19, steak=5))
+    forecaster.flush()
+    assert forecaster.forecast(0, "dinner").covers == 0
+
+
+def test_late_records_and_new_items():
+    forecaster = DemandForecaster(RECIPES, max_open_days=1)
+    assert forecaster.ingest(orders(MONDAY, 12, ramen=4)) == 1
+    forecaster.ingest(orders(MONDAY + datetime.timedelta(days=3), 12, steak=1))
+    assert forecaster.ingest(orders(MONDAY, 13, steak=1)) == 0
+    assert forecaster.late_records == 1
+    assert forecaster.forecast(0, "lunch").items["ramen"] == 4
+    assert forecaster.records_ingested == 2
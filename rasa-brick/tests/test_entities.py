@@ -0,0 +1,83 @@
+from datetime import date
+
+from actions.entities import EntityNormalizer, MenuMatcher, parse_number, parse_quantity, resolve_date
+
+TODAY = date(2024, 6, 5)  # a Wednesday
+
+
+def test_parse_number_reads_digits_and_words():
+    assert parse_number("4") == 4
+    assert parse_number(3.0) == 3
+    assert parse_number("a couple") == 2
+    assert parse_number("Dozen") == 12
+
+
+def test_parse_number_rejects_non_numbers():
+    for value in (None, "0", "-2", "lots", "nan", "inf", float("inf"), float("nan")):
+        assert parse_number(value) is None
+    assert parse_quantity("inf") == 1
+    assert parse_quantity("1000") == 99
+
+
+def test_resolve_date_relative_days():
+    assert resolve_date(None, TODAY) == TODAY
+    assert resolve_date("tonight", TODAY) == TODAY
+    assert resolve_date("tomorrow", TODAY) == date(2024, 6, 6)
+    assert resolve_date("this weekend", TODAY) == date(2024, 6, 8)
+    assert resolve_date("friday", TODAY) == date(2024, 6, 7)
+    assert resolve_date("wednesday", TODAY) == TODAY
+
+
+def test_resolve_date_rejects_past_and_unknown_days():
+    assert resolve_date("2024-06-20", TODAY) == date(2024, 6, 20)
+    assert resolve_date("2024-06-01", TODAY) is None
+    assert resolve_date("next week", TODAY) is None
+    assert resolve_date("someday", TODAY) is None
+
+
+def test_menu_matcher_corrects_typos_but_not_different_dishes():
+    matcher = MenuMatcher(["Cheesecake", "Cheese", "Ribeye Steak"], {"ribeye": "ribeye steak"})
+    assert matcher.match("cheesecakes") == "cheesecake"
+    assert matcher.match("chesecake") == "cheesecake"
+    assert matcher.match("ribeye") == "ribeye steak"
+    assert matcher.match("lobster") is None
+    assert matcher.canonical("Lobster ") == "lobster"
+
+
+class FakeTracker:
+    def __init__(self, sender_id, message_id, entities):
+        self.sender_id = sender_id
+        self.latest_message = {"message_id": message_id, "entities": entities}
+
+
+def test_normalizer_parses_each_message_once():
+    calls = []
+
+    def quantity(value):
+        calls.append(value)
+        return parse_quantity(value)
+
+    normalizer = EntityNormalizer({"quantity": quantity})
+    tracker = FakeTracker("s1", "m1", [
+        {"entity": "quantity", "value": "two"},
+        {"entity": "food_item", "value": "Steak"},
+        {"entity": "quantity", "value": "3", "role": "guests"},
+    ])
+    entities = normalizer.for_tracker(tracker)
+    assert normalizer.for_tracker(tracker) is entities
+    assert calls == ["two"]
+    assert normalizer.stats == {"hits": 1, "misses": 1}
+    assert (entities.get("quantity"), entities.raw("quantity")) == (2, "two")
+    # Entity types without a parser keep their raw value
+    assert entities.get("food_item") == "Steak"
+    assert entities.get("date", "today") == "today"
+    normalizer.clear()
+    normalizer.for_tracker(tracker)
+    assert calls == ["two", "two"]
+
+
+def test_distinct_keeps_the_first_mention_of_each_value():
+    normalizer = EntityNormalizer({"food_item": lambda value: value.lower() if value != "?" else None})
+    entities = normalizer.normalize([{"entity": "food_item", "value": v} for v in ("Steak", "steak", "?", "Salmon")])
+    assert [entity.raw for entity in entities.distinct("food_item")] == ["Steak", "Salmon"]
+    assert entities.all("food_item") == ["steak", "steak", "salmon"]
@@ -0,0 +1,214 @@
+from typing import Any, List
+import json
+import sys
+import threading
+import types
+
+import pytest
+
+from actions import event_sink
+from actions.event_sink import EventBackend, EventSink, PostgresBackend
+
+
+class RecordingBackend(EventBackend):
+    """Keeps the batches it is given; the first write waits for ``gate``."""
+
+    def __init__(self, fail_times: int = 0) -> None:
+        self.batches: List[List[Any]] = []
+        self.gate = threading.Event()
+        self.fail_times = fail_times
+
+    def write_batch(self, events: List[Any]) -> None:
+        self.gate.wait(5)
+        if self.fail_times:
+            self.fail_times -= 1
+            raise IOError("backend down")
+        self.batches.append([event["payload"]["n"] for event in events])
+
+
+def emit(sink: EventSink, count: int) -> List[bool]:
+    return [sink.emit("test", {"n": n}, sender_id="s") for n in range(count)]
+
+
+def test_events_are_written_in_batches():
+    backend = RecordingBackend()
+    sink = EventSink(backend, batch_size=10, flush_interval=0.05)
+    emit(sink, 25)
+    backend.gate.set()
+    sink.close()
+    assert [n for batch in backend.batches for n in batch] == list(range(25))
+    assert max(len(batch) for batch in backend.batches) == 10
+    assert sink.stats["written"] == 25
+
+
+def test_full_queue_spills_to_file(tmp_path):
+    spill = tmp_path / "spill.jsonl"
+    backend = RecordingBackend()
+    sink = EventSink(backend, max_queue=2, batch_size=10, flush_interval=0.05,
+                     policy="spill", spill_path=str(spill))
+    accepted = emit(sink, 20)
+    backend.gate.set()
+    sink.close()
+    spilled = [json.loads(line)["payload"]["n"] for line in spill.read_text().splitlines()]
+    assert len(spilled) == sink.stats["spilled"] == accepted.count(False) > 0
+    written = [n for batch in backend.batches for n in batch]
+    assert sorted(written + spilled) == list(range(20))
+
+
+def test_failed_batch_is_retried_with_backoff():
+    backend = RecordingBackend(fail_times=2)
+    backend.gate.set()
+    sink = EventSink(backend, batch_size=10, flush_interval=0.05, retry_delay=0.01)
+    emit(sink, 5)
+    sink.close()
+    assert sink.stats["retries"] == 2
+    assert sink.stats["written"] == 5
+    assert sink.stats["failed_batches"] == 0
+
+
+def test_batch_is_spilled_once_retries_run_out(tmp_path):
+    spill = tmp_path / "spill.jsonl"
+    backend = RecordingBackend(fail_times=100)
+    backend.gate.set()
+    sink = EventSink(backend, batch_size=10, flush_interval=0.05, spill_path=str(spill),
+                     max_retries=2, retry_delay=0.01)
+    emit(sink, 5)
+    sink.close()
+    assert sink.stats["failed_batches"] == 1
+    assert sink.stats["retries"] == 2
+    assert len(spill.read_text().splitlines()) == 5
+
+
+def test_backend_is_built_on_the_writer_thread():
+    built_on = []
+    backend = RecordingBackend()
+    backend.gate.set()
+
+    def factory() -> EventBackend:
+        built_on.append(threading.current_thread().name)
+        if len(built_on) == 1:
+            raise ConnectionError("database not up yet")
+        return backend
+
+    sink = EventSink(backend_factory=factory, flush_interval=0.05, retry_delay=0.01)
+    assert sink.backend is None
+    emit(sink, 3)
+    sink.close()
+    assert built_on == ["brick-event-sink", "brick-event-sink"]
+    assert backend.batches == [[0, 1, 2]]
+
+
+def test_emit_event_recovers_after_a_failure(monkeypatch):
+    backend = RecordingBackend()
+    backend.gate.set()
+    sink = EventSink(backend, flush_interval=0.05)
+
+    def broken() -> EventSink:
+        raise ValueError("Unknown BRICK_EVENT_SINK 'kafka'")
+
+    monkeypatch.setattr(event_sink, "get_event_sink", broken)
+    assert event_sink.emit_event("test", {"n": 0}) is False
+    monkeypatch.setattr(event_sink, "get_event_sink", lambda: sink)
+    assert event_sink.emit_event("test", {"n": 1}) is True
+    sink.close()
+    assert backend.batches == [[1]]
+
+
+class FakePostgres:
+    """Just enough of psycopg2 for PostgresBackend, with a server that can go down."""
+
+    class OperationalError(Exception):
+        pass
+
+    class InterfaceError(Exception):
+        pass
+
+    def __init__(self) -> None:
+        self.up = True
+        self.rows: List[Any] = []
+        self.connects = 0
+
+    def module(self) -> types.ModuleType:
+        psycopg2 = types.ModuleType("psycopg2")
+        psycopg2.connect = self.connect
+        psycopg2.OperationalError = self.OperationalError
+        psycopg2.InterfaceError = self.InterfaceError
+        extras = types.ModuleType("psycopg2.extras")
+        extras.execute_values = self.execute_values
+        psycopg2.extras = extras
+        return psycopg2
+
+    def connect(self, db_url: str) -> Any:
+        if not self.up:
+            raise self.OperationalError("could not connect to server")
+        self.connects += 1
+        server = self
+
+        class Connection:
+            closed = 0
+
+            def __enter__(self) -> "Connection":
+                return self
+
+            def __exit__(self, *exc: Any) -> None:
+                pass
+
+            def cursor(self) -> "Connection":
+                return self
+
+            def execute(self, sql: str) -> None:
+                pass
+
+            def close(self) -> None:
+                self.closed = 1
+
+        connection = Connection()
+        connection.server = server
+        return connection
+
+    def execute_values(self, cursor: Any, sql: str, rows: List[Any]) -> None:
+        if not self.up:
+            raise self.OperationalError("server closed the connection unexpectedly")
+        self.rows += rows
+
+
+@pytest.fixture
+def postgres(monkeypatch):
+    server = FakePostgres()
+    psycopg2 = server.module()
+    monkeypatch.setitem(sys.modules, "psycopg2", psycopg2)
+    monkeypatch.setitem(sys.modules, "psycopg2.extras", psycopg2.extras)
+    return server
+
+
+def event(n: int) -> dict:
+    return {"event_type": "test", "sender_id": "s", "timestamp": 0.0, "payload": {"n": n}}
+
+
+def test_postgres_reconnects_after_operational_error(postgres):
+    backend = PostgresBackend("postgresql://fake")
+    backend.write_batch([event(0)])
+    postgres.up = False
+    with pytest.raises(FakePostgres.OperationalError):
+        backend.write_batch([event(1)])
+    with pytest.raises(FakePostgres.OperationalError):
+        backend.write_batch([event(1)])
+    postgres.up = True
+    backend.write_batch([event(1)])
+    assert backend.reconnects == 1
+    assert postgres.connects == 2
+    assert [json.loads(row[3])["n"] for row in postgres.rows] == [0, 1]
+
+
+def test_sink_rides_out_a_postgres_restart(postgres):
+    backend = PostgresBackend("postgresql://fake")
+    postgres.up = False
+    sink = EventSink(backend, flush_interval=0.05, retry_delay=0.02)
+    emit(sink, 3)
+    timer = threading.Timer(0.1, lambda: setattr(postgres, "up", True))
+    timer.start()
+    timer.join()
+    sink.close()
+    assert sink.stats["written"] == 3
+    assert sink.stats["retries"] >= 1
+    assert len(postgres.rows) == 3
@@ -0,0 +1,46 @@
+import asyncio
+
+from rasa_sdk import Tracker
+from rasa_sdk.executor import CollectingDispatcher
+
+from actions import fallback
+from actions.llm_client import CachedLLMClient, StubBackend
+from actions.semantic_cache import SemanticCache
+from actions.tenant_config import DEFAULT_TENANT
+
+QUESTION = "do you have parking near the restaurant"
+
+
+def tracker(sender_id, events=()):
+    latest = {"text": QUESTION, "intent": {"name": "nlu_fallback"}, "entities": []}
+    return Tracker(sender_id, {}, latest, list(events), False, None, {}, "")
+
+
+def answer(tracker):
+    dispatcher = CollectingDispatcher()
+    asyncio.run(fallback.ActionDefaultFallback().run(dispatcher, tracker, {}))
+    return dispatcher.messages[0]["custom"]["fallback_data"]
+
+
+def earlier_turn():
+    return [
+        {"event": "user", "text": "can I bring my dog", "timestamp": 1.0},
+        {"event": "bot", "text": "Yes, on the terrace.", "timestamp": 2.0},
+    ]
+
+
+def test_cache_is_used_for_standalone_questions_only(monkeypatch):
+    cache = SemanticCache()
+    backend = StubBackend(reply="Yes, behind the restaurant.")
+    monkeypatch.setattr(fallback, "get_semantic_cache", lambda: cache)
+    monkeypatch.setattr(fallback, "get_llm_client", lambda: CachedLLMClient(backend))
+
+    # Asked mid-conversation: neither served from the cache nor stored in it
+    cache.add(QUESTION, "Cached answer.", DEFAULT_TENANT)
+    assert answer(tracker("guest-1", earlier_turn()))["history_turns"]
+    assert backend.calls == 1
+    assert len(cache) == 1
+
+    # Asked cold: served from the cache
+    assert answer(tracker("guest-2"))["cache"] == "semantic"
+    assert backend.calls == 1
@@ -0,0 +1,23 @@
+from actions.feedback_scorer import KeywordScorer
+
+
+def test_negator_flips_a_term_within_the_window():
+    scorer = KeywordScorer()
+    assert scorer.score("not bad at all").sentiment == "positive"
+    assert scorer.score("the food was not very good").negative == ("not good",)
+    assert scorer.score("not bad, terrible service").negative == ("terrible",)
+
+
+def test_determiners_only_negate_the_next_word():
+    scorer = KeywordScorer()
+    assert scorer.score("no complaints, great food").sentiment == "positive"
+    assert scorer.score("no complaints great food").sentiment == "positive"
+    assert scorer.score("nothing but great").sentiment == "positive"
+    assert scorer.score("no good").negative == ("not good",)
+    assert scorer.score("nothing fresh on the menu").sentiment == "negative"
+
+
+def test_determiner_reaches_past_a_linking_verb():
+    scorer = KeywordScorer()
+    assert scorer.score("Nothing was wrong, everything was perfect").sentiment == "positive"
+    assert scorer.score("nothing is fresh here").negative == ("not fresh",)
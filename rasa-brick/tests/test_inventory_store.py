@@ -0,0 +1,64 @@
+from actions.inventory_store import InventoryStore
+
+INVENTORY = {
+    "Proteins": {
+        "ribeye": {"quantity": 45, "unit": "steaks", "threshold": 20},
+        "salmon": {"quantity": 12, "unit": "fillets", "threshold": 15},
+    },
+    "Dairy": {
+        "butter": {"quantity": 40, "unit": "lbs", "threshold": 15},
+    },
+}
+
+
+def test_lookups_and_thresholds():
+    store = InventoryStore.from_dict(INVENTORY)
+    assert len(store) == 3
+    assert "Ribeye" in store and "lobster" not in store
+    assert store.get("RIBEYE").quantity == 45
+    assert store.get("lobster") is None
+    assert store.below_threshold() == ["salmon"]
+    assert [item.name if item else None for item in store.lookup_many(["butter", "lobster", "salmon"])] == \
+        ["butter", None, "salmon"]
+
+
+def test_apply_deltas_adds_in_place_and_reports_unknown_names():
+    store = InventoryStore.from_dict(INVENTORY)
+    version = store.version
+    assert store.apply_deltas({"ribeye": -30, "Salmon": 10, "lobster": 5}) == ["lobster"]
+    assert store.get("ribeye").quantity == 15
+    assert store.get("salmon").quantity == 22
+    assert store.below_threshold() == ["ribeye"]
+    assert store.version == version + 1
+    # Nothing stocked, nothing written
+    assert store.apply_deltas({"lobster": 1}) == ["lobster"]
+    assert store.version == version + 1
+
+
+def test_set_quantities_overwrites_stock():
+    store = InventoryStore.from_dict(INVENTORY)
+    assert store.set_quantities({"butter": 5, "cream": 3}) == ["cream"]
+    assert store.get("butter").below_threshold
+
+
+def test_columns_grow_past_the_initial_capacity():
+    store = InventoryStore(capacity=1)
+    for i in range(10):
+        store.upsert(f"item {i}", "Produce", i, "kg", 5)
+    assert len(store) == 10
+    assert store.get("item 9").quantity == 9
+    assert store.below_threshold() == [f"item {i}" for i in range(5)]
+    assert len(store.categories()["Produce"]) == 10
+
+
+def test_category_columns_read_a_whole_category():
+    store = InventoryStore.from_dict(INVENTORY)
+    columns = store.category_columns("proteins")
+    assert columns.names == ["ribeye", "salmon"]
+    assert columns.units == ["steaks", "fillets"]
+    assert columns.quantities.tolist() == [45, 12]
+    assert columns.below_threshold.tolist() == [False, True]
+    # A copy: later stock changes do not show through
+    store.apply_deltas({"ribeye": -5})
+    assert columns.quantities.tolist() == [45, 12]
+    assert store.category_columns("wine").names == []
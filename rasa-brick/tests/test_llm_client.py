@@ -0,0 +1,216 @@
+from typing import Any, Awaitable, Callable, List, Tuple
+import asyncio
+
+import openai
+import pytest
+
+from actions.llm_client import CircuitBreaker, CircuitOpenError, OpenAIBackend, ResilientBackend
+from benchmarks.fake_llm_server import FakeLLMServer
+
+MESSAGES = [{"role": "user", "content": "do you have parking"}]
+
+
+class ScriptedServer(FakeLLMServer):
+    """Answers requests with the given (delay, fail) plans, in order."""
+
+    def __init__(self, plans: List[Tuple[float, bool]]) -> None:
+        super().__init__()
+        self.plans = list(plans)
+
+    def _plan(self) -> Tuple[float, bool]:
+        return self.plans.pop(0)
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def run_against(server: FakeLLMServer, test: Callable[[OpenAIBackend], Awaitable[Any]]) -> Any:
+    async def main() -> Any:
+        listener = await server.start(port=0)
+        port = listener.sockets[0].getsockname()[1]
+        client = openai.AsyncOpenAI(base_url=f"http://127.0.0.1:{port}/v1", api_key="fake", max_retries=0)
+        try:
+            return await test(OpenAIBackend(client=client))
+        finally:
+            await client.close()
+            listener.close()
+            await listener.wait_closed()
+
+    return asyncio.run(main())
+
+
+def resilient(inner: OpenAIBackend, clock: FakeClock, **kwargs: Any) -> ResilientBackend:
+    breaker = CircuitBreaker(min_calls=4, cooldown=30.0, clock=clock)
+    return ResilientBackend(inner, deadline=2.0, hedge=False, breaker=breaker, **kwargs)
+
+
+async def fail_until_open(backend: ResilientBackend) -> int:
+    calls = 0
+    while backend.breaker.state == "closed":
+        calls += 1
+        with pytest.raises(openai.APIError):
+            await backend.complete(MESSAGES)
+    return calls
+
+
+def test_errors_open_the_circuit():
+    server = FakeLLMServer(delay=0.0, error_rate=1.0)
+    clock = FakeClock()
+
+    async def test(inner: OpenAIBackend) -> None:
+        backend = resilient(inner, clock)
+        assert await fail_until_open(backend) == 4
+        with pytest.raises(CircuitOpenError):
+            await backend.complete(MESSAGES)
+        assert backend.stats["short_circuited"] == 1
+
+    run_against(server, test)
+    assert server.requests == 4
+
+
+def test_successful_trial_closes_the_circuit():
+    server = FakeLLMServer(delay=0.0, error_rate=1.0)
+    clock = FakeClock()
+
+    async def test(inner: OpenAIBackend) -> None:
+        backend = resilient(inner, clock)
+        await fail_until_open(backend)
+        clock.now += 30.0
+        assert backend.breaker.state == "half_open"
+        server.error_rate = 0.0
+        response = await backend.complete(MESSAGES)
+        assert response.text == "(fake) do you have parking"
+        assert backend.breaker.state == "closed"
+
+    run_against(server, test)
+
+
+def test_failed_trial_reopens_the_circuit():
+    server = FakeLLMServer(delay=0.0, error_rate=1.0)
+    clock = FakeClock()
+
+    async def test(inner: OpenAIBackend) -> None:
+        backend = resilient(inner, clock)
+        await fail_until_open(backend)
+        clock.now += 30.0
+        with pytest.raises(openai.APIError):
+            await backend.complete(MESSAGES)
+        assert backend.breaker.state == "open"
+        clock.now += 29.0
+        assert backend.breaker.state == "open"
+        clock.now += 1.0
+        assert backend.breaker.state == "half_open"
+
+    run_against(server, test)
+
+
+def test_half_open_admits_a_single_trial():
+    server = FakeLLMServer(delay=0.0, error_rate=1.0)
+    clock = FakeClock()
+
+    async def test(inner: OpenAIBackend) -> None:
+        backend = resilient(inner, clock)
+        await fail_until_open(backend)
+        clock.now += 30.0
+        server.error_rate, server.delay = 0.0, 0.2
+        trial = asyncio.ensure_future(backend.complete(MESSAGES))
+        await asyncio.sleep(0.05)
+        with pytest.raises(CircuitOpenError):
+            await backend.complete(MESSAGES)
+        await trial
+        assert backend.breaker.state == "closed"
+
+    run_against(server, test)
+
+
+def test_cancelled_trial_frees_the_token():
+    server = FakeLLMServer(delay=0.0, error_rate=1.0)
+    clock = FakeClock()
+
+    async def test(inner: OpenAIBackend) -> None:
+        backend = resilient(inner, clock)
+        await fail_until_open(backend)
+        clock.now += 30.0
+        server.error_rate, server.delay = 0.0, 1.0
+        trial = asyncio.ensure_future(backend.complete(MESSAGES))
+        await asyncio.sleep(0.05)
+        trial.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await trial
+        assert backend.breaker.allow() is not None
+
+    run_against(server, test)
+
+
+def test_stragglers_do_not_close_the_circuit():
+    server = FakeLLMServer(delay=0.0)
+    clock = FakeClock()
+
+    async def test(inner: OpenAIBackend) -> None:
+        backend = resilient(inner, clock)
+        # Admitted while closed, finishes after the circuit opened and went half-open
+        server.delay = 0.3
+        straggler = asyncio.ensure_future(backend.complete(MESSAGES))
+        await asyncio.sleep(0.05)
+        server.delay, server.error_rate = 0.0, 1.0
+        await fail_until_open(backend)
+        clock.now += 30.0
+        server.delay, server.error_rate = 0.5, 0.0
+        trial = asyncio.ensure_future(backend.complete(MESSAGES))
+        await straggler
+        assert backend.breaker.state == "half_open"
+        with pytest.raises(CircuitOpenError):
+            await backend.complete(MESSAGES)
+        await trial
+        assert backend.breaker.state == "closed"
+
+    run_against(server, test)
+
+
+def test_slow_request_is_hedged():
+    # The first request stalls past the deadline; the hedge answers in time
+    server = ScriptedServer([(5.0, False), (0.0, False)])
+
+    async def test(inner: OpenAIBackend) -> ResilientBackend:
+        backend = ResilientBackend(inner, deadline=2.0, hedge=True, hedge_delay=0.1,
+                                   breaker=CircuitBreaker(min_calls=100))
+        assert (await backend.complete(MESSAGES)).text == "(fake) do you have parking"
+        return backend
+
+    backend = run_against(server, test)
+    assert backend.stats["hedged"] == 1
+    assert backend.stats["timeouts"] == 0
+    assert server.requests == 2
+
+
+def test_fast_request_is_not_hedged():
+    server = ScriptedServer([(0.0, False)])
+
+    async def test(inner: OpenAIBackend) -> ResilientBackend:
+        backend = ResilientBackend(inner, deadline=2.0, hedge=True, hedge_delay=0.5,
+                                   breaker=CircuitBreaker(min_calls=100))
+        await backend.complete(MESSAGES)
+        return backend
+
+    backend = run_against(server, test)
+    assert backend.stats["hedged"] == 0
+    assert server.requests == 1
+
+
+def test_early_failure_is_hedged():
+    server = ScriptedServer([(0.0, True), (0.0, False)])
+
+    async def test(inner: OpenAIBackend) -> ResilientBackend:
+        backend = ResilientBackend(inner, deadline=2.0, hedge=True, hedge_delay=0.5,
+                                   breaker=CircuitBreaker(min_calls=100))
+        assert (await backend.complete(MESSAGES)).text == "(fake) do you have parking"
+        return backend
+
+    backend = run_against(server, test)
+    assert backend.stats["hedged"] == 1
+    assert server.errors == 1
@@ -0,0 +1,39 @@
+import asyncio
+import json
+import random
+
+from benchmarks.load_test import SCENARIOS, build_payload, check_regressions, drive
+
+
+def test_build_payload_adds_history_before_the_scenario_message():
+    payload = build_payload("action_process_order", random.Random(0), history=3, senders=5)
+    events = payload["tracker"]["events"]
+    assert payload["next_action"] == "action_process_order"
+    assert len(events) == 7
+    assert events[-1]["text"] in [scenario["text"] for scenario in SCENARIOS["action_process_order"]]
+    assert payload["tracker"]["latest_message"]["text"] == events[-1]["text"]
+    assert payload["sender_id"].startswith("load-")
+
+
+def test_drive_reports_latency_errors_and_payload_size_per_action():
+    async def run(payload):
+        await asyncio.sleep(0)
+        if payload["next_action"] == "action_broken":
+            raise RuntimeError("boom")
+        return {"events": [], "responses": [{"text": "ok"}]}
+
+    payloads = [{"next_action": "action_ok"}] * 4 + [{"next_action": "action_broken"}] * 2
+    report = asyncio.run(drive(run, payloads, concurrency=2))
+    assert report["action_ok"]["count"] == 4
+    assert report["action_ok"]["errors"] == 0
+    assert report["action_ok"]["payload_bytes"] == len(json.dumps({"events": [], "responses": [{"text": "ok"}]}))
+    assert report["action_broken"]["count"] == 0
+    assert report["action_broken"]["errors"] == 2
+    assert report["__total__"]["errors"] == 2
+
+
+def test_check_regressions_flags_p95_beyond_the_allowance(tmp_path):
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(json.dumps({"action_a": {"p95": 10.0}, "action_b": {"p95": 10.0}}))
+    report = {"action_a": {"p95": 11.0}, "action_b": {"p95": 13.0}, "action_new": {"p95": 99.0}}
+    assert check_regressions(report, str(baseline), 0.2) == ["action_b: p95 13.00ms vs baseline 10.00ms"]
@@ -0,0 +1,55 @@
+import pytest
+
+from actions.menu_index import MenuIndex, UnknownDietaryError, build_embeddings, split_dietary
+
+ITEMS = [
+    {"name": "Ribeye", "cuisine": "steakhouse", "periods": ["evening"], "stock_item": "ribeye",
+     "dietary": ["gluten-free"], "signature": ["evening"]},
+    {"name": "Salmon", "cuisine": "seafood", "periods": ["afternoon", "evening"], "stock_item": "salmon",
+     "dietary": ["gluten-free", "pescatarian", "dairy-free"]},
+    {"name": "Mushroom Risotto", "cuisine": "italian", "periods": ["evening"],
+     "dietary": ["vegetarian", "gluten-free"]},
+    {"name": "Vegan Curry", "cuisine": "indian", "periods": ["afternoon", "evening"],
+     "dietary": ["vegetarian", "vegan", "gluten-free", "dairy-free"]},
+    {"name": "Pancakes", "cuisine": "american", "periods": ["morning"], "dietary": ["vegetarian"],
+     "signature": ["morning"]},
+]
+
+
+@pytest.fixture
+def index():
+    return MenuIndex(ITEMS, build_embeddings(ITEMS))
+
+
+def names(picks):
+    return sorted(pick.name for pick in picks)
+
+
+def test_period_filter_and_ordered_items_are_excluded(index):
+    assert names(index.recommend("evening", k=10)) == ["Mushroom Risotto", "Ribeye", "Salmon", "Vegan Curry"]
+    assert "Ribeye" not in names(index.recommend("evening", ordered=["ribeye"], k=10))
+    assert names(index.recommend("morning", k=10)) == ["Pancakes"]
+
+
+def test_every_dietary_restriction_must_hold(index):
+    assert names(index.recommend("evening", dietary=["Vegetarian"], k=10)) == ["Mushroom Risotto", "Vegan Curry"]
+    assert names(index.recommend("evening", dietary=["vegetarian", "dairy free"], k=10)) == ["Vegan Curry"]
+    assert names(index.recommend("evening", dietary=["vegan", "pescatarian"], k=10)) == []
+
+
+def test_unknown_restrictions_are_not_ignored(index):
+    with pytest.raises(UnknownDietaryError) as raised:
+        index.recommend("evening", dietary=["vegan", "kosher"])
+    assert raised.value.restrictions == ["kosher"]
+    assert split_dietary(["Gluten Free", "kosher", "gluten-free"]) == (["gluten-free"], ["kosher"])
+
+
+def test_low_stock_items_are_skipped(index):
+    picks = index.recommend("evening", unavailable=["salmon", "ribeye"], k=10)
+    assert names(picks) == ["Mushroom Risotto", "Vegan Curry"]
+
+
+def test_top_k_is_ordered_by_score(index):
+    picks = index.recommend("evening", k=2)
+    assert len(picks) == 2
+    assert picks[0].score >= picks[1].score
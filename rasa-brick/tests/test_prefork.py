@@ -0,0 +1,38 @@
+import multiprocessing
+import os
+
+import numpy as np
+import pytest
+
+from actions.inventory_store import InventoryStore
+from actions.prefork import shared_array
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork()")
+
+
+def test_shared_array_copies_and_is_read_only_by_default():
+    source = np.arange(6, dtype=np.float64).reshape(2, 3)
+    shared = shared_array(source)
+    assert np.array_equal(shared, source)
+    assert not shared.flags.writeable
+    with pytest.raises(ValueError):
+        shared[0, 0] = 1.0
+
+
+def test_forked_workers_update_the_same_stock():
+    store = InventoryStore.from_dict({"Proteins": {"ribeye": {"quantity": 10, "unit": "steaks", "threshold": 5}}})
+    context = multiprocessing.get_context("fork")
+    store.share_columns(lambda array: shared_array(array, writeable=True), context.RLock())
+
+    def sell() -> None:
+        store.apply_deltas({"ribeye": -1})
+
+    workers = [context.Process(target=sell) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(10)
+    assert [worker.exitcode for worker in workers] == [0] * 4
+    assert store.get("ribeye").quantity == 6
+    # Every worker's write is visible to the snapshot version check
+    assert store.version == 5
@@ -0,0 +1,88 @@
+import gzip
+import json
+
+from benchmarks.replay import ConversationRebuilder, Reservoir, normalize, read_events
+
+
+def user(text):
+    return {"event": "user", "text": text, "parse_data": {"text": text, "intent": {"name": "greet"}, "entities": []},
+            "message_id": text}
+
+
+def action(name):
+    return {"event": "action", "name": name}
+
+
+def bot(text):
+    return {"event": "bot", "text": text}
+
+
+def test_jobs_carry_the_tracker_before_the_action_and_the_recorded_reply():
+    rebuilder = ConversationRebuilder({"action_process_order"})
+    stream = [user("two steaks"), {"event": "slot", "name": "cuisine", "value": "steakhouse"},
+              action("action_process_order"), bot("Excellent choice!"), bot("Anything else?"),
+              action("action_listen"), user("no thanks")]
+    jobs = [job for event in stream for job in rebuilder.feed("s1", event)]
+    assert len(jobs) == 1
+    job = jobs[0]
+    assert job.action == "action_process_order"
+    assert job.expected == ["Excellent choice!", "Anything else?"]
+    tracker = job.payload["tracker"]
+    assert tracker["latest_message"]["text"] == "two steaks"
+    assert tracker["slots"] == {"cuisine": "steakhouse"}
+    assert [event["event"] for event in tracker["events"]] == ["user", "slot"]
+
+
+def test_restart_forgets_events_and_slots_and_flush_emits_pending_jobs():
+    rebuilder = ConversationRebuilder({"action_process_order"})
+    for event in (user("steak"), {"event": "slot", "name": "cuisine", "value": "steakhouse"},
+                  {"event": "restart"}, user("salmon"), action("action_process_order"), bot("Done")):
+        assert rebuilder.feed("s1", event) == []
+    (job,) = rebuilder.flush()
+    assert job.payload["tracker"]["slots"] == {}
+    assert job.expected == ["Done"]
+
+
+def test_evicted_senders_hand_over_their_pending_job():
+    rebuilder = ConversationRebuilder({"action_process_order"}, max_senders=1)
+    rebuilder.feed("s1", user("steak"))
+    rebuilder.feed("s1", action("action_process_order"))
+    ready = rebuilder.feed("s2", user("hi"))
+    assert [job.sender_id for job in ready] == ["s1"]
+    assert rebuilder.stats["senders_evicted"] == 1
+
+
+def test_history_is_bounded_per_sender():
+    rebuilder = ConversationRebuilder({"action_process_order"}, max_history=3)
+    for i in range(10):
+        rebuilder.feed("s1", user(f"message {i}"))
+    rebuilder.feed("s1", action("action_process_order"))
+    (job,) = rebuilder.flush()
+    assert [event["text"] for event in job.payload["tracker"]["events"]] == ["message 7", "message 8", "message 9"]
+
+
+def test_read_events_accepts_every_export_layout(tmp_path):
+    path = tmp_path / "events.jsonl.gz"
+    records = [
+        {"sender_id": "a", "event": "user", "text": "hi"},
+        {"sender_id": "b", "data": json.dumps({"event": "bot", "text": "hello"})},
+        {"sender_id": "c", "events": [{"event": "user", "text": "one"}, {"event": "bot", "text": "two"}]},
+    ]
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        f.write("\n".join(json.dumps(record) for record in records) + "\n\n")
+    events = [(sender, event["text"]) for sender, event in read_events(str(path))]
+    assert events == [("a", "hi"), ("b", "hello"), ("c", "one"), ("c", "two")]
+
+
+def test_reservoir_stays_bounded():
+    reservoir = Reservoir(10)
+    for value in range(1000):
+        reservoir.add(float(value))
+    assert reservoir.seen == 1000
+    assert len(reservoir.samples) == 10
+    assert len(set(reservoir.samples)) == 10
+
+
+def test_normalize_masks_numbers_on_request():
+    assert normalize("  Table at  19:00\nfor 4 ", False) == "Table at 19:00 for 4"
+    assert normalize("Total $31.20 at 19:00", True) == "Total $# at #"
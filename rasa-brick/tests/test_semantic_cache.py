@@ -0,0 +1,17 @@
+from actions.semantic_cache import SemanticCache
+
+
+def test_entries_are_partitioned_by_tenant():
+    cache = SemanticCache()
+    cache.add("do you have parking nearby", "Yes, behind the restaurant.", "brick-bistro")
+    assert cache.lookup("Do you have parking nearby?", "brick-bistro").answer == "Yes, behind the restaurant."
+    assert cache.lookup("Do you have parking nearby?", "joes-diner") is None
+
+
+def test_expired_entries_do_not_hide_live_ones():
+    cache = SemanticCache(ttl=60.0)
+    cache.add("do you have parking nearby", "stale answer")
+    cache._added[0] -= 120.0
+    assert cache.lookup("do you have parking nearby") is None
+    cache.add("do you have parking nearby", "fresh answer")
+    assert cache.lookup("do you have parking nearby").answer == "fresh answer"
@@ -0,0 +1,27 @@
+import pytest
+
+from actions.tenant_config import MemoryTenantBackend, TenantConfigStore, TenantOwnershipError, owner_for_tracker
+
+
+class FakeTracker:
+    def __init__(self, metadata=None) -> None:
+        self.latest_message = {"metadata": metadata or {}}
+
+
+def test_owner_comes_from_message_metadata(monkeypatch):
+    monkeypatch.delenv("BRICK_TENANT_OWNER_METADATA", raising=False)
+    assert owner_for_tracker(FakeTracker({"user_id": "u1"})) is None
+    monkeypatch.setenv("BRICK_TENANT_OWNER_METADATA", "user_id")
+    assert owner_for_tracker(FakeTracker({"user_id": 42})) == "42"
+    assert owner_for_tracker(FakeTracker()) is None
+
+
+def test_first_chat_writer_owns_the_tenant():
+    store = TenantConfigStore(MemoryTenantBackend(), {"name": "New Restaurant", "cuisine": "various"})
+    config = store.update("pho-real", {"name": "Pho Real"}, owner="u1")
+    assert config.owned_by("u1") and "setup_owner" not in config.settings_dict()
+    assert store.update("pho-real", {"cuisine": "thai"}, owner="u1").settings["cuisine"] == "thai"
+    with pytest.raises(TenantOwnershipError):
+        store.update("pho-real", {"cuisine": "pizza"}, owner="u2")
+    # The dashboard writes without an owner
+    assert store.update("pho-real", {"cuisine": "pizza"}).settings["cuisine"] == "pizza"
@@ -0,0 +1,150 @@
+from typing import Any, List, Tuple
+import datetime
+import time
+
+import pytest
+
+from actions import inventory_store
+from actions.inventory_store import DEFAULT_INVENTORY_PATH, InventoryStore
+from actions.time_snapshot import TimeBucketScheduler, TimeSnapshot, bucket_start
+
+
+class FakeClock:
+    def __init__(self, now: datetime.datetime) -> None:
+        self.now = now
+
+    def __call__(self) -> datetime.datetime:
+        return self.now
+
+    def advance(self, **delta: float) -> None:
+        self.now += datetime.timedelta(**delta)
+
+
+class FakeData:
+    """Catalog and inventory versions, plus a record of every snapshot built."""
+
+    def __init__(self) -> None:
+        self.catalog = 1
+        self.inventory = 1
+        self.built: List[Tuple[datetime.datetime, datetime.datetime, Tuple[Any, ...]]] = []
+
+    def version(self) -> Tuple[Any, ...]:
+        return (self.catalog, self.inventory)
+
+    def build(self, start: datetime.datetime, expires: datetime.datetime, version: Tuple[Any, ...]) -> TimeSnapshot:
+        self.built.append((start, expires, version))
+        return TimeSnapshot(start, expires, version, start.weekday(), start.hour, "evening", "dinner",
+                            1.0, 1.0, None, "", (), f"built for {start:%H:%M}")
+
+
+def scheduler(clock: FakeClock, data: FakeData, **kwargs: Any) -> TimeBucketScheduler:
+    return TimeBucketScheduler(clock=clock, build=data.build, version=data.version, **kwargs)
+
+
+def at(hour: int, minute: int = 0, second: int = 0) -> datetime.datetime:
+    return datetime.datetime(2024, 6, 7, hour, minute, second)
+
+
+def test_same_bucket_is_served_from_the_snapshot():
+    clock, data = FakeClock(at(18, 5)), FakeData()
+    times = scheduler(clock, data)
+    first = times.current()
+    for _ in range(5):
+        clock.advance(minutes=10)
+        assert times.current() is first
+    assert times.stats == {"hits": 5, "builds": 1, "prefetched": 0}
+    assert data.built == [(at(18), at(19), (1, 1))]
+
+
+def test_crossing_a_bucket_boundary_rebuilds():
+    clock, data = FakeClock(at(18, 59, 59)), FakeData()
+    times = scheduler(clock, data)
+    before = times.current()
+    clock.advance(seconds=1)
+    after = times.current()
+    assert (before.hour, after.hour) == (18, 19)
+    assert after.start == before.expires == at(19)
+    assert times.current() is after
+    assert times.stats["builds"] == 2
+    assert times.stats["hits"] == 1
+
+
+def test_quarter_hour_buckets():
+    clock, data = FakeClock(at(12, 14)), FakeData()
+    times = scheduler(clock, data, bucket_minutes=15)
+    times.current()
+    clock.advance(minutes=1)
+    times.current()
+    clock.advance(minutes=14)
+    times.current()
+    assert [start for start, _, _ in data.built] == [at(12), at(12, 15)]
+    assert times.stats["hits"] == 1
+
+
+def test_version_changes_rebuild_within_the_bucket():
+    clock, data = FakeClock(at(9, 30)), FakeData()
+    times = scheduler(clock, data)
+    times.current()
+    data.catalog += 1
+    assert times.current().version == (2, 1)
+    data.inventory += 1
+    assert times.current().version == (2, 2)
+    times.current()
+    assert times.stats["builds"] == 3
+    assert times.stats["hits"] == 1
+    assert [start for start, _, _ in data.built] == [at(9)] * 3
+
+
+def test_invalidate_forces_a_rebuild():
+    clock, data = FakeClock(at(9, 30)), FakeData()
+    times = scheduler(clock, data)
+    first = times.current()
+    times.invalidate()
+    assert times.current() is not first
+    assert times.stats["builds"] == 2
+
+
+def test_explicit_time_overrides_the_clock():
+    clock, data = FakeClock(at(9, 30)), FakeData()
+    times = scheduler(clock, data)
+    assert times.current(at(21, 15)).hour == 21
+    assert times.current().hour == 9
+    assert times.stats["builds"] == 2
+
+
+def test_bucket_must_divide_an_hour():
+    with pytest.raises(ValueError):
+        TimeBucketScheduler(bucket_minutes=7)
+    assert bucket_start(at(10, 52, 31), 20) == at(10, 40)
+
+
+def test_next_bucket_is_prefetched():
+    clock, data = FakeClock(at(17, 59, 30)), FakeData()
+    times = scheduler(clock, data, prefetch=60.0)
+    try:
+        times.current()
+        deadline = time.monotonic() + 5
+        while times.stats["builds"] < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert data.built[1][:2] == (at(18), at(19))
+        clock.advance(seconds=35)
+        snapshot = times.current()
+        assert snapshot.start == at(18)
+        assert times.stats["builds"] == 2
+        assert times.stats["prefetched"] == 1
+    finally:
+        times.stop()
+
+
+def test_stock_changes_rebuild_the_recommendations(monkeypatch):
+    stock = InventoryStore.from_file(DEFAULT_INVENTORY_PATH)
+    monkeypatch.setattr(inventory_store, "_store", stock)
+    clock = FakeClock(at(19, 10))
+    times = TimeBucketScheduler(clock=clock)
+    before = times.current()
+    assert "ribeye" not in before.unavailable
+    stock.apply_deltas({"ribeye": -40})
+    after = times.current()
+    assert after is not before
+    assert "ribeye" in after.unavailable
+    assert times.stats["builds"] == 2